@@ -3,39 +3,81 @@ from __future__ import annotations
 
 import logging
 
-from homeassistant.components.bluetooth import (
-    BluetoothCallbackMatcher,
-    BluetoothChange,
-    BluetoothServiceInfoBleak,
-    async_register_callback,
-)
+import voluptuous as vol
+
+from homeassistant.components.bluetooth import BluetoothServiceInfoBleak
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_MAC, CONF_NAME, Platform
 from homeassistant.core import HomeAssistant, callback
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
 from .const import (
     DOMAIN,
     CONF_PRODUCT_ID,
     CONF_DISCONNECT_DELAY,
+    CONF_DISCONNECT_MODE,
+    CONF_PREWARM,
+    CONF_PREWARM_ENTITIES,
+    CONF_SEGMENT_DELTAS,
     CONF_LED_COUNT,
     CONF_SEGMENTS,
     CONF_LED_TYPE,
     CONF_COLOR_ORDER,
+    CONF_CONNECTION_SLOTS,
+    DEFAULT_CONNECTION_SLOTS,
     DEFAULT_DISCONNECT_DELAY,
+    DEFAULT_DISCONNECT_MODE,
+    DEFAULT_PREWARM,
+    DEFAULT_SEGMENT_DELTAS,
+    DATA_PREWARM,
     DEFAULT_LED_COUNT,
     DEFAULT_SEGMENTS,
     LedType,
     ColorOrder,
     get_device_capabilities,
 )
+from .advertisements import get_advertisement_dispatcher
 from .device import LEDNetWFDevice
 from .capabilities import CAPABILITIES
+from .connection import get_connection_scheduler
+from .prewarm import PrewarmController
 from . import protocol
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.NUMBER]
 
+# Optional integration-wide settings shared by all config entries:
+#
+#   lednetwf_ble:
+#     connection_slots: 3   # max simultaneous connections per adapter/proxy
+#                           # (default 0 = no limit)
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(
+                    CONF_CONNECTION_SLOTS, default=DEFAULT_CONNECTION_SLOTS
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=20)),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up integration-wide state shared by all LEDnetWF entries."""
+    scheduler = get_connection_scheduler(hass)
+    if DOMAIN in config:
+        scheduler.slots_per_adapter = config[DOMAIN][CONF_CONNECTION_SLOTS]
+    _LOGGER.debug(
+        "Connection scheduler: %s slots per adapter",
+        scheduler.slots_per_adapter or "unlimited",
+    )
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up LEDnetWF BLE v2 from a config entry."""
@@ -46,6 +88,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     name = entry.data.get(CONF_NAME, address)
     product_id = entry.data.get(CONF_PRODUCT_ID)
     disconnect_delay = entry.options.get(CONF_DISCONNECT_DELAY, DEFAULT_DISCONNECT_DELAY)
+    disconnect_mode = entry.options.get(CONF_DISCONNECT_MODE, DEFAULT_DISCONNECT_MODE)
+    segment_deltas = entry.options.get(CONF_SEGMENT_DELTAS, DEFAULT_SEGMENT_DELTAS)
 
     _LOGGER.debug(
         "Setting up LEDnetWF device: %s (%s), product_id=0x%02X",
@@ -61,6 +105,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         name,
         product_id,
         disconnect_delay,
+        disconnect_mode=disconnect_mode,
+        segment_deltas=segment_deltas,
     )
 
     # Apply probed capabilities if available (from config flow probing)
@@ -102,26 +148,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = device
 
-    # Register Bluetooth callback for advertisement updates
+    # Opt-in connection pre-warming
+    _async_setup_prewarm(hass, entry, device)
+    entry.async_on_unload(lambda: _async_stop_prewarm(hass, entry))
+
+    # Receive this device's advertisements from the shared dispatcher
     @callback
-    def _async_update_ble(
-        service_info: BluetoothServiceInfoBleak,
-        change: BluetoothChange,
-    ) -> None:
+    def _async_update_ble(service_info: BluetoothServiceInfoBleak) -> None:
         """Handle Bluetooth advertisement updates."""
         if service_info.manufacturer_data or service_info.service_data:
             device.update_from_advertisement(
                 service_info.manufacturer_data,
                 service_info.service_data,
             )
+        prewarm = hass.data[DATA_PREWARM].get(entry.entry_id)
+        if prewarm is not None:
+            prewarm.on_advertisement()
 
     entry.async_on_unload(
-        async_register_callback(
-            hass,
-            _async_update_ble,
-            BluetoothCallbackMatcher(address=address),
-            BluetoothChange.ADVERTISEMENT,
-        )
+        get_advertisement_dispatcher(hass).async_add(address, _async_update_ble)
     )
 
     # Handle options updates
@@ -133,6 +178,31 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+@callback
+def _async_setup_prewarm(
+    hass: HomeAssistant, entry: ConfigEntry, device: LEDNetWFDevice
+) -> None:
+    """Start pre-warming for the entry if enabled in its options."""
+    controllers = hass.data.setdefault(DATA_PREWARM, {})
+    controllers[entry.entry_id] = None
+    if not entry.options.get(CONF_PREWARM, DEFAULT_PREWARM):
+        return
+    controller = PrewarmController(
+        hass, device, list(entry.options.get(CONF_PREWARM_ENTITIES, []))
+    )
+    controller.async_start()
+    controllers[entry.entry_id] = controller
+    _LOGGER.debug("Connection pre-warming enabled for %s", device.name)
+
+
+@callback
+def _async_stop_prewarm(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Stop pre-warming for the entry."""
+    controller = hass.data.get(DATA_PREWARM, {}).pop(entry.entry_id, None)
+    if controller is not None:
+        controller.async_stop()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
@@ -152,9 +222,19 @@ async def async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None
         await hass.config_entries.async_reload(entry.entry_id)
         return
 
-    # Update disconnect delay
-    new_delay = entry.options.get(CONF_DISCONNECT_DELAY, DEFAULT_DISCONNECT_DELAY)
-    device._disconnect_delay = new_delay
+    # Update disconnect delay and how it bounds the adaptive idle policy
+    device.set_disconnect_policy(
+        entry.options.get(CONF_DISCONNECT_DELAY, DEFAULT_DISCONNECT_DELAY),
+        entry.options.get(CONF_DISCONNECT_MODE, DEFAULT_DISCONNECT_MODE),
+    )
+
+    device.set_segment_deltas(
+        entry.options.get(CONF_SEGMENT_DELTAS, DEFAULT_SEGMENT_DELTAS)
+    )
+
+    # Restart pre-warming with the new settings
+    _async_stop_prewarm(hass, entry)
+    _async_setup_prewarm(hass, entry, device)
 
     # Check if LED settings need to be applied
     product_id = entry.data.get(CONF_PRODUCT_ID)
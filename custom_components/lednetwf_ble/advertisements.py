@@ -0,0 +1,165 @@
+"""Integration-wide Bluetooth advertisement dispatch for LEDnetWF devices.
+
+Each configured device gets one address matcher, which Home Assistant's
+Bluetooth manager indexes by address, so every advertisement the light sends
+reaches its entry whatever manufacturer ID, service data or local name it
+carries (protocol.py accepts the whole 0x5A00-0x5AFF company ID range). All
+matchers share one dispatcher callback that routes by address to the entry
+that owns the device.
+
+An advertisement that is delivered more than once is recognised by identity
+and dropped. Per-device arrival counts and the smoothed advertisement
+interval are kept for diagnostics.
+
+Usage:
+    dispatcher = get_advertisement_dispatcher(hass)
+    remove = dispatcher.async_add(address, on_advertisement)
+    ...
+    remove()
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.bluetooth import (
+    BluetoothCallbackMatcher,
+    BluetoothChange,
+    BluetoothServiceInfoBleak,
+    async_register_callback,
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DATA_ADVERTISEMENT_DISPATCHER
+
+_LOGGER = logging.getLogger(__name__)
+
+# Weight of the newest interval in the smoothed advertisement interval
+INTERVAL_SMOOTHING = 0.1
+
+
+@dataclass
+class _Route:
+    """Listener and advertisement statistics for one device address."""
+
+    listener: Callable[[BluetoothServiceInfoBleak], None]
+    unregister: CALLBACK_TYPE | None = None
+    count: int = 0
+    duplicates: int = 0
+    first_seen: float | None = None
+    last_seen: float | None = None
+    avg_interval: float | None = None
+    last_info: BluetoothServiceInfoBleak | None = None
+
+    def record(self, now: float) -> None:
+        """Count an advertisement that arrived at now."""
+        if self.last_seen is None:
+            self.first_seen = now
+        else:
+            interval = now - self.last_seen
+            if self.avg_interval is None:
+                self.avg_interval = interval
+            else:
+                self.avg_interval += INTERVAL_SMOOTHING * (interval - self.avg_interval)
+        self.last_seen = now
+        self.count += 1
+
+    def stats(self, now: float) -> dict[str, Any]:
+        """Return arrival counts and rates for diagnostics."""
+        elapsed = now - self.first_seen if self.first_seen is not None else 0.0
+        return {
+            "advertisements": self.count,
+            "duplicates": self.duplicates,
+            "avg_rate": round(self.count / elapsed, 3) if elapsed > 0 else None,
+            "recent_rate": (
+                round(1 / self.avg_interval, 3) if self.avg_interval else None
+            ),
+            "last_seen": (
+                round(now - self.last_seen, 1) if self.last_seen is not None else None
+            ),
+        }
+
+
+class AdvertisementDispatcher:
+    """Routes LEDnetWF advertisements to the device that sent them."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the dispatcher; matchers are registered per device."""
+        self._hass = hass
+        self._routes: dict[str, _Route] = {}
+        self.unrouted = 0
+
+    @callback
+    def async_add(
+        self,
+        address: str,
+        listener: Callable[[BluetoothServiceInfoBleak], None],
+    ) -> CALLBACK_TYPE:
+        """Route advertisements from address to listener until removed."""
+        key = address.upper()
+        previous = self._routes.get(key)
+        if previous is not None and previous.unregister is not None:
+            previous.unregister()
+        route = self._routes[key] = _Route(listener)
+        route.unregister = async_register_callback(
+            self._hass,
+            self._async_dispatch,
+            BluetoothCallbackMatcher(address=address),
+            BluetoothChange.ADVERTISEMENT,
+        )
+        _LOGGER.debug("Routing advertisements from %s", address)
+
+        @callback
+        def _async_remove() -> None:
+            if route.unregister is not None:
+                route.unregister()
+                route.unregister = None
+            if self._routes.get(key) is route:
+                del self._routes[key]
+
+        return _async_remove
+
+    @callback
+    def _async_dispatch(
+        self,
+        service_info: BluetoothServiceInfoBleak,
+        change: BluetoothChange,
+    ) -> None:
+        """Hand an advertisement to the listener for its address."""
+        route = self._routes.get(service_info.address.upper())
+        if route is None:
+            self.unrouted += 1
+            return
+        # Scanners can hand over the same advertisement more than once
+        if service_info is route.last_info:
+            route.duplicates += 1
+            return
+        route.last_info = service_info
+        route.record(time.monotonic())
+        route.listener(service_info)
+
+    def stats(self, address: str) -> dict[str, Any] | None:
+        """Return advertisement statistics for one device address."""
+        route = self._routes.get(address.upper())
+        if route is None:
+            return None
+        return route.stats(time.monotonic())
+
+    def metrics(self) -> dict[str, Any]:
+        """Return dispatcher-wide routing counters."""
+        return {
+            "devices": len(self._routes),
+            "matchers": sum(1 for route in self._routes.values() if route.unregister),
+            "unrouted": self.unrouted,
+        }
+
+
+def get_advertisement_dispatcher(hass: HomeAssistant) -> AdvertisementDispatcher:
+    """Return the integration-wide dispatcher, creating it on first use."""
+    dispatcher = hass.data.get(DATA_ADVERTISEMENT_DISPATCHER)
+    if dispatcher is None:
+        dispatcher = hass.data[DATA_ADVERTISEMENT_DISPATCHER] = AdvertisementDispatcher(hass)
+    return dispatcher
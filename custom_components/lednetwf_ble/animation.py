@@ -0,0 +1,204 @@
+"""Host-side animation of LEDnetWF lights.
+
+Firmware without device-side fades (switch_led_v2 / bright_value_v2) only
+knows instant changes, so transitions are played by the integration: the
+light's color, color temperature and brightness are interpolated between
+two states and sent as a stream of frames.
+
+Frames are scheduled at a fixed rate and each one waits for its GATT write.
+When writes take longer than a frame, the frame slots that passed in the
+meantime are dropped and the next frame is computed for the current time,
+so a slow link shows fewer steps but still finishes on time. Starting a new
+animation, or cancelling, stops the running one.
+
+Usage:
+    engine = AnimationEngine(send_frame, fps=10)
+    engine.start(LightFrame(40, rgb=(255, 0, 0)), LightFrame(255, rgb=(0, 0, 255)), 2.0)
+    ...
+    engine.cancel()
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, replace
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_FPS = 10
+
+
+@dataclass(frozen=True)
+class LightFrame:
+    """What the light shows at one point of an animation.
+
+    Exactly one of rgb, kelvin or effect is normally set; brightness is
+    0-255 and applies to whichever it is.
+    """
+
+    brightness: int
+    rgb: tuple[int, int, int] | None = None
+    kelvin: int | None = None
+    effect: str | None = None
+    speed: int | None = None
+
+
+def _lerp(start: float, end: float, progress: float) -> int:
+    return round(start + (end - start) * progress)
+
+
+def interpolate(start: LightFrame, end: LightFrame, progress: float) -> LightFrame:
+    """Return the frame progress (0-1) of the way from start to end.
+
+    Brightness always fades. Color and color temperature fade when both
+    frames are in the same mode; otherwise the end mode applies at once
+    and only the brightness fades into it.
+    """
+    if progress >= 1.0:
+        return end
+    brightness = _lerp(start.brightness, end.brightness, progress)
+    if end.rgb is not None and start.rgb is not None:
+        rgb = tuple(_lerp(a, b, progress) for a, b in zip(start.rgb, end.rgb))
+        return replace(end, brightness=brightness, rgb=rgb)
+    if end.kelvin is not None and start.kelvin is not None:
+        kelvin = _lerp(start.kelvin, end.kelvin, progress)
+        return replace(end, brightness=brightness, kelvin=kelvin)
+    return replace(end, brightness=brightness)
+
+
+class AnimationEngine:
+    """Plays one animation at a time for a device, at a bounded frame rate."""
+
+    def __init__(
+        self,
+        send_frame: Callable[[LightFrame], Awaitable[bool]],
+        fps: int = DEFAULT_FPS,
+        name: str = "",
+    ) -> None:
+        """Initialize the engine.
+
+        Args:
+            send_frame: Writes one frame to the device, True if written
+            fps: Target frames per second
+            name: Device name for log messages
+        """
+        self._send_frame = send_frame
+        self.fps = fps
+        self._name = name
+        self._task: asyncio.Task | None = None
+
+        self.animations = 0
+        self.cancelled = 0
+        self.frames = 0
+        self.dropped = 0
+        self.unchanged = 0
+        self.failed = 0
+        # Time spent animating and deviation of frame starts from schedule
+        self._active_time = 0.0
+        self._ticks = 0
+        self._jitter_total = 0.0
+        self._jitter_max = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Return True while an animation is playing."""
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self,
+        start: LightFrame,
+        end: LightFrame,
+        duration: float,
+        on_finish: Callable[[], Awaitable[Any]] | None = None,
+    ) -> asyncio.Task:
+        """Animate from start to end over duration seconds, replacing any
+        running animation. on_finish runs after the last frame unless the
+        animation is cancelled.
+        """
+        self.cancel()
+        self.animations += 1
+        self._task = asyncio.create_task(self._run(start, end, duration, on_finish))
+        return self._task
+
+    def cancel(self) -> bool:
+        """Stop the running animation; returns True if one was running."""
+        if not self.running:
+            self._task = None
+            return False
+        self._task.cancel()
+        self._task = None
+        self.cancelled += 1
+        return True
+
+    async def _run(
+        self,
+        start: LightFrame,
+        end: LightFrame,
+        duration: float,
+        on_finish: Callable[[], Awaitable[Any]] | None,
+    ) -> None:
+        frame_time = 1.0 / self.fps
+        begin = time.monotonic()
+        due = begin
+        last: LightFrame | None = None
+        try:
+            while True:
+                now = time.monotonic()
+                # Slots that passed while the previous write was in flight
+                missed = int((now - due) / frame_time)
+                if missed > 0:
+                    self.dropped += missed
+                    due += missed * frame_time
+                lateness = now - due
+                self._ticks += 1
+                self._jitter_total += lateness
+                self._jitter_max = max(self._jitter_max, lateness)
+
+                progress = min(1.0, (now - begin) / duration) if duration > 0 else 1.0
+                frame = interpolate(start, end, progress)
+                if frame != last:
+                    if await self._send_frame(frame):
+                        self.frames += 1
+                    else:
+                        self.failed += 1
+                    last = frame
+                else:
+                    # Nothing changed at this resolution; the slot is unused
+                    self.unchanged += 1
+                if progress >= 1.0:
+                    break
+                due += frame_time
+                await asyncio.sleep(max(0.0, due - time.monotonic()))
+        finally:
+            elapsed = time.monotonic() - begin
+            self._active_time += elapsed
+            _LOGGER.debug(
+                "Animation for %s ran %.2f s of %.2f s (%d frames, %d dropped)",
+                self._name, elapsed, duration, self.frames, self.dropped,
+            )
+
+        if on_finish is not None:
+            await on_finish()
+
+    def stats(self) -> dict[str, Any]:
+        """Return frame counts and timing for diagnostics."""
+        return {
+            "fps": self.fps,
+            "animations": self.animations,
+            "cancelled": self.cancelled,
+            "running": self.running,
+            "frames": self.frames,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "unchanged": self.unchanged,
+            "achieved_fps": (
+                round(self.frames / self._active_time, 1) if self._active_time else None
+            ),
+            "avg_jitter": (
+                round(self._jitter_total / self._ticks, 4) if self._ticks else None
+            ),
+            "max_jitter": round(self._jitter_max, 4),
+        }
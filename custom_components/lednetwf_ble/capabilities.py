@@ -21,29 +21,54 @@ Usage:
 
     # Get command template
     template = CAPABILITIES.get_command_template(0x08, "colour_data")
+
+The JSON files are read through a compact binary index (see
+capability_index.py), so only the products actually looked up are decoded.
+Parsed DeviceCapabilities and command templates are compiled once and
+cached; await CAPABILITIES.async_reload(hass) after changing the data files.
+Identical function definitions (switch_led, set_time, ... appear in most
+products) are interned into shared immutable FunctionCapability objects;
+CAPABILITIES.memory_stats() reports the saving.
+
+runtimeScripts (e.g. drop colour_warm_data when wiring = 6) depend on the
+device's configuration, so they are applied per device by
+DeviceCapabilities.effective(), once per distinct firmware/configuration.
 """
 
 from __future__ import annotations
 
-import json
+import bisect
 import logging
-from dataclasses import dataclass, field
+import operator
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields as dataclass_fields
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
+from .capability_index import INDEX_FILENAME, CapabilityIndex, load_index
+from .decoders import ResponseDecoder, compile_decoders
+
 _LOGGER = logging.getLogger(__name__)
 
 
-@dataclass
+_EMPTY_FIELDS: Mapping[str, Mapping[str, Any]] = MappingProxyType({})
+
+
+@dataclass(frozen=True)
 class FunctionCapability:
-    """A device function capability with firmware requirements."""
+    """A device function capability with firmware requirements.
+
+    Immutable: instances are interned and shared between products.
+    """
 
     code: str
     name: str
     desc: str
     min_firmware: int
     type: str  # "Json", "Hex", etc.
-    fields: dict[str, dict[str, Any]] = field(default_factory=dict)
+    fields: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: _EMPTY_FIELDS)
 
     def get_field_range(self, field_name: str) -> tuple[int | None, int | None, int]:
         """Get (min, max, step) for a field."""
@@ -88,6 +113,96 @@ class ProtocolInfo:
     min_firmware: int
 
 
+_CONDITION_OPERATORS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+@dataclass(frozen=True)
+class RuntimeCondition:
+    """One runtimeScripts condition, e.g. wiring = 6."""
+
+    name: str
+    operator: str
+    value: Any
+
+    def matches(self, config: Mapping[str, Any]) -> bool:
+        """Check the condition; unknown variables and operators never match."""
+        actual = config.get(self.name)
+        compare = _CONDITION_OPERATORS.get(self.operator)
+        if actual is None or compare is None:
+            return False
+        try:
+            return compare(actual, self.value)
+        except TypeError:
+            return False
+
+
+@dataclass(frozen=True)
+class RuntimeScript:
+    """A runtimeScripts entry: functions removed when all conditions hold."""
+
+    conditions: tuple[RuntimeCondition, ...]
+    remove_functions: frozenset[str]
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "RuntimeScript":
+        """Create from JSON dict."""
+        return cls(
+            conditions=tuple(
+                RuntimeCondition(c["name"], c.get("operator", "="), c.get("value"))
+                for c in data.get("conditions", [])
+            ),
+            remove_functions=frozenset(
+                data.get("actions", {}).get("removeFunction", [])
+            ),
+        )
+
+    def applies(self, config: Mapping[str, Any]) -> bool:
+        """Check whether every condition holds for a device configuration."""
+        return bool(self.conditions) and all(c.matches(config) for c in self.conditions)
+
+
+class EffectiveCapabilities:
+    """Function set of one device configuration after runtimeScripts.
+
+    Built once per (firmware, configuration) by DeviceCapabilities.effective();
+    lookups are set membership tests.
+    """
+
+    __slots__ = ("device", "firmware_version", "supported", "removed")
+
+    def __init__(
+        self,
+        device: DeviceCapabilities,
+        firmware_version: int,
+        supported: frozenset[str],
+        removed: frozenset[str],
+    ) -> None:
+        """Initialize with the resolved function sets."""
+        self.device = device
+        self.firmware_version = firmware_version
+        self.supported = supported
+        self.removed = removed
+
+    def supports_function(self, function_code: str) -> bool:
+        """Check if the configured device supports a function."""
+        return function_code in self.supported
+
+    def get_best_function(self, function_preferences: list[str]) -> str | None:
+        """Get the first supported function from a preference list."""
+        for func in function_preferences:
+            if func in self.supported:
+                return func
+        return None
+
+
 @dataclass
 class DeviceCapabilities:
     """Complete device capabilities from JSON."""
@@ -100,12 +215,77 @@ class DeviceCapabilities:
     hex_cmd_forms: dict[str, CommandTemplate]
     protocols: list[ProtocolInfo]
     state_protocols: list[ProtocolInfo]
+    # responseHexDescribes compiled per dpCode
+    response_decoders: dict[str, ResponseDecoder] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+    runtime_scripts: tuple[RuntimeScript, ...] = ()
+    # Firmware version -> supported function codes, filled on first lookup
+    firmware_index: dict[int, frozenset[str]] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        """Precompute the firmware thresholds at which the function set grows."""
+        self._thresholds = sorted({f.min_firmware for f in self.functions.values()})
+        self._threshold_sets = [
+            frozenset(
+                code for code, f in self.functions.items() if f.min_firmware <= threshold
+            )
+            for threshold in self._thresholds
+        ]
+        # Configuration variables the runtime scripts look at
+        self._runtime_variables = tuple(
+            sorted({c.name for script in self.runtime_scripts for c in script.conditions})
+        )
+        self._effective: dict[tuple, EffectiveCapabilities] = {}
+
+    def effective(
+        self, firmware_version: int = 0, config: Mapping[str, Any] | None = None
+    ) -> EffectiveCapabilities:
+        """Return the function set for a firmware and device configuration.
+
+        Args:
+            firmware_version: Device firmware version
+            config: Device configuration the runtimeScripts conditions refer
+                    to (e.g. {"wiring": 6}); unknown variables never match
+        """
+        config = config or {}
+        key = (firmware_version, *(config.get(name) for name in self._runtime_variables))
+        effective = self._effective.get(key)
+        if effective is None:
+            removed = frozenset().union(
+                *(
+                    script.remove_functions
+                    for script in self.runtime_scripts
+                    if script.applies(config)
+                )
+            )
+            effective = self._effective[key] = EffectiveCapabilities(
+                self,
+                firmware_version,
+                self.functions_for_firmware(firmware_version) - removed,
+                removed,
+            )
+            if removed:
+                _LOGGER.debug(
+                    "Product 0x%02X runtime scripts removed %s for %s",
+                    self.product_id, sorted(removed), config,
+                )
+        return effective
+
+    def functions_for_firmware(self, firmware_version: int = 0) -> frozenset[str]:
+        """Return the function codes supported at a firmware version."""
+        supported = self.firmware_index.get(firmware_version)
+        if supported is None:
+            pos = bisect.bisect_right(self._thresholds, firmware_version)
+            supported = self._threshold_sets[pos - 1] if pos else frozenset()
+            self.firmware_index[firmware_version] = supported
+        return supported
 
     def supports_function(self, function_code: str, firmware_version: int = 0) -> bool:
         """Check if device supports a function at given firmware version."""
-        if function_code not in self.functions:
-            return False
-        return firmware_version >= self.functions[function_code].min_firmware
+        return function_code in self.functions_for_firmware(firmware_version)
 
     def get_function(self, function_code: str) -> FunctionCapability | None:
         """Get function capability by code."""
@@ -123,89 +303,132 @@ class DeviceCapabilities:
         return best or "wifibleLightStandardV1"
 
 
+def _deep_sizeof(obj: Any, seen: set[int]) -> int:
+    """sys.getsizeof of obj and everything it references, each object once."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, Mapping):
+        if isinstance(obj, MappingProxyType):
+            # The proxy wraps a private dict
+            size += sys.getsizeof(dict(obj))
+        for key, value in obj.items():
+            size += _deep_sizeof(key, seen) + _deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _deep_sizeof(item, seen)
+    elif isinstance(obj, FunctionCapability):
+        for fld in dataclass_fields(obj):
+            size += _deep_sizeof(getattr(obj, fld.name), seen)
+    return size
+
+
 class CapabilityDatabase:
     """Database of device capabilities loaded from JSON files."""
 
     def __init__(self) -> None:
-        """Initialize and load data files."""
-        self._devices: dict[int, dict[str, Any]] = {}
+        """Initialize; data files are loaded on first access."""
+        self._index: CapabilityIndex | None = None
+        self._cache_path: Path | None = None  # Set once hass is known
         self._cmd_templates: dict[str, dict[str, Any]] = {}
         self._ble_cmd_overrides: dict[str, dict[str, Any]] = {}
         self._loaded = False
 
+        # Compiled objects, built on first use (see invalidate)
+        self._compiled_devices: dict[int, DeviceCapabilities | None] = {}
+        self._compiled_templates: dict[str, CommandTemplate | None] = {}
+
+        # Shared immutable objects, keyed by content
+        self._interned_functions: dict[tuple, FunctionCapability] = {}
+        self._interned_field_ranges: dict[tuple, Mapping[str, Any]] = {}
+
     async def async_load(self, hass) -> None:
         """Pre-load data files asynchronously to avoid blocking the event loop."""
         if self._loaded:
             return
+        self._cache_path = Path(hass.config.path(".storage", INDEX_FILENAME))
         await hass.async_add_executor_job(self._ensure_loaded)
 
+    async def async_reload(self, hass) -> None:
+        """Re-check the data files in the executor and drop compiled objects."""
+        self._cache_path = Path(hass.config.path(".storage", INDEX_FILENAME))
+        self._set_index(await hass.async_add_executor_job(self._load_index))
+        self.invalidate()
+
     def _ensure_loaded(self) -> None:
         """Lazy load data files on first access."""
         if self._loaded:
             return
+        self._set_index(self._load_index())
 
+    def _load_index(self) -> CapabilityIndex | None:
+        """Load (or rebuild) the capability index. Blocking."""
         data_dir = Path(__file__).parent / "data"
+        try:
+            return load_index(data_dir, self._cache_path)
+        except Exception as ex:
+            _LOGGER.error("Failed to load capability data: %s", ex)
+            return None
 
-        # Load BLE devices
-        ble_devices_path = data_dir / "ble_devices.json"
-        if ble_devices_path.exists():
-            try:
-                with open(ble_devices_path, encoding="utf-8") as f:
-                    devices = json.load(f)
-                    self._devices = {d["productId"]: d for d in devices}
-                _LOGGER.debug("Loaded %d BLE devices from JSON", len(self._devices))
-            except Exception as ex:
-                _LOGGER.error("Failed to load ble_devices.json: %s", ex)
-
-        # Load WiFi command templates (shared with BLE)
-        wifi_cmd_path = data_dir / "wifi_dp_cmd.json"
-        if wifi_cmd_path.exists():
-            try:
-                with open(wifi_cmd_path, encoding="utf-8") as f:
-                    self._cmd_templates = json.load(f)
-                _LOGGER.debug("Loaded %d command templates from JSON", len(self._cmd_templates))
-            except Exception as ex:
-                _LOGGER.error("Failed to load wifi_dp_cmd.json: %s", ex)
-
-        # Load BLE-specific command overrides
-        ble_cmd_path = data_dir / "ble_dp_cmd.json"
-        if ble_cmd_path.exists():
-            try:
-                with open(ble_cmd_path, encoding="utf-8") as f:
-                    self._ble_cmd_overrides = json.load(f)
-                _LOGGER.debug("Loaded %d BLE command overrides", len(self._ble_cmd_overrides))
-            except Exception as ex:
-                _LOGGER.error("Failed to load ble_dp_cmd.json: %s", ex)
+    def _set_index(self, index: CapabilityIndex | None) -> None:
+        """Switch to a newly loaded index, releasing the previous one."""
+        if self._index is not None and self._index is not index:
+            self._index.close()
+        self._index = index
+        if index is None:
+            self._cmd_templates = {}
+            self._ble_cmd_overrides = {}
+        else:
+            self._cmd_templates = index.cmd_templates
+            self._ble_cmd_overrides = index.ble_cmd_overrides
+            _LOGGER.debug(
+                "Loaded capability index (%s) with %d BLE devices",
+                index.source,
+                len(index),
+            )
 
         self._loaded = True
 
+    def invalidate(self, product_id: int | None = None) -> None:
+        """Drop compiled capabilities so they are rebuilt on next access.
+
+        Only the compiled objects are dropped; the index itself is re-checked
+        against the data files by async_reload, so this never does IO.
+
+        Args:
+            product_id: Product to invalidate, or None for everything
+                        (including the shared command templates)
+        """
+        if product_id is None:
+            self._compiled_devices.clear()
+            self._compiled_templates.clear()
+            self._interned_functions.clear()
+            self._interned_field_ranges.clear()
+        else:
+            self._compiled_devices.pop(product_id, None)
+
     def get_device(self, product_id: int) -> DeviceCapabilities | None:
         """Get capabilities for a device by product ID."""
+        try:
+            return self._compiled_devices[product_id]
+        except KeyError:
+            pass
         self._ensure_loaded()
+        compiled = self._compiled_devices[product_id] = self._compile_device(product_id)
+        return compiled
 
-        if product_id not in self._devices:
+    def _compile_device(self, product_id: int) -> DeviceCapabilities | None:
+        """Build DeviceCapabilities from the raw JSON entry."""
+        device = self.get_device_raw(product_id)
+        if device is None:
             return None
 
-        device = self._devices[product_id]
-
         # Parse functions
         functions: dict[str, FunctionCapability] = {}
         for func in device.get("functions", []):
-            fields: dict[str, dict[str, Any]] = {}
-            for fld in func.get("value", {}).get("fields", []):
-                fields[fld["fieldName"]] = {
-                    "min": fld.get("min"),
-                    "max": fld.get("max"),
-                    "step": fld.get("step", 1),
-                }
-            functions[func["code"]] = FunctionCapability(
-                code=func["code"],
-                name=func.get("name", func["code"]),
-                desc=func.get("desc", ""),
-                min_firmware=func.get("deviceMinVer", 0),
-                type=func.get("type", "Hex"),
-                fields=fields,
-            )
+            capability = self._intern_function(func)
+            functions[capability.code] = capability
 
         # Parse device-specific command overrides
         hex_cmd_forms: dict[str, CommandTemplate] = {}
@@ -241,12 +464,83 @@ class CapabilityDatabase:
             hex_cmd_forms=hex_cmd_forms,
             protocols=protocols,
             state_protocols=state_protocols,
+            response_decoders=compile_decoders(device.get("responseHexDescribes", [])),
+            runtime_scripts=tuple(
+                RuntimeScript.from_dict(script)
+                for script in device.get("runtimeScripts", [])
+                if isinstance(script, dict)
+            ),
         )
 
+    def _intern_function(self, func: dict[str, Any]) -> FunctionCapability:
+        """Return the shared FunctionCapability for a raw function entry."""
+        field_items = []
+        for fld in func.get("value", {}).get("fields", []):
+            limits = (fld.get("min"), fld.get("max"), fld.get("step", 1))
+            field_range = self._interned_field_ranges.get(limits)
+            if field_range is None:
+                field_range = self._interned_field_ranges[limits] = MappingProxyType(
+                    {"min": limits[0], "max": limits[1], "step": limits[2]}
+                )
+            field_items.append((sys.intern(fld["fieldName"]), field_range))
+
+        code = func["code"]
+        key = (
+            code,
+            func.get("name", code),
+            func.get("desc", ""),
+            func.get("deviceMinVer", 0),
+            func.get("type", "Hex"),
+            tuple((name, id(field_range)) for name, field_range in field_items),
+        )
+        capability = self._interned_functions.get(key)
+        if capability is None:
+            capability = self._interned_functions[key] = FunctionCapability(
+                code=sys.intern(code),
+                name=key[1],
+                desc=key[2],
+                min_firmware=key[3],
+                type=sys.intern(key[4]),
+                fields=MappingProxyType(dict(field_items)) if field_items else _EMPTY_FIELDS,
+            )
+        return capability
+
+    def memory_stats(self) -> dict[str, Any]:
+        """Approximate heap used by the compiled function definitions.
+
+        Compares the interned objects actually held against what the same
+        products would use with a private copy of every definition.
+        """
+        function_refs = 0
+        shared_seen: set[int] = set()
+        shared_bytes = unshared_bytes = 0
+        for device in self._compiled_devices.values():
+            if device is None:
+                continue
+            for capability in device.functions.values():
+                function_refs += 1
+                shared_bytes += _deep_sizeof(capability, shared_seen)
+                unshared_bytes += _deep_sizeof(capability, set())
+        return {
+            "products": sum(1 for d in self._compiled_devices.values() if d),
+            "function_refs": function_refs,
+            "unique_functions": len(self._interned_functions),
+            "unique_field_ranges": len(self._interned_field_ranges),
+            "function_bytes": shared_bytes,
+            "function_bytes_unshared": unshared_bytes,
+        }
+
     def get_device_raw(self, product_id: int) -> dict[str, Any] | None:
         """Get raw device data dict (for debugging)."""
         self._ensure_loaded()
-        return self._devices.get(product_id)
+        if self._index is None:
+            return None
+        return self._index.product(product_id)
+
+    def index_stats(self) -> dict[str, Any]:
+        """Capability index size and how much of it has been decoded."""
+        self._ensure_loaded()
+        return self._index.stats() if self._index else {}
 
     def supports_function(
         self, product_id: int, function_code: str, firmware_version: int = 0
@@ -276,28 +570,31 @@ class CapabilityDatabase:
         2. BLE command overrides (ble_dp_cmd.json)
         3. Global WiFi templates (wifi_dp_cmd.json)
         """
-        self._ensure_loaded()
-
         device = self.get_device(product_id)
 
         # 1. Check device-specific hexCmdForms first
         if device and function_code in device.hex_cmd_forms:
             return device.hex_cmd_forms[function_code]
 
-        # 2. Check BLE-specific overrides
-        if function_code in self._ble_cmd_overrides:
-            return CommandTemplate.from_dict(self._ble_cmd_overrides[function_code])
+        try:
+            return self._compiled_templates[function_code]
+        except KeyError:
+            pass
 
+        # 2. Check BLE-specific overrides
         # 3. Fall back to global WiFi templates
-        if function_code in self._cmd_templates:
-            return CommandTemplate.from_dict(self._cmd_templates[function_code])
-
-        return None
+        template = None
+        if function_code in self._ble_cmd_overrides:
+            template = CommandTemplate.from_dict(self._ble_cmd_overrides[function_code])
+        elif function_code in self._cmd_templates:
+            template = CommandTemplate.from_dict(self._cmd_templates[function_code])
+        self._compiled_templates[function_code] = template
+        return template
 
     def get_all_product_ids(self) -> list[int]:
         """Get list of all known product IDs."""
         self._ensure_loaded()
-        return list(self._devices.keys())
+        return self._index.product_ids if self._index else []
 
     def get_best_function(
         self,
@@ -316,8 +613,12 @@ class CapabilityDatabase:
         Returns:
             Best supported function code, or None
         """
+        device = self.get_device(product_id)
+        if not device:
+            return None
+        supported = device.functions_for_firmware(firmware_version)
         for func in function_preferences:
-            if self.supports_function(product_id, func, firmware_version):
+            if func in supported:
                 return func
         return None
 
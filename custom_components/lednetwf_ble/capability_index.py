@@ -0,0 +1,337 @@
+"""Compact binary index of the app's capability JSON files.
+
+ble_devices.json is ~700 KB of JSON describing every product, with the same
+function definitions repeated in most of them. Parsing it on every start and
+keeping all of it in memory is wasteful when only one or two product IDs are
+configured, so on first run it is converted into an indexed file:
+
+    header      magic, fingerprint of the source files, table sizes
+    products    (product_id, offset, length) per product, sorted by ID
+    functions   (offset, length) per unique function definition
+    templates   (offset, length) of the wifi/ble command template section
+    records     compact JSON; product records refer to functions by index
+
+Later starts only stat the source files and read the header and tables.
+A product record is decoded the first time it is looked up, and each shared
+function definition is decoded once no matter how many products use it. The
+file is rebuilt whenever the size or mtime of a source file changes.
+
+Usage:
+    index = load_index(data_dir, cache_path)
+    raw = index.product(0x08)
+    index.close()
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+INDEX_FILENAME = "lednetwf_ble_capabilities.idx"
+SOURCE_FILENAMES = ("ble_devices.json", "wifi_dp_cmd.json", "ble_dp_cmd.json")
+
+INDEX_MAGIC = b"LNWFCAP\x02"
+
+# magic, source fingerprint, product count, function count, templates offset/length
+_HEADER = struct.Struct("<8s32sHHII")
+# product_id, record offset, record length
+_PRODUCT_ENTRY = struct.Struct("<III")
+# record offset, record length
+_SPAN = struct.Struct("<II")
+
+
+class CapabilityIndexError(Exception):
+    """Raised when an index buffer is truncated or does not match its sources."""
+
+
+def source_fingerprint(data_dir: Path) -> bytes:
+    """Hash of the size and mtime of each source file.
+
+    Only stats the files, so checking an existing index never reads the
+    JSON itself.
+    """
+    digest = hashlib.sha256()
+    for name in SOURCE_FILENAMES:
+        digest.update(name.encode())
+        try:
+            stat = (data_dir / name).stat()
+        except OSError:
+            # Missing or unreadable; distinct from an empty file
+            digest.update(b"\x00")
+            continue
+        digest.update(b"\x01")
+        digest.update(struct.pack("<Qq", stat.st_size, stat.st_mtime_ns))
+    return digest.digest()
+
+
+def _dump(obj: Any) -> bytes:
+    """Compact JSON encoding used for all records."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _parse_source(name: str, data: bytes | None, default: Any) -> Any:
+    """Parse one source file, logging and falling back to default on error."""
+    if data is None:
+        return default
+    try:
+        parsed = json.loads(data)
+    except Exception as ex:
+        _LOGGER.error("Failed to load %s: %s", name, ex)
+        return default
+    if not isinstance(parsed, type(default)):
+        _LOGGER.error("Failed to load %s: not a JSON %s", name, type(default).__name__)
+        return default
+    return parsed
+
+
+def build_index(
+    sources: dict[str, bytes | None], fingerprint: bytes = bytes(32)
+) -> bytes:
+    """Convert the source JSON files into the indexed binary format.
+
+    A file that is missing or fails to parse is indexed as empty; the
+    other files are still indexed.
+    """
+    devices = _parse_source("ble_devices.json", sources.get("ble_devices.json"), [])
+    templates = {
+        "wifi": _parse_source("wifi_dp_cmd.json", sources.get("wifi_dp_cmd.json"), {}),
+        "ble": _parse_source("ble_dp_cmd.json", sources.get("ble_dp_cmd.json"), {}),
+    }
+
+    # Intern identical function definitions by their encoded form
+    function_ids: dict[bytes, int] = {}
+    function_records: list[bytes] = []
+    product_records: dict[int, bytes] = {}
+    for device in devices:
+        try:
+            product_id = int(device["productId"])
+            funcs = list(device.get("functions", []))
+        except (KeyError, TypeError, ValueError, AttributeError) as ex:
+            _LOGGER.error("Skipping malformed ble_devices.json entry: %s", ex)
+            continue
+        refs = []
+        for func in funcs:
+            encoded = _dump(func)
+            if encoded not in function_ids:
+                function_ids[encoded] = len(function_records)
+                function_records.append(encoded)
+            refs.append(function_ids[encoded])
+        product_records[product_id] = _dump({**device, "functions": refs})
+
+    templates_record = _dump(templates)
+    product_ids = sorted(product_records)
+
+    offset = (
+        _HEADER.size
+        + _PRODUCT_ENTRY.size * len(product_ids)
+        + _SPAN.size * len(function_records)
+    )
+    product_table = bytearray()
+    for product_id in product_ids:
+        length = len(product_records[product_id])
+        product_table += _PRODUCT_ENTRY.pack(product_id, offset, length)
+        offset += length
+    function_table = bytearray()
+    for record in function_records:
+        function_table += _SPAN.pack(offset, len(record))
+        offset += len(record)
+
+    header = _HEADER.pack(
+        INDEX_MAGIC,
+        fingerprint,
+        len(product_ids),
+        len(function_records),
+        offset,
+        len(templates_record),
+    )
+    return b"".join(
+        [
+            header,
+            product_table,
+            function_table,
+            *(product_records[product_id] for product_id in product_ids),
+            *function_records,
+            templates_record,
+        ]
+    )
+
+
+class CapabilityIndex:
+    """Read-only view of an index buffer, decoding records on demand."""
+
+    def __init__(self, buffer: bytes | mmap.mmap, source: str = "memory") -> None:
+        """Parse the header and tables of an index buffer.
+
+        Args:
+            buffer: Index bytes or a read-only mmap of the index file
+            source: Where the index came from ("cache", "rebuilt", "memory")
+        """
+        if len(buffer) < _HEADER.size:
+            raise CapabilityIndexError("Index truncated")
+        (
+            magic,
+            self.fingerprint,
+            product_count,
+            function_count,
+            templates_offset,
+            templates_length,
+        ) = _HEADER.unpack_from(buffer, 0)
+        if magic != INDEX_MAGIC:
+            raise CapabilityIndexError(f"Unknown index format {magic!r}")
+        if templates_offset + templates_length > len(buffer):
+            raise CapabilityIndexError("Index truncated")
+
+        self._buffer = buffer
+        self.source = source
+        pos = _HEADER.size
+        self._products: dict[int, tuple[int, int]] = {}
+        for product_id, offset, length in _PRODUCT_ENTRY.iter_unpack(
+            buffer[pos:pos + _PRODUCT_ENTRY.size * product_count]
+        ):
+            self._products[product_id] = (offset, length)
+        pos += _PRODUCT_ENTRY.size * product_count
+        self._function_spans = list(
+            _SPAN.iter_unpack(buffer[pos:pos + _SPAN.size * function_count])
+        )
+        self._templates_span = (templates_offset, templates_length)
+
+        # Decoded lazily; function dicts are shared between products
+        self._functions: dict[int, dict[str, Any]] = {}
+        self._templates: dict[str, dict[str, Any]] | None = None
+        self.materialized = 0
+
+    def _record(self, span: tuple[int, int]) -> Any:
+        offset, length = span
+        return json.loads(self._buffer[offset:offset + length])
+
+    @property
+    def product_ids(self) -> list[int]:
+        """All product IDs in the index, ascending."""
+        return list(self._products)
+
+    def __contains__(self, product_id: int) -> bool:
+        return product_id in self._products
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def product(self, product_id: int) -> dict[str, Any] | None:
+        """Decode a product record in the shape of its ble_devices.json entry."""
+        span = self._products.get(product_id)
+        if span is None:
+            return None
+        record = self._record(span)
+        record["functions"] = [self._function(ref) for ref in record["functions"]]
+        self.materialized += 1
+        return record
+
+    def _function(self, ref: int) -> dict[str, Any]:
+        func = self._functions.get(ref)
+        if func is None:
+            func = self._functions[ref] = self._record(self._function_spans[ref])
+        return func
+
+    def _ensure_templates(self) -> dict[str, dict[str, Any]]:
+        if self._templates is None:
+            self._templates = self._record(self._templates_span)
+        return self._templates
+
+    @property
+    def cmd_templates(self) -> dict[str, dict[str, Any]]:
+        """Global command templates (wifi_dp_cmd.json)."""
+        return self._ensure_templates()["wifi"]
+
+    @property
+    def ble_cmd_overrides(self) -> dict[str, dict[str, Any]]:
+        """BLE-specific command templates (ble_dp_cmd.json)."""
+        return self._ensure_templates()["ble"]
+
+    def stats(self) -> dict[str, Any]:
+        """Index size and how much of it has been decoded."""
+        return {
+            "source": self.source,
+            "size": len(self._buffer),
+            "products": len(self._products),
+            "products_materialized": self.materialized,
+            "functions": len(self._function_spans),
+            "functions_decoded": len(self._functions),
+        }
+
+    def close(self) -> None:
+        """Release the mapped index file; decoded records stay usable."""
+        if isinstance(self._buffer, mmap.mmap) and not self._buffer.closed:
+            self._buffer.close()
+
+
+def _read_sources(data_dir: Path) -> dict[str, bytes | None]:
+    sources: dict[str, bytes | None] = {}
+    for name in SOURCE_FILENAMES:
+        try:
+            sources[name] = (data_dir / name).read_bytes()
+        except FileNotFoundError:
+            sources[name] = None
+        except OSError as ex:
+            _LOGGER.error("Failed to load %s: %s", name, ex)
+            sources[name] = None
+    return sources
+
+
+def _map_index(path: Path, fingerprint: bytes) -> CapabilityIndex | None:
+    """Map an existing index file if it matches the source fingerprint."""
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Missing, unreadable or empty
+        return None
+    try:
+        index = CapabilityIndex(buffer, source="cache")
+    except CapabilityIndexError as ex:
+        _LOGGER.debug("Ignoring capability index %s: %s", path, ex)
+        buffer.close()
+        return None
+    if index.fingerprint != fingerprint:
+        _LOGGER.debug("Capability index %s is stale, rebuilding", path)
+        buffer.close()
+        return None
+    return index
+
+
+def load_index(data_dir: Path, cache_path: Path | None = None) -> CapabilityIndex:
+    """Load the capability index, rebuilding it if the sources changed.
+
+    Blocking: call from an executor. Without a cache path, or if the cache
+    file cannot be written, the rebuilt index is kept in memory instead.
+
+    Args:
+        data_dir: Directory holding the source JSON files
+        cache_path: Index file location (Home Assistant's .storage directory)
+    """
+    fingerprint = source_fingerprint(data_dir)
+    if cache_path is not None:
+        index = _map_index(cache_path, fingerprint)
+        if index is not None:
+            return index
+
+    buffer = build_index(_read_sources(data_dir), fingerprint)
+    if cache_path is None:
+        return CapabilityIndex(buffer, source="memory")
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(buffer)
+        os.replace(tmp_path, cache_path)
+    except OSError as ex:
+        _LOGGER.debug("Could not write capability index %s: %s", cache_path, ex)
+        return CapabilityIndex(buffer, source="memory")
+    _LOGGER.debug("Wrote capability index %s (%d bytes)", cache_path, len(buffer))
+    index = _map_index(cache_path, fingerprint) or CapabilityIndex(buffer)
+    index.source = "rebuilt"
+    return index
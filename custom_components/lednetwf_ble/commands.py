@@ -12,15 +12,24 @@ Usage:
     # Build an effect command with the best available function
     func = get_best_function(0x08, firmware_ver, ["scene_data_v2", "scene_data"])
     cmd = build_command(0x08, func, {"model": 41, "speed": 16, "bright": 100})
+
+Each template's cmdForm is compiled once into a byte-level plan (fixed
+bytes plus parameter slots), so building a command only fills a copy of
+the fixed bytes. Templates that cannot be compiled use the string path.
 """
 
 from __future__ import annotations
 
 import logging
 import re
-from typing import Any
+from typing import Any, NamedTuple
 
-from .capabilities import CAPABILITIES, CommandTemplate, FunctionCapability
+from .capabilities import (
+    CAPABILITIES,
+    CommandTemplate,
+    EffectiveCapabilities,
+    FunctionCapability,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,6 +40,64 @@ class CommandBuildError(Exception):
     pass
 
 
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+# A placeholder and its adjacent repeats, e.g. {delay}{delay}{delay}
+_PLACEHOLDER_RUN = re.compile(r"\{(\w+)\}(?:\{\1\})*")
+_HEX_LITERAL = re.compile(r"(?:[0-9a-fA-F]{2})*")
+
+
+class _CommandPlan(NamedTuple):
+    """A cmdForm compiled to fixed bytes and parameter byte slots."""
+
+    base: bytes
+    # (param name, byte offsets) per run of adjacent placeholders; a run of
+    # N fills N bytes of the value, most significant first. A parameter
+    # repeated apart (bright_value_v2's {value}) has one slot per run.
+    slots: tuple[tuple[str, tuple[int, ...]], ...]
+
+
+# cmdForm -> compiled plan (None = not compilable, use the string path)
+_PLANS: dict[str, _CommandPlan | None] = {}
+
+
+def compile_template(cmd_form: str) -> _CommandPlan | None:
+    """Compile a cmdForm into a byte plan (cached per cmdForm).
+
+    Returns None if the template is not whole hex bytes around its
+    placeholders, in which case callers fall back to string substitution.
+    """
+    try:
+        return _PLANS[cmd_form]
+    except KeyError:
+        pass
+
+    base = bytearray()
+    slots: list[tuple[str, list[int]]] = []
+    plan: _CommandPlan | None = None
+    pos = 0
+    for match in [*_PLACEHOLDER.finditer(cmd_form), None]:
+        literal = cmd_form[pos:match.start() if match else len(cmd_form)]
+        if not _HEX_LITERAL.fullmatch(literal):
+            break
+        base += bytes.fromhex(literal)
+        if match is None:
+            plan = _CommandPlan(
+                bytes(base),
+                tuple((name, tuple(offsets)) for name, offsets in slots),
+            )
+            break
+        name = match.group(1)
+        if slots and not literal and slots[-1][0] == name:
+            slots[-1][1].append(len(base))
+        else:
+            slots.append((name, [len(base)]))
+        base.append(0)
+        pos = match.end()
+
+    _PLANS[cmd_form] = plan
+    return plan
+
+
 def build_command(
     product_id: int,
     function_code: str,
@@ -78,16 +145,41 @@ def build_from_template(
     Returns:
         Command bytes with checksum if needed
     """
-    cmd_form = template.cmd_form
-
     # Validate parameters against function definition if available
     if product_id is not None and function_code is not None:
         func = CAPABILITIES.get_function(product_id, function_code)
         if func:
             _validate_params(params, func)
 
+    plan = compile_template(template.cmd_form)
+    if plan is None:
+        return _build_from_string(template, params)
+
+    cmd = bytearray(plan.base)
+    for param_name, offsets in plan.slots:
+        if param_name not in params:
+            _LOGGER.warning(
+                "Missing parameter '%s' in command template, using 0", param_name
+            )
+            continue
+        value = params[param_name]
+        if len(offsets) == 1:
+            cmd[offsets[0]] = value & 0xFF
+        else:
+            for offset, byte_val in zip(offsets, _split_value_to_bytes(value, len(offsets))):
+                cmd[offset] = byte_val
+
+    # Add checksum if needed
+    if template.need_checksum:
+        cmd.append(sum(cmd) & 0xFF)
+
+    return bytes(cmd)
+
+
+def _build_from_string(template: CommandTemplate, params: dict[str, int]) -> bytes:
+    """Build command bytes by substituting into the template string."""
     # Substitute parameters in template
-    cmd_form = _substitute_params(cmd_form, params)
+    cmd_form = _substitute_params(template.cmd_form, params)
 
     # Convert hex string to bytes
     try:
@@ -112,42 +204,30 @@ def _substitute_params(cmd_form: str, params: dict[str, int]) -> str:
     - Single byte: {param} -> 2 hex chars
     - Multi-byte by repetition: {param}{param}{param} -> repeated param bytes
       (e.g., {delay}{delay} for 16-bit value split into 2 bytes)
+    - The same parameter in separate places is written to each of them
+      (e.g., {value}00{value} in bright_value_v2)
     """
-    result = cmd_form
-
-    # Find all placeholders
-    placeholders = re.findall(r"\{(\w+)\}", cmd_form)
+    missing: set[str] = set()
 
-    # Count occurrences of each parameter
-    param_counts: dict[str, int] = {}
-    for p in placeholders:
-        param_counts[p] = param_counts.get(p, 0) + 1
-
-    # Substitute each parameter
-    for param_name, count in param_counts.items():
+    def _fill(match: re.Match) -> str:
+        param_name = match.group(1)
         if param_name not in params:
-            _LOGGER.warning(
-                "Missing parameter '%s' in command template, using 0", param_name
-            )
+            if param_name not in missing:
+                missing.add(param_name)
+                _LOGGER.warning(
+                    "Missing parameter '%s' in command template, using 0", param_name
+                )
             value = 0
         else:
             value = params[param_name]
 
-        placeholder = f"{{{param_name}}}"
+        # Number of adjacent repeats = bytes of the value, high byte first
+        count = len(match.group(0)) // (len(param_name) + 2)
+        return "".join(
+            f"{byte_val:02x}" for byte_val in _split_value_to_bytes(value, count)
+        )
 
-        if count == 1:
-            # Single byte parameter
-            result = result.replace(placeholder, f"{value & 0xFF:02x}")
-        else:
-            # Multi-byte parameter - split value into bytes
-            # e.g., {delay}{delay} for 16-bit: high byte first, then low byte
-            # e.g., {gradient}{gradient}{gradient} for 24-bit: high to low
-            byte_values = _split_value_to_bytes(value, count)
-            for byte_val in byte_values:
-                # Replace one occurrence at a time
-                result = result.replace(placeholder, f"{byte_val:02x}", 1)
-
-    return result
+    return _PLACEHOLDER_RUN.sub(_fill, cmd_form)
 
 
 def _split_value_to_bytes(value: int, num_bytes: int) -> list[int]:
@@ -203,6 +283,7 @@ def get_best_function(
     product_id: int,
     firmware_version: int,
     function_preferences: list[str],
+    effective: EffectiveCapabilities | None = None,
 ) -> str | None:
     """Get the best available function from a preference list.
 
@@ -212,10 +293,14 @@ def get_best_function(
         product_id: Device product ID
         firmware_version: Device firmware version
         function_preferences: List of functions in preference order
+        effective: The device's resolved capabilities (runtimeScripts
+                   applied); takes precedence over product_id/firmware
 
     Returns:
         Best supported function code, or None
     """
+    if effective is not None:
+        return effective.get_best_function(function_preferences)
     return CAPABILITIES.get_best_function(
         product_id, firmware_version, function_preferences
     )
@@ -227,6 +312,7 @@ def build_effect_command(
     effect_id: int,
     speed: int,
     brightness: int = 100,
+    effective: EffectiveCapabilities | None = None,
 ) -> bytes | None:
     """Build an effect command using the best available function.
 
@@ -236,6 +322,7 @@ def build_effect_command(
         effect_id: Effect ID (37-56 for SIMPLE effects)
         speed: Speed 0-100 (will be converted to protocol format)
         brightness: Brightness 0-100
+        effective: The device's resolved capabilities, if known
 
     Returns:
         Command bytes or None if no effect function available
@@ -244,6 +331,7 @@ def build_effect_command(
         product_id,
         firmware_version,
         ["scene_data_v3", "scene_data_v2", "scene_data"],
+        effective,
     )
 
     if not func:
@@ -286,6 +374,7 @@ def build_color_command(
     r: int,
     g: int,
     b: int,
+    effective: EffectiveCapabilities | None = None,
 ) -> bytes | None:
     """Build a color command using the best available function.
 
@@ -293,6 +382,7 @@ def build_color_command(
         product_id: Device product ID
         firmware_version: Device firmware version
         r, g, b: RGB color values 0-255
+        effective: The device's resolved capabilities, if known
 
     Returns:
         Command bytes or None if no color function available
@@ -301,6 +391,7 @@ def build_color_command(
         product_id,
         firmware_version,
         ["colour_data_v3", "colour_data_v2", "colour_data"],
+        effective,
     )
 
     if not func:
@@ -316,6 +407,7 @@ def build_power_command(
     on: bool,
     delay: int = 0,
     gradient: int = 0,
+    effective: EffectiveCapabilities | None = None,
 ) -> bytes | None:
     """Build a power on/off command.
 
@@ -325,6 +417,7 @@ def build_power_command(
         on: True for on, False for off
         delay: Transition delay (for v2+)
         gradient: Fade gradient (for v2+)
+        effective: The device's resolved capabilities, if known
 
     Returns:
         Command bytes or None if no power function available
@@ -333,6 +426,7 @@ def build_power_command(
         product_id,
         firmware_version,
         ["switch_led_v3", "switch_led_v2", "switch_led"],
+        effective,
     )
 
     if not func:
@@ -360,6 +454,58 @@ def build_power_command(
     return build_command(product_id, func, params, firmware_version)
 
 
+def fade_params(product_id: int, function_code: str, fade_ms: int) -> dict[str, int]:
+    """Return delay/gradient parameters for a device-side fade of fade_ms.
+
+    The fade time goes into the template's "gradient" placeholder and the
+    start delay stays 0. Source: protocol_docs/05_basic_commands.md names
+    bytes 7-9 of bright_value_v2 "Delay (ms)" and bytes 10-11 "Gradient";
+    switch_led_v2 names its 3-byte field gradient as well.
+
+    Args:
+        product_id: Device product ID
+        function_code: switch_led_v2 or bright_value_v2
+        fade_ms: Fade time in milliseconds
+
+    Returns:
+        Parameters for build_command
+    """
+    template = CAPABILITIES.get_command_template(product_id, function_code)
+    if template is None or "{gradient}" not in template.cmd_form:
+        return {"delay": 0, "gradient": 0}
+    return {"delay": 0, "gradient": fade_ms}
+
+
+def build_brightness_command(
+    product_id: int,
+    firmware_version: int,
+    brightness: int,
+    fade_ms: int = 0,
+    effective: EffectiveCapabilities | None = None,
+) -> bytes | None:
+    """Build a brightness command that fades on the device (bright_value_v2).
+
+    Args:
+        product_id: Device product ID
+        firmware_version: Device firmware version
+        brightness: Brightness 0-100
+        fade_ms: Fade time in milliseconds (0 = instant)
+        effective: The device's resolved capabilities, if known
+
+    Returns:
+        Command bytes or None if bright_value_v2 is not supported
+    """
+    func = get_best_function(
+        product_id, firmware_version, ["bright_value_v2"], effective
+    )
+
+    if not func:
+        return None
+
+    params = {"value": brightness, **fade_params(product_id, func, fade_ms)}
+    return build_command(product_id, func, params, firmware_version)
+
+
 def build_candle_command(
     product_id: int,
     firmware_version: int,
@@ -368,6 +514,7 @@ def build_candle_command(
     speed: int,
     brightness: int,
     extent: int = 2,
+    effective: EffectiveCapabilities | None = None,
 ) -> bytes | None:
     """Build a candle mode command.
 
@@ -379,6 +526,7 @@ def build_candle_command(
         speed: Speed 1-31
         brightness: Brightness 1-100
         extent: Extent/range 1-3
+        effective: The device's resolved capabilities, if known
 
     Returns:
         Command bytes or None if candle not supported
@@ -387,6 +535,7 @@ def build_candle_command(
         product_id,
         firmware_version,
         ["candle_data_v2", "candle_data"],
+        effective,
     )
 
     if not func:
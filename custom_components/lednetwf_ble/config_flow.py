@@ -16,7 +16,13 @@ from homeassistant.const import CONF_MAC, CONF_NAME
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.device_registry import format_mac
-from homeassistant.helpers.selector import NumberSelector, NumberSelectorConfig, NumberSelectorMode
+from homeassistant.helpers.selector import (
+    EntitySelector,
+    EntitySelectorConfig,
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
+)
 
 from bleak_retry_connector import BleakNotFoundError
 
@@ -24,11 +30,21 @@ from .const import (
     DOMAIN,
     CONF_PRODUCT_ID,
     CONF_DISCONNECT_DELAY,
+    CONF_DISCONNECT_MODE,
+    CONF_PREWARM,
+    CONF_PREWARM_ENTITIES,
+    CONF_SEGMENT_DELTAS,
     CONF_LED_COUNT,
     CONF_SEGMENTS,
     CONF_LED_TYPE,
     CONF_COLOR_ORDER,
     DEFAULT_DISCONNECT_DELAY,
+    DEFAULT_DISCONNECT_MODE,
+    DEFAULT_PREWARM,
+    DEFAULT_SEGMENT_DELTAS,
+    DISCONNECT_MODES,
+    MIN_DISCONNECT_DELAY,
+    MAX_DISCONNECT_DELAY,
     DEFAULT_LED_COUNT,
     DEFAULT_SEGMENTS,
     LedType,
@@ -342,7 +358,14 @@ class LEDNetWFConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Optional(
                 CONF_DISCONNECT_DELAY,
                 default=DEFAULT_DISCONNECT_DELAY,
-            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=300)),
+            ): vol.All(
+                vol.Coerce(int),
+                vol.Range(min=MIN_DISCONNECT_DELAY, max=MAX_DISCONNECT_DELAY),
+            ),
+            vol.Optional(
+                CONF_DISCONNECT_MODE,
+                default=DEFAULT_DISCONNECT_MODE,
+            ): vol.In(DISCONNECT_MODES),
         }
 
         # Only show LED config for addressable strips
@@ -434,6 +457,9 @@ class LEDNetWFConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             CONF_DISCONNECT_DELAY: options.get(
                 CONF_DISCONNECT_DELAY, DEFAULT_DISCONNECT_DELAY
             ),
+            CONF_DISCONNECT_MODE: options.get(
+                CONF_DISCONNECT_MODE, DEFAULT_DISCONNECT_MODE
+            ),
         }
 
         # Use user-provided options first, then queried values, then defaults
@@ -504,7 +530,26 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             vol.Optional(
                 CONF_DISCONNECT_DELAY,
                 default=options.get(CONF_DISCONNECT_DELAY, DEFAULT_DISCONNECT_DELAY),
-            ): vol.All(vol.Coerce(int), vol.Range(min=5, max=300)),
+            ): vol.All(
+                vol.Coerce(int),
+                vol.Range(min=MIN_DISCONNECT_DELAY, max=MAX_DISCONNECT_DELAY),
+            ),
+            vol.Optional(
+                CONF_DISCONNECT_MODE,
+                default=options.get(CONF_DISCONNECT_MODE, DEFAULT_DISCONNECT_MODE),
+            ): vol.In(DISCONNECT_MODES),
+            vol.Optional(
+                CONF_PREWARM,
+                default=options.get(CONF_PREWARM, DEFAULT_PREWARM),
+            ): bool,
+            vol.Optional(
+                CONF_PREWARM_ENTITIES,
+                default=options.get(CONF_PREWARM_ENTITIES, []),
+            ): EntitySelector(EntitySelectorConfig(multiple=True)),
+            vol.Optional(
+                CONF_SEGMENT_DELTAS,
+                default=options.get(CONF_SEGMENT_DELTAS, DEFAULT_SEGMENT_DELTAS),
+            ): bool,
         }
 
         if caps.get("has_ic_config"):
@@ -575,6 +620,14 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             CONF_DISCONNECT_DELAY: user_input.get(
                 CONF_DISCONNECT_DELAY, DEFAULT_DISCONNECT_DELAY
             ),
+            CONF_DISCONNECT_MODE: user_input.get(
+                CONF_DISCONNECT_MODE, DEFAULT_DISCONNECT_MODE
+            ),
+            CONF_PREWARM: user_input.get(CONF_PREWARM, DEFAULT_PREWARM),
+            CONF_PREWARM_ENTITIES: user_input.get(CONF_PREWARM_ENTITIES, []),
+            CONF_SEGMENT_DELTAS: user_input.get(
+                CONF_SEGMENT_DELTAS, DEFAULT_SEGMENT_DELTAS
+            ),
         }
 
         if CONF_LED_COUNT in user_input:
@@ -0,0 +1,402 @@
+"""Integration-wide BLE connection management for LEDnetWF devices.
+
+Every LEDNetWFDevice connects on demand and holds its connection until the
+disconnect timer fires. With many strips on one adapter or ESPHome proxy the
+adapter runs out of connection slots, so connections are handed out by a
+shared scheduler:
+
+- Each adapter (HA Bluetooth source) can be given a slot budget
+  (connection_slots in configuration.yaml); without one the number of
+  connections is not limited
+- Waiters are served by priority (user actions before background work),
+  first-come first-served within a priority
+- When the budget is exhausted, the least recently used idle connection is
+  evicted to make room for a waiter
+
+How long an idle connection is kept is decided per device by
+AdaptiveIdlePolicy, which learns the device's command inter-arrival times.
+
+Usage:
+    scheduler = get_connection_scheduler(hass)
+    await scheduler.acquire(device, adapter, PRIORITY_USER)
+    ...
+    scheduler.release(device)
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from bleak.exc import BleakError
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONNECTION_SLOT_TIMEOUT,
+    DATA_CONNECTION_SCHEDULER,
+    DEFAULT_CONNECTION_SLOTS,
+    DISCONNECT_MODE_CEILING,
+    DISCONNECT_MODE_FIXED,
+    DISCONNECT_MODE_FLOOR,
+    MAX_DISCONNECT_DELAY,
+    MIN_DISCONNECT_DELAY,
+)
+
+if TYPE_CHECKING:
+    from .device import LEDNetWFDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+DEFAULT_ADAPTER = "default"
+
+# Commands closer together than this belong to the same burst (slider drag,
+# scene) and say nothing about how long to stay connected
+BURST_GAP = 2.0  # seconds
+# Number of inter-burst gaps remembered per device
+GAP_HISTORY = 20
+# Gaps needed before the learned delay replaces the configured one
+MIN_GAP_SAMPLES = 3
+# Keep the connection this much longer than the typical gap
+GAP_MARGIN = 1.25
+
+
+@dataclass
+class _AdapterSlots:
+    """Slot bookkeeping for one Bluetooth adapter or proxy."""
+
+    # Connected (or connecting) devices, least recently used first. Keyed by
+    # device object: a config flow's temporary device has its own slot.
+    holders: OrderedDict[LEDNetWFDevice, None] = field(default_factory=OrderedDict)
+    # Heap of (priority, order, future, device)
+    waiters: list[tuple[int, int, asyncio.Future, LEDNetWFDevice]] = field(
+        default_factory=list
+    )
+    evicting: set[LEDNetWFDevice] = field(default_factory=set)
+    grants: int = 0
+    evictions: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    max_queue_depth: int = 0
+
+
+class ConnectionScheduler:
+    """Hands out BLE connection slots across all LEDnetWF config entries."""
+
+    def __init__(
+        self,
+        slots_per_adapter: int = DEFAULT_CONNECTION_SLOTS,
+        timeout: float = CONNECTION_SLOT_TIMEOUT,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            slots_per_adapter: Maximum simultaneous connections per adapter,
+                               0 for no limit
+            timeout: Seconds acquire() waits for a slot before giving up
+        """
+        self._slots_per_adapter = max(0, slots_per_adapter)
+        self._timeout = timeout
+        self._adapters: dict[str, _AdapterSlots] = {}
+        self._held: dict[LEDNetWFDevice, str] = {}  # device -> adapter
+        self._order = itertools.count()
+
+    @property
+    def slots_per_adapter(self) -> int:
+        """Return the slot budget per adapter (0 = unlimited)."""
+        return self._slots_per_adapter
+
+    @slots_per_adapter.setter
+    def slots_per_adapter(self, value: int) -> None:
+        """Change the slot budget and serve any waiters it frees up."""
+        self._slots_per_adapter = max(0, value)
+        for adapter in self._adapters:
+            self._dispatch(adapter)
+
+    def _full(self, slots: _AdapterSlots) -> bool:
+        """Return True if the adapter has no free slot."""
+        return 0 < self._slots_per_adapter <= len(slots.holders)
+
+    def is_held(self, device: LEDNetWFDevice) -> bool:
+        """Return True if the device currently holds a slot."""
+        return device in self._held
+
+    async def acquire(
+        self, device: LEDNetWFDevice, adapter: str, priority: int = PRIORITY_USER
+    ) -> None:
+        """Wait until the device may open a connection on the adapter.
+
+        Raises BleakError if no slot frees up within the scheduler's timeout
+        (the slot holders never went idle).
+        """
+        if device in self._held:
+            self.touch(device)
+            return
+
+        slots = self._adapters.setdefault(adapter, _AdapterSlots())
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(slots.waiters, (priority, next(self._order), future, device))
+        slots.max_queue_depth = max(slots.max_queue_depth, len(slots.waiters))
+
+        start = time.monotonic()
+        self._dispatch(adapter)
+
+        if not future.done():
+            _LOGGER.debug(
+                "Waiting for connection slot on %s for %s (%d queued, %d in use)",
+                adapter, device.name, len(slots.waiters), len(slots.holders),
+            )
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self._timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as ex:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller gave up - hand the slot back
+                self.release(device)
+            else:
+                future.cancel()
+                slots.waiters = [w for w in slots.waiters if w[2] is not future]
+                heapq.heapify(slots.waiters)
+            if isinstance(ex, asyncio.TimeoutError):
+                slots.timeouts += 1
+                raise BleakError(
+                    f"No connection slot on {adapter} for {device.name} "
+                    f"after {self._timeout:.0f}s"
+                ) from ex
+            raise
+
+        waited = time.monotonic() - start
+        slots.grants += 1
+        slots.total_wait += waited
+        slots.max_wait = max(slots.max_wait, waited)
+
+    def try_acquire(self, device: LEDNetWFDevice, adapter: str) -> bool:
+        """Take a slot only if one is free and nobody is waiting.
+
+        Used for speculative connections (pre-warming), which must never
+        delay or evict anyone else.
+        """
+        if device in self._held:
+            return True
+        slots = self._adapters.setdefault(adapter, _AdapterSlots())
+        if slots.waiters or self._full(slots):
+            return False
+        slots.holders[device] = None
+        self._held[device] = adapter
+        slots.grants += 1
+        return True
+
+    def release(self, device: LEDNetWFDevice) -> None:
+        """Return the device's slot (safe to call when no slot is held)."""
+        adapter = self._held.pop(device, None)
+        if adapter is None:
+            return
+        slots = self._adapters[adapter]
+        slots.holders.pop(device, None)
+        slots.evicting.discard(device)
+        self._dispatch(adapter)
+
+    def eviction_declined(self, device: LEDNetWFDevice) -> None:
+        """The device became busy again before its eviction disconnected."""
+        adapter = self._held.get(device)
+        if adapter is not None:
+            self._adapters[adapter].evicting.discard(device)
+
+    def touch(self, device: LEDNetWFDevice) -> None:
+        """Mark the device's connection as most recently used."""
+        adapter = self._held.get(device)
+        if adapter is not None:
+            self._adapters[adapter].holders.move_to_end(device)
+
+    def under_pressure(self, device: LEDNetWFDevice) -> bool:
+        """Return True if the device's adapter has no free connection slots."""
+        adapter = self._held.get(device)
+        if adapter is None:
+            return False
+        slots = self._adapters[adapter]
+        return bool(slots.waiters) or self._full(slots)
+
+    def device_idle(self, device: LEDNetWFDevice) -> None:
+        """Let the scheduler evict the device if someone is waiting for a slot."""
+        adapter = self._held.get(device)
+        if adapter is not None and self._adapters[adapter].waiters:
+            self._dispatch(adapter)
+
+    def _dispatch(self, adapter: str) -> None:
+        """Grant free slots to waiters, evicting idle connections if needed."""
+        slots = self._adapters[adapter]
+
+        while slots.waiters and not self._full(slots):
+            _, _, future, device = heapq.heappop(slots.waiters)
+            if future.done():
+                continue
+            slots.holders[device] = None
+            self._held[device] = adapter
+            future.set_result(None)
+
+        # Free slots for remaining waiters by evicting LRU idle connections
+        needed = len(slots.waiters) - len(slots.evicting)
+        if needed <= 0:
+            return
+        for device in list(slots.holders):
+            if needed <= 0:
+                break
+            if device in slots.evicting or not device.is_idle:
+                continue
+            slots.evicting.add(device)
+            slots.evictions += 1
+            needed -= 1
+            _LOGGER.debug(
+                "Evicting idle connection to %s on %s to free a slot",
+                device.name, adapter,
+            )
+            device.async_evict()
+
+    def metrics(self) -> dict[str, Any]:
+        """Return per-adapter slot usage, queue depth and wait-time metrics."""
+        return {
+            adapter: {
+                "slots": self._slots_per_adapter or None,
+                "in_use": len(slots.holders),
+                "queue_depth": len(slots.waiters),
+                "max_queue_depth": slots.max_queue_depth,
+                "grants": slots.grants,
+                "evictions": slots.evictions,
+                "timeouts": slots.timeouts,
+                "avg_wait": round(slots.total_wait / slots.grants, 3) if slots.grants else 0.0,
+                "max_wait": round(slots.max_wait, 3),
+                "holders": [device.name for device in slots.holders],
+            }
+            for adapter, slots in self._adapters.items()
+        }
+
+
+def get_connection_scheduler(hass: HomeAssistant) -> ConnectionScheduler:
+    """Return the integration-wide scheduler, creating it on first use."""
+    scheduler = hass.data.get(DATA_CONNECTION_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_CONNECTION_SCHEDULER] = ConnectionScheduler()
+    return scheduler
+
+
+def adapter_for_device(ble_device: Any) -> str:
+    """Return the adapter / proxy source a BLEDevice is reached through."""
+    details = getattr(ble_device, "details", None)
+    if isinstance(details, dict) and details.get("source"):
+        return str(details["source"])
+    return DEFAULT_ADAPTER
+
+
+class AdaptiveIdlePolicy:
+    """Pick a per-device disconnect delay from its command arrival pattern.
+
+    A device that is sent commands every 20 seconds should stay connected
+    across those gaps instead of reconnecting each time, while a device used
+    a few times a day should give its slot back quickly. The policy keeps the
+    recent gaps between command bursts and picks a delay just above the 80th
+    percentile gap. If even that gap is longer than the allowed maximum,
+    holding the connection would not avoid the reconnect, so the minimum is
+    used instead.
+
+    The configured delay bounds the result depending on the mode:
+    - DISCONNECT_MODE_FIXED: always the configured delay (no learning)
+    - DISCONNECT_MODE_FLOOR: never shorter than the configured delay
+    - DISCONNECT_MODE_CEILING: never longer than the configured delay
+
+    When the adapter has no free slots the lower bound is used.
+    """
+
+    def __init__(self, configured_delay: float, mode: str = DISCONNECT_MODE_FIXED) -> None:
+        """Initialize the policy.
+
+        Args:
+            configured_delay: User's disconnect delay option (seconds)
+            mode: One of DISCONNECT_MODE_*
+        """
+        self.configured_delay = configured_delay
+        self.mode = mode
+        self._gaps: deque[float] = deque(maxlen=GAP_HISTORY)
+        self._last_command: float | None = None
+        self._last_idle_disconnect: float | None = None
+        self._bursts: int = 0
+        self._connects: int = 0
+        self._reconnects: int = 0
+        self._last_delay: float = configured_delay
+
+    @property
+    def bounds(self) -> tuple[float, float]:
+        """Return the (minimum, maximum) delay allowed by the mode."""
+        if self.mode == DISCONNECT_MODE_FLOOR:
+            return self.configured_delay, max(self.configured_delay, MAX_DISCONNECT_DELAY)
+        if self.mode == DISCONNECT_MODE_CEILING:
+            return min(self.configured_delay, MIN_DISCONNECT_DELAY), self.configured_delay
+        return self.configured_delay, self.configured_delay
+
+    def record_command(self) -> None:
+        """Record that a command or query was issued."""
+        now = time.monotonic()
+        if self._last_command is None or now - self._last_command >= BURST_GAP:
+            if self._last_command is not None:
+                self._gaps.append(now - self._last_command)
+            self._bursts += 1
+        self._last_command = now
+
+    def expects_command_within(self, window: float) -> bool:
+        """Return True if the usage pattern predicts a command within window seconds."""
+        if len(self._gaps) < MIN_GAP_SAMPLES or self._last_command is None:
+            return False
+        typical = sorted(self._gaps)[len(self._gaps) // 2]
+        remaining = typical - (time.monotonic() - self._last_command)
+        return -window <= remaining <= window
+
+    def record_connect(self) -> None:
+        """Record a new connection, counting it as a reconnect if we dropped one."""
+        self._connects += 1
+        if self._last_idle_disconnect is not None:
+            self._reconnects += 1
+            self._last_idle_disconnect = None
+
+    def record_idle_disconnect(self) -> None:
+        """Record that the connection was closed for being idle."""
+        self._last_idle_disconnect = time.monotonic()
+
+    def next_delay(self, under_pressure: bool = False) -> float:
+        """Return the disconnect delay to use after the current command."""
+        low, high = self.bounds
+        if self.mode == DISCONNECT_MODE_FIXED or self.configured_delay <= 0:
+            delay = self.configured_delay
+        elif under_pressure:
+            delay = low
+        elif len(self._gaps) < MIN_GAP_SAMPLES:
+            delay = min(max(self.configured_delay, low), high)
+        else:
+            gaps = sorted(self._gaps)
+            typical = gaps[int(0.8 * (len(gaps) - 1))]
+            wanted = typical * GAP_MARGIN
+            delay = low if wanted > high else max(low, wanted)
+        self._last_delay = delay
+        return delay
+
+    def stats(self) -> dict[str, Any]:
+        """Return the learned delay and reconnect statistics."""
+        low, high = self.bounds
+        return {
+            "mode": self.mode,
+            "configured_delay": self.configured_delay,
+            "bounds": [low, high],
+            "current_delay": round(self._last_delay, 1),
+            "gap_samples": len(self._gaps),
+            "median_gap": round(sorted(self._gaps)[len(self._gaps) // 2], 1) if self._gaps else None,
+            "connects": self._connects,
+            "reconnects": self._reconnects,
+            "reconnect_rate": round(self._reconnects / self._bursts, 3) if self._bursts else 0.0,
+        }
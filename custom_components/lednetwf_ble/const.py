@@ -1,7 +1,9 @@
 """Constants for LEDnetWF BLE v2 integration."""
 import logging
+from collections.abc import Mapping
 from enum import IntEnum
-from typing import Final
+from types import MappingProxyType
+from typing import Any, Final, NamedTuple
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,12 +17,57 @@ CONF_LED_COUNT: Final = "led_count"
 CONF_SEGMENTS: Final = "segments"
 CONF_LED_TYPE: Final = "led_type"
 CONF_COLOR_ORDER: Final = "color_order"
+CONF_CONNECTION_SLOTS: Final = "connection_slots"
+CONF_DISCONNECT_MODE: Final = "disconnect_mode"
+CONF_PREWARM: Final = "prewarm"
+CONF_PREWARM_ENTITIES: Final = "prewarm_entities"
+CONF_SEGMENT_DELTAS: Final = "segment_deltas"
 
 # Default values
 DEFAULT_DISCONNECT_DELAY: Final = 30  # seconds
+MIN_DISCONNECT_DELAY: Final = 5  # seconds, lower bound of the options range
+MAX_DISCONNECT_DELAY: Final = 300  # seconds, upper bound of the options range
 DEFAULT_LED_COUNT: Final = 60
 DEFAULT_SEGMENTS: Final = 1
 DEFAULT_EFFECT_SPEED: Final = 50  # 0-100
+DEFAULT_COMMAND_FLUSH_WINDOW: Final = 0.05  # seconds between coalesced writes
+DEFAULT_STATE_QUERY_TTL: Final = 0.5  # seconds a state response is considered fresh
+DEFAULT_CONNECTION_SLOTS: Final = 0  # simultaneous connections per adapter/proxy, 0 = no limit
+CONNECTION_SLOT_TIMEOUT: Final = 30.0  # seconds to wait for a free connection slot
+DEFAULT_PREWARM: Final = False
+DEFAULT_SEGMENT_DELTAS: Final = False
+READY_TIMEOUT: Final = 1.0  # seconds to wait for the handshake reply after connect
+READY_MAX_SKIP: Final = 16  # most connects that skip the handshake after misses
+STATE_QUERY_TIMEOUT: Final = 10.0  # longest a shared state query waits for its reply
+NOTIFY_SETTLE_DELAY: Final = 0.1  # fallback wait for devices that never answer
+PREWARM_WINDOW: Final = 10  # seconds around a predicted command to pre-warm
+PREWARM_COOLDOWN: Final = 60  # seconds between advertisement-triggered pre-warms
+MAX_DEVICE_FADE_MS: Final = 65535  # longest fade in the 16-bit 0x3B gradient field
+HOST_TRANSITION_FPS: Final = 10  # frames/sec of host-side transition animations
+IOTBT_SEGMENT_COUNT: Final = 20  # segments per 0xE1 0x03 frame if the strip reports none
+# Products confirmed (by capture) to honour the start index of partial 0xE1 0x03
+# updates; others get full segment frames unless the segment_deltas option is on
+SEGMENT_DELTA_PRODUCTS: Final[frozenset[int]] = frozenset()
+
+# How the configured disconnect delay bounds the adaptive idle policy
+DISCONNECT_MODE_FIXED: Final = "fixed"  # always use the configured delay
+DISCONNECT_MODE_FLOOR: Final = "floor"  # learned delay, never below configured
+DISCONNECT_MODE_CEILING: Final = "ceiling"  # learned delay, never above configured
+DISCONNECT_MODES: Final = [DISCONNECT_MODE_FIXED, DISCONNECT_MODE_FLOOR, DISCONNECT_MODE_CEILING]
+DEFAULT_DISCONNECT_MODE: Final = DISCONNECT_MODE_FIXED
+
+# hass.data key for the integration-wide connection scheduler
+DATA_CONNECTION_SCHEDULER: Final = f"{DOMAIN}_connection_scheduler"
+# hass.data key for per-entry PrewarmController instances
+DATA_PREWARM: Final = f"{DOMAIN}_prewarm"
+# hass.data key for the integration-wide advertisement dispatcher
+DATA_ADVERTISEMENT_DISPATCHER: Final = f"{DOMAIN}_advertisement_dispatcher"
+
+# Entity services (services.yaml)
+SERVICE_SET_SEGMENT_COLORS: Final = "set_segment_colors"
+ATTR_COLORS: Final = "colors"
+ATTR_GRADIENT: Final = "gradient"
+ATTR_SEGMENTS: Final = "segments"
 
 # BLE UUIDs
 WRITE_CHARACTERISTIC_UUID: Final = "0000ff01-0000-1000-8000-00805f9b34fb"
@@ -181,6 +228,11 @@ SYMPHONY_SETTLED_EFFECTS: Final = {
     10: "Static Effect 10",
 }
 
+# Settled effect name -> ID (first ID wins for duplicate names)
+SYMPHONY_SETTLED_EFFECT_IDS: Final = MappingProxyType(
+    {name: eid for eid, name in reversed(SYMPHONY_SETTLED_EFFECTS.items())}
+)
+
 # Symphony Settled effects that support background color (2-10, not 1)
 SYMPHONY_SETTLED_BG_EFFECTS: Final = frozenset(range(2, 11))  # 2-10 inclusive
 
@@ -510,60 +562,175 @@ PRODUCT_CAPABILITIES: Final = {
 }
 
 
-def get_device_capabilities(product_id: int | None) -> dict:
+class ProductCapabilities:
+    """Immutable capability record for a product, shared between devices.
+
+    Fields that a product's PRODUCT_CAPABILITIES entry does not set are None.
+    get()/[] mirror the old capability dicts for callers that use them.
+    """
+
+    __slots__ = (
+        "name",
+        "has_rgb",
+        "has_ww",
+        "has_cw",
+        "has_dim",
+        "effect_type",
+        "has_segments",
+        "has_ic_config",
+        "has_bg_color",
+        "has_color_order",
+        "has_builtin_mic",
+        "mic_cmd_format",
+        "has_candle_mode",
+        "uses_0x38_effects",
+        "is_iotbt",
+        "is_switch",
+        "is_stub",
+        "needs_probing",
+        "probed",
+    )
+
+    def __init__(self, **values: Any) -> None:
+        """Initialize from capability keys; unknown keys are rejected."""
+        for key in self.__slots__:
+            object.__setattr__(self, key, values.pop(key, None))
+        if values:
+            raise TypeError(f"Unknown capability keys: {sorted(values)}")
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a capability, or default if unset."""
+        value = getattr(self, key, None) if key in _CAPABILITY_KEYS else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the set capabilities as a plain dict."""
+        return {
+            key: value
+            for key in self.__slots__
+            if (value := getattr(self, key)) is not None
+        }
+
+    def replace(self, **changes: Any) -> "ProductCapabilities":
+        """Return a copy with some capabilities changed."""
+        return ProductCapabilities(**{**self.as_dict(), **changes})
+
+
+_CAPABILITY_KEYS: Final = frozenset(ProductCapabilities.__slots__)
+
+
+class CapabilityOverlay:
+    """A device's capabilities: a shared product record plus local overrides.
+
+    Probed or configured values (e.g. has_ww after probing) go into a small
+    per-device override dict; `record` is the merged immutable record and is
+    only rebuilt when overrides change.
+    """
+
+    __slots__ = ("base", "overrides", "record")
+
+    def __init__(self, base: ProductCapabilities) -> None:
+        """Initialize with no overrides."""
+        self.base = base
+        self.overrides: dict[str, Any] = {}
+        self.record = base
+
+    def update(self, changes: Mapping[str, Any]) -> None:
+        """Override capabilities for this device."""
+        self.overrides.update(changes)
+        self.record = self.base.replace(
+            **{k: v for k, v in self.overrides.items() if k in _CAPABILITY_KEYS}
+        )
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.update({key: value})
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a capability, or default if unset."""
+        if key not in _CAPABILITY_KEYS:
+            value = self.overrides.get(key)
+            return default if value is None else value
+        return self.record.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the merged capabilities as a plain dict."""
+        return {**self.record.as_dict(), **self.overrides}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()})"
+
+
+# Built once at import; unknown product IDs get a record on first lookup
+_PRODUCT_RECORDS: Final = {
+    product_id: ProductCapabilities(**caps, needs_probing=caps.get("is_stub", False))
+    for product_id, caps in PRODUCT_CAPABILITIES.items()
+}
+_NO_PRODUCT_RECORD: Final = ProductCapabilities(
+    name="Unknown",
+    effect_type=EffectType.NONE,
+    needs_probing=True,
+)
+_UNKNOWN_PRODUCT_RECORDS: dict[int, ProductCapabilities] = {}
+
+
+def get_device_capabilities(product_id: int | None) -> ProductCapabilities:
     """Get device capabilities from product ID.
 
     For known devices, returns documented capabilities.
     For unknown devices, returns a stub indicating probing is needed.
+    The returned record is shared and immutable; wrap it in a
+    CapabilityOverlay for per-device changes.
 
     Source: protocol_docs/04_device_identification_capabilities.md
     """
     if product_id is None:
-        caps = {
-            "name": "Unknown",
-            "has_rgb": None,
-            "has_ww": None,
-            "has_cw": None,
-            "effect_type": EffectType.NONE,
-            "needs_probing": True,
-        }
-        _LOGGER.debug(
-            "Device capabilities for product_id=None: %s (probing required)",
-            caps
-        )
-        return caps
+        return _NO_PRODUCT_RECORD
 
-    if product_id in PRODUCT_CAPABILITIES:
-        caps = PRODUCT_CAPABILITIES[product_id].copy()
-        caps["needs_probing"] = caps.get("is_stub", False)
-        _LOGGER.debug(
-            "Device capabilities for product_id=0x%02X (%d): name=%s, "
-            "has_rgb=%s, has_ww=%s, has_cw=%s, effect_type=%s, needs_probing=%s",
-            product_id, product_id,
-            caps.get("name"),
-            caps.get("has_rgb"),
-            caps.get("has_ww"),
-            caps.get("has_cw"),
-            caps.get("effect_type"),
-            caps.get("needs_probing"),
-        )
-        return caps
+    record = _PRODUCT_RECORDS.get(product_id)
+    if record is not None:
+        return record
 
     # Unknown product ID - needs capability probing
     # Per protocol docs: "For devices with unknown Product ID (0x00) or stub classes, probe capabilities"
-    caps = {
-        "name": f"Unknown_0x{product_id:02X}",
-        "has_rgb": None,
-        "has_ww": None,
-        "has_cw": None,
-        "effect_type": EffectType.SYMPHONY,  # Assume modern device with Symphony support
-        "needs_probing": True,
-    }
-    _LOGGER.debug(
-        "Device capabilities for UNKNOWN product_id=0x%02X (%d): %s (probing required)",
-        product_id, product_id, caps
-    )
-    return caps
+    record = _UNKNOWN_PRODUCT_RECORDS.get(product_id)
+    if record is None:
+        record = _UNKNOWN_PRODUCT_RECORDS[product_id] = ProductCapabilities(
+            name=f"Unknown_0x{product_id:02X}",
+            effect_type=EffectType.SYMPHONY,  # Assume modern device with Symphony support
+            needs_probing=True,
+        )
+        _LOGGER.debug(
+            "Device capabilities for UNKNOWN product_id=0x%02X (%d): probing required",
+            product_id, product_id,
+        )
+    return record
 
 
 def is_supported_device(product_id: int | None) -> bool:
@@ -606,57 +773,104 @@ def needs_capability_probing(product_id: int | None) -> bool:
     return PRODUCT_CAPABILITIES[product_id].get("is_stub", False)
 
 
-def get_effect_list(
+# Special marker for sound reactive mode (not a real effect ID)
+SOUND_REACTIVE_MARKER: Final = 0xFFFF
+
+# Special marker for candle mode (0x39 command, not a standard effect)
+# Used by product IDs 0x54 and 0x5B
+CANDLE_MODE_MARKER: Final = 0xFFFE
+
+
+class EffectCatalog(NamedTuple):
+    """Effect names and name -> ID mapping for one device configuration."""
+
+    names: tuple[str, ...]
+    ids: Mapping[str, int]
+
+
+# (effect_type, has_bg_color, has_ic_config, has_builtin_mic, has_candle_mode)
+# -> catalog, built on first use and shared by all devices
+_EFFECT_CATALOGS: dict[tuple, EffectCatalog] = {}
+
+
+def get_effect_catalog(
     effect_type: EffectType,
     has_bg_color: bool = False,
     has_ic_config: bool = False,
     has_builtin_mic: bool = False,
     has_candle_mode: bool = False,
-) -> list[str]:
-    """Get list of effect names for the given effect type.
+) -> EffectCatalog:
+    """Get the immutable effect catalog for a device configuration."""
+    key = (effect_type, has_bg_color, has_ic_config, has_builtin_mic, has_candle_mode)
+    catalog = _EFFECT_CATALOGS.get(key)
+    if catalog is None:
+        catalog = _EFFECT_CATALOGS[key] = _build_effect_catalog(*key)
+    return catalog
 
-    Args:
-        effect_type: The effect command type for the device
-        has_bg_color: If True, include static effects that support background color
-        has_ic_config: If True, device is a Symphony controller (0xA1-0xAD), not 0x56/0x80
-        has_builtin_mic: If True, include "Sound Reactive" option for devices with built-in mic
-        has_candle_mode: If True, include "Candle Mode" option (0x54, 0x5B devices)
 
-    Returns:
-        List of effect names
-    """
-    effects = []
+def _build_effect_catalog(
+    effect_type: EffectType,
+    has_bg_color: bool,
+    has_ic_config: bool,
+    has_builtin_mic: bool,
+    has_candle_mode: bool,
+) -> EffectCatalog:
+    """Build the effect list and name -> ID mapping for a configuration."""
+    effects: list[str] = []
+    # (effect table, ID encoder) in lookup order; the first match for a name wins
+    id_sources: list[tuple[dict[int, str], Any]] = []
+
+    def plain(eid: int) -> int:
+        return eid
+
+    def shifted(eid: int) -> int:
+        # Static/Settled effects use ID << 8 to distinguish from regular effects
+        return eid << 8
 
     if effect_type == EffectType.SIMPLE:
         effects = list(SIMPLE_EFFECTS.values())
+        id_sources = [(SIMPLE_EFFECTS, plain)]
     elif effect_type == EffectType.SYMPHONY:
         if has_ic_config:
             # True Symphony devices (0xA1-0xAD):
             # - Settled Mode effects (1-10) via 0x41 command with FG+BG colors
             # - Function Mode effects (1-100) via 0x42 command
             effects = list(SYMPHONY_SETTLED_EFFECTS.values())
-            effects.extend(list(SYMPHONY_EFFECTS.values()))
+            effects.extend(SYMPHONY_EFFECTS.values())
+            id_sources = [(SYMPHONY_SETTLED_EFFECTS, shifted), (SYMPHONY_EFFECTS, plain)]
         elif has_bg_color:
             # 0x56/0x80 devices: Static effects + Regular effects + Sound reactive
             effects = list(STATIC_EFFECTS_WITH_BG.values())
-            effects.extend(list(STRIP_EFFECTS.values()))
-            effects.extend(list(SOUND_REACTIVE_EFFECTS.values()))
+            effects.extend(STRIP_EFFECTS.values())
+            effects.extend(SOUND_REACTIVE_EFFECTS.values())
             effects.append("Cycle Modes")
+            id_sources = [
+                (STATIC_EFFECTS_WITH_BG, shifted),
+                (STRIP_EFFECTS, plain),
+                # Sound reactive effects use (eid + 0x32) << 8
+                (SOUND_REACTIVE_EFFECTS, lambda eid: (eid + 0x32) << 8),
+                ({255: "Cycle Modes"}, plain),
+            ]
         else:
             # Fallback for unknown Symphony-type devices: numbered effects
             effects = list(SYMPHONY_EFFECTS.values())
+            id_sources = [(SYMPHONY_EFFECTS, plain)]
     elif effect_type == EffectType.ADDRESSABLE_0x53:
         # 0x53 Ring Light effects (113 effects + Cycle All)
         effects = list(ADDRESSABLE_0x53_EFFECTS.values())
+        id_sources = [(ADDRESSABLE_0x53_EFFECTS, plain)]
     elif effect_type == EffectType.IOTBT:
         # IOTBT devices have 12 effects via 0xE0 0x02 command
         # Plus 8 music reactive effects via 0xE1 0x05 command
+        # (music IDs are already encoded, e.g. 0x100 for Music 1)
         effects = list(IOTBT_EFFECTS.values())
-        effects.extend(list(IOTBT_MUSIC_EFFECTS.values()))
+        effects.extend(IOTBT_MUSIC_EFFECTS.values())
+        id_sources = [(IOTBT_EFFECTS, plain), (IOTBT_MUSIC_EFFECTS, plain)]
     elif effect_type == EffectType.IOTBT_SEGMENT:
         # IOTBT Segment-based devices have 99 effects via 0xE1 0x01 command
         effects = list(IOTBT_SEGMENT_EFFECTS.values())
-        effects.extend(list(IOTBT_MUSIC_EFFECTS.values()))
+        effects.extend(IOTBT_MUSIC_EFFECTS.values())
+        id_sources = [(IOTBT_SEGMENT_EFFECTS, plain), (IOTBT_MUSIC_EFFECTS, plain)]
 
     # Add sound reactive option for devices with built-in microphone (non-IOTBT)
     # IOTBT devices have specific music effects listed above instead
@@ -667,15 +881,42 @@ def get_effect_list(
     if has_candle_mode:
         effects.append("Candle Mode")
 
-    return effects
+    # Special modes take precedence over effect tables (not real effect IDs)
+    ids: dict[str, int] = {}
+    if has_builtin_mic:
+        ids["Sound Reactive"] = SOUND_REACTIVE_MARKER
+    if has_candle_mode:
+        ids.setdefault("Candle Mode", CANDLE_MODE_MARKER)
+    for table, encode in id_sources:
+        for eid, name in table.items():
+            if name not in ids:
+                ids[name] = encode(eid)
 
+    return EffectCatalog(tuple(effects), MappingProxyType(ids))
 
-# Special marker for sound reactive mode (not a real effect ID)
-SOUND_REACTIVE_MARKER: Final = 0xFFFF
 
-# Special marker for candle mode (0x39 command, not a standard effect)
-# Used by product IDs 0x54 and 0x5B
-CANDLE_MODE_MARKER: Final = 0xFFFE
+def get_effect_list(
+    effect_type: EffectType,
+    has_bg_color: bool = False,
+    has_ic_config: bool = False,
+    has_builtin_mic: bool = False,
+    has_candle_mode: bool = False,
+) -> tuple[str, ...]:
+    """Get list of effect names for the given effect type.
+
+    Args:
+        effect_type: The effect command type for the device
+        has_bg_color: If True, include static effects that support background color
+        has_ic_config: If True, device is a Symphony controller (0xA1-0xAD), not 0x56/0x80
+        has_builtin_mic: If True, include "Sound Reactive" option for devices with built-in mic
+        has_candle_mode: If True, include "Candle Mode" option (0x54, 0x5B devices)
+
+    Returns:
+        Effect names (shared, immutable)
+    """
+    return get_effect_catalog(
+        effect_type, has_bg_color, has_ic_config, has_builtin_mic, has_candle_mode
+    ).names
 
 
 def get_effect_id(
@@ -701,71 +942,9 @@ def get_effect_id(
         Returns SOUND_REACTIVE_MARKER (0xFFFF) for "Sound Reactive" effect.
         Returns CANDLE_MODE_MARKER (0xFFFE) for "Candle Mode" effect.
     """
-    # Check for special modes first (not real effect IDs)
-    if effect_name == "Sound Reactive" and has_builtin_mic:
-        return SOUND_REACTIVE_MARKER
-    if effect_name == "Candle Mode" and has_candle_mode:
-        return CANDLE_MODE_MARKER
-    if effect_type == EffectType.SIMPLE:
-        for eid, name in SIMPLE_EFFECTS.items():
-            if name == effect_name:
-                return eid
-    elif effect_type == EffectType.SYMPHONY:
-        if has_ic_config:
-            # True Symphony devices (0xA1-0xAD):
-            # - Settled Mode effects (1-10) via 0x41 command with FG+BG colors
-            # - Function Mode effects (1-100) via 0x42 command
-            # Check Settled Mode effects first (encode with << 8 to distinguish from Function Mode)
-            for eid, name in SYMPHONY_SETTLED_EFFECTS.items():
-                if name == effect_name:
-                    # Encode Settled effects with << 8 to distinguish from Function Mode
-                    return eid << 8
-            # Then check Function Mode effects (1-100)
-            for eid, name in SYMPHONY_EFFECTS.items():
-                if name == effect_name:
-                    return eid
-        elif has_bg_color:
-            # 0x56/0x80 devices: Check static effects, strip effects, sound reactive
-            for eid, name in STATIC_EFFECTS_WITH_BG.items():
-                if name == effect_name:
-                    # Static effects use ID << 8 to distinguish from regular effects
-                    return eid << 8
-            for eid, name in STRIP_EFFECTS.items():
-                if name == effect_name:
-                    return eid
-            for eid, name in SOUND_REACTIVE_EFFECTS.items():
-                if name == effect_name:
-                    # Sound reactive effects use (eid + 0x32) << 8
-                    return (eid + 0x32) << 8
-            if effect_name == "Cycle Modes":
-                return 255
-        else:
-            # Fallback for unknown Symphony-type devices: numbered effects
-            for eid, name in SYMPHONY_EFFECTS.items():
-                if name == effect_name:
-                    return eid
-    elif effect_type == EffectType.ADDRESSABLE_0x53:
-        for eid, name in ADDRESSABLE_0x53_EFFECTS.items():
-            if name == effect_name:
-                return eid
-    elif effect_type == EffectType.IOTBT:
-        # Regular effects (1-12)
-        for eid, name in IOTBT_EFFECTS.items():
-            if name == effect_name:
-                return eid
-        # Music reactive effects (encoded as effect_num << 8)
-        for eid, name in IOTBT_MUSIC_EFFECTS.items():
-            if name == effect_name:
-                return eid  # Already encoded (e.g., 0x100 for Music 1)
-    elif effect_type == EffectType.IOTBT_SEGMENT:
-        # Segment-based effects (1-99) via 0xE1 0x01 command
-        for eid, name in IOTBT_SEGMENT_EFFECTS.items():
-            if name == effect_name:
-                return eid
-        for eid, name in IOTBT_MUSIC_EFFECTS.items():
-            if name == effect_name:
-                return eid  # Already encoded (e.g., 0x100 for Music 1)
-    return None
+    return get_effect_catalog(
+        effect_type, has_bg_color, has_ic_config, has_builtin_mic, has_candle_mode
+    ).ids.get(effect_name)
 
 
 def get_brightness_scale(product_id: int | None) -> ValueScale:
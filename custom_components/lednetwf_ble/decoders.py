@@ -0,0 +1,299 @@
+"""Response decoders compiled from the app's responseHexDescribes.
+
+ble_devices.json describes the notification frames of some products as hex
+templates, e.g. for a state upload:
+
+    {"hexForm": "81{devType}{open}{mode}00{speed}{brightness}000000{ver}0000{cs}",
+     "dpCode": "state_upload", "flags": [{"index": 0, "flag": 129}], "length": 14}
+
+Each template is compiled once into a ResponseDecoder: the expected length,
+the flag bytes to check, the checksum position and a struct that unpacks
+every named field in one call (repeated placeholders are one big-endian
+multi-byte field).
+
+For state_upload templates the placeholder names are also mapped to the
+keys of the parse_state_response() dict (see _STATE_FIELDS), so each state
+value is read from the byte the template names, not from a fixed position.
+A state decoder is only used if its template names every state field and
+it agrees with parse_state_response() on probe frames (see
+ResponseDecoder.state_parity); other products keep the hand-written parser.
+
+Usage:
+    decoder = ResponseDecoder.compile(describe)
+    fields = decoder.decode(data)        # {"devType": 0x33, "open": 0x23, ...}
+    state = decoder.decode_state(data)   # parse_state_response() keys, template bytes
+"""
+from __future__ import annotations
+
+import logging
+import re
+import struct
+from typing import Any
+
+from .protocol import parse_state_response
+
+_LOGGER = logging.getLogger(__name__)
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+_HEX_LITERAL = re.compile(r"(?:[0-9a-fA-F]{2})*")
+
+CHECKSUM_FIELD = "cs"
+
+# struct codes for big-endian fields of 1, 2 and 4 bytes; other widths are
+# unpacked as bytes and converted with int.from_bytes
+_INT_CODES = {1: "B", 2: "H", 4: "I"}
+
+STATE_DP_CODE = "state_upload"
+
+# Template placeholder -> parse_state_response() key for each of its bytes.
+# The effect-mode handling reads brightness from "r", so {brightness} maps
+# there; placeholders without a state meaning (devType, pointCount, sort,
+# the assist channel) are skipped.
+_STATE_FIELDS: dict[str, tuple[str, ...]] = {
+    "open": ("power",),
+    "masterSwitch": ("power",),
+    "mode": ("mode_type",),
+    "modeValue": ("sub_mode",),
+    "speed": ("value1",),
+    "cctBrightness": ("value1",),
+    "brightness": ("r",),
+    "var1": ("r",),
+    "var2": ("g",),
+    "green": ("g",),
+    "blue": ("b",),
+    "color": ("r", "g", "b"),
+    "warm": ("ww",),
+    "cool": ("cw",),
+    "ver": ("led_version",),
+}
+# A repeated {mode}{mode} carries the mode type and sub mode
+_STATE_WIDE_FIELDS: dict[tuple[str, int], tuple[str, ...]] = {
+    ("mode", 2): ("mode_type", "sub_mode"),
+}
+_STATE_KEYS = ("mode_type", "sub_mode", "value1", "r", "g", "b", "ww", "cw", "led_version")
+_STATE_REQUIRED = frozenset({"power", *_STATE_KEYS})
+
+# (power, mode type, sub mode) of the probe frames for the parity check:
+# static RGB, static white, effect and off
+_PARITY_MODES = ((0x23, 0x61, 0xF0), (0x23, 0x61, 0x0F), (0x23, 0x25, 0x26), (0x24, 0x61, 0xF0))
+
+# Check failures, in the order they are tested
+REJECT_LENGTH = "length"
+REJECT_FLAG = "flag"
+REJECT_CHECKSUM = "checksum"
+
+
+class ResponseDecoder:
+    """A responseHexDescribes entry compiled to a fixed-offset decoder."""
+
+    __slots__ = (
+        "dp_code",
+        "length",
+        "flags",
+        "checksum_index",
+        "names",
+        "_struct",
+        "_wide",
+        "_state",
+        "_state_keys",
+    )
+
+    def __init__(
+        self,
+        dp_code: str,
+        length: int,
+        flags: tuple[tuple[int, int], ...],
+        checksum_index: int | None,
+        names: tuple[str, ...],
+        fmt: str,
+        wide: tuple[int, ...],
+        state_fmt: str | None = None,
+        state_keys: tuple[str, ...] = (),
+    ) -> None:
+        """Initialize from compiled parts; use ResponseDecoder.compile()."""
+        self.dp_code = dp_code
+        self.length = length
+        self.flags = flags
+        self.checksum_index = checksum_index
+        self.names = names
+        self._struct = struct.Struct(fmt)
+        # Positions in the unpacked tuple that need int.from_bytes
+        self._wide = wide
+        # Bytes that carry parse_state_response() keys, in frame order
+        self._state = struct.Struct(state_fmt) if state_fmt else None
+        self._state_keys = state_keys
+
+    @classmethod
+    def compile(cls, describe: dict[str, Any]) -> ResponseDecoder | None:
+        """Compile one responseHexDescribes entry.
+
+        Returns None if the template is not whole hex bytes around its
+        placeholders, repeats a placeholder non-contiguously, or does not
+        match its declared length.
+        """
+        hex_form = describe.get("hexForm", "")
+        if not hex_form:
+            return None
+
+        # (name or None for fixed bytes, width in bytes)
+        runs: list[list[Any]] = []
+        pos = 0
+        for match in [*_PLACEHOLDER.finditer(hex_form), None]:
+            literal = hex_form[pos:match.start() if match else len(hex_form)]
+            if not _HEX_LITERAL.fullmatch(literal):
+                return None
+            if literal:
+                runs.append([None, len(literal) // 2])
+            if match is None:
+                break
+            name = match.group(1)
+            if runs and runs[-1][0] == name:
+                runs[-1][1] += 1
+            else:
+                runs.append([name, 1])
+            pos = match.end()
+
+        names = [name for name, _ in runs if name is not None]
+        if len(names) != len(set(names)):
+            _LOGGER.debug("Response template %s repeats a field apart", hex_form)
+            return None
+        length = sum(width for _, width in runs)
+        if describe.get("length", length) != length:
+            _LOGGER.debug(
+                "Response template %s is %d bytes, declared %s",
+                hex_form, length, describe.get("length"),
+            )
+            return None
+
+        fmt = ">"
+        state_fmt = ">"
+        state_keys: list[str] = []
+        offset = 0
+        checksum_index = None
+        field_names: list[str] = []
+        wide: list[int] = []
+        for name, width in runs:
+            if name is None:
+                fmt += f"{width}x"
+            elif name == CHECKSUM_FIELD and width == 1:
+                checksum_index = offset
+                fmt += f"{width}x"
+            else:
+                if width not in _INT_CODES:
+                    wide.append(len(field_names))
+                fmt += _INT_CODES.get(width, f"{width}s")
+                field_names.append(name)
+            keys = _STATE_WIDE_FIELDS.get((name, width)) or _STATE_FIELDS.get(name, ())
+            if len(keys) == width and not set(keys) & set(state_keys):
+                state_fmt += "B" * width
+                state_keys.extend(keys)
+            else:
+                state_fmt += f"{width}x"
+            offset += width
+
+        dp_code = describe.get("dpCode", "")
+        if dp_code != STATE_DP_CODE or not _STATE_REQUIRED <= set(state_keys):
+            state_fmt = None
+
+        flags = tuple(
+            (flag["index"], flag["flag"]) for flag in describe.get("flags", [])
+        )
+        return cls(
+            dp_code,
+            length,
+            flags,
+            checksum_index,
+            tuple(field_names),
+            fmt,
+            tuple(wide),
+            state_fmt,
+            tuple(state_keys),
+        )
+
+    @property
+    def maps_state(self) -> bool:
+        """True if the template names every field of a state frame."""
+        return self._state is not None
+
+    def state_parity(self) -> bool:
+        """Return True if decode_state() agrees with parse_state_response().
+
+        Probe frames put a distinct value in every byte (and the power and
+        mode bytes where the hand parser reads them), so a template that
+        places any field elsewhere is caught.
+        """
+        if self._state is None or self.length < 14:
+            return False
+        for power, mode_type, sub_mode in _PARITY_MODES:
+            frame = bytearray(0x30 + i for i in range(self.length))
+            frame[2], frame[3], frame[4] = power, mode_type, sub_mode
+            for index, flag in self.flags:
+                frame[index] = flag
+            if self.checksum_index is not None:
+                cs = self.checksum_index
+                frame[cs] = sum(frame[:cs]) & 0xFF
+            if self.decode_state(bytes(frame)) != parse_state_response(bytes(frame)):
+                return False
+        return True
+
+    def check(self, data: bytes) -> str | None:
+        """Return why data does not match the template, or None if it does."""
+        if len(data) != self.length:
+            return REJECT_LENGTH
+        for index, flag in self.flags:
+            if data[index] != flag:
+                return REJECT_FLAG
+        cs = self.checksum_index
+        if cs is not None:
+            # Checksum is the low byte of the sum of all preceding bytes
+            if sum(data[:cs]) & 0xFF != data[cs]:
+                return REJECT_CHECKSUM
+        return None
+
+    def decode(self, data: bytes) -> dict[str, int] | None:
+        """Decode the named template fields, or None if data does not match."""
+        if self.check(data) is not None:
+            return None
+        values = list(self._struct.unpack_from(data))
+        for i in self._wide:
+            values[i] = int.from_bytes(values[i], "big")
+        return dict(zip(self.names, values))
+
+    def decode_state(self, data: bytes) -> dict[str, Any] | None:
+        """Decode a 0x81 state frame into the parse_state_response() dict.
+
+        Every value comes from the byte the template names for it. Returns
+        None if the template has no state mapping or data does not match it.
+        """
+        if self._state is None or self.check(data) is not None:
+            return None
+
+        state = dict(zip(self._state_keys, self._state.unpack_from(data)))
+        state["is_on"] = state.pop("power") == 0x23
+        mode_type = state["mode_type"]
+        sub_mode = state["sub_mode"]
+        is_effect_mode = mode_type == 0x25
+        is_static = mode_type == 0x61
+        state["effect_id"] = sub_mode if is_effect_mode else None
+        state["is_effect_mode"] = is_effect_mode
+        state["is_rgb_mode"] = is_static and sub_mode in (0xF0, 0x01, 0x0B)
+        state["is_white_mode"] = is_static and sub_mode == 0x0F
+        state["color_order_nibble"] = (sub_mode & 0xF0) >> 4
+        return state
+
+
+def compile_decoders(describes: list[Any]) -> dict[str, ResponseDecoder]:
+    """Compile a product's responseHexDescribes, keyed by dpCode."""
+    decoders: dict[str, ResponseDecoder] = {}
+    for describe in describes:
+        if not isinstance(describe, dict):
+            continue
+        decoder = ResponseDecoder.compile(describe)
+        if decoder is None:
+            continue
+        if decoder.dp_code == STATE_DP_CODE and not decoder.state_parity():
+            # Template leaves out or moves state fields; the hand-written
+            # parser handles this product
+            continue
+        decoders.setdefault(decoder.dp_code, decoder)
+    return decoders
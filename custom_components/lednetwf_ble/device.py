@@ -5,7 +5,10 @@ Handles BLE connection, state management, and command sending.
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
+import time
+from dataclasses import dataclass, field, replace
 from typing import Any, Callable
 
 from bleak import BleakClient
@@ -20,9 +23,21 @@ from .const import (
     WRITE_CHARACTERISTIC_UUID,
     NOTIFY_CHARACTERISTIC_UUID,
     DEFAULT_DISCONNECT_DELAY,
+    DEFAULT_DISCONNECT_MODE,
     DEFAULT_EFFECT_SPEED,
+    DEFAULT_COMMAND_FLUSH_WINDOW,
+    DEFAULT_STATE_QUERY_TTL,
+    NOTIFY_SETTLE_DELAY,
+    READY_MAX_SKIP,
+    READY_TIMEOUT,
+    STATE_QUERY_TIMEOUT,
+    HOST_TRANSITION_FPS,
+    IOTBT_SEGMENT_COUNT,
+    SEGMENT_DELTA_PRODUCTS,
+    MAX_DEVICE_FADE_MS,
     MIN_KELVIN,
     MAX_KELVIN,
+    CapabilityOverlay,
     EffectType,
     get_device_capabilities,
     needs_capability_probing,
@@ -34,16 +49,92 @@ from .const import (
     CANDLE_MODE_MARKER,
 )
 from . import protocol
-from .capabilities import CAPABILITIES
+from .animation import AnimationEngine, LightFrame
+from .capabilities import CAPABILITIES, EffectiveCapabilities
+from .decoders import REJECT_CHECKSUM, STATE_DP_CODE, ResponseDecoder
+from .framebuffer import SegmentFramebuffer
+from .connection import (
+    AdaptiveIdlePolicy,
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+    adapter_for_device,
+    get_connection_scheduler,
+)
 from .commands import (
+    CommandBuildError,
+    build_brightness_command,
     build_command,
     build_effect_command as build_effect_command_datadriven,
     build_color_command as build_color_command_datadriven,
+    fade_params,
     get_best_function,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Coalescing keys for _send_command. A queued write is replaced by a newer
+# write with the same key before it reaches the radio (latest wins).
+COALESCE_COLOR = "color"
+COALESCE_CCT = "cct"
+COALESCE_EFFECT = "effect"
+COALESCE_BG_COLOR = "bg_color"
+
+# Response types for request/response correlation (see _request)
+RESPONSE_STATE = "state"
+RESPONSE_LED_SETTINGS = "led_settings"
+RESPONSE_READY = "ready"  # Readiness handshake after connecting
+
+# What a turn-on plan sends after (or instead of) the power packet
+PLAN_RGB = "rgb"
+PLAN_CCT = "cct"
+PLAN_EFFECT = "effect"
+
+# How a plan's transition is carried out
+FADE_DEVICE = "device"  # one switch_led_v2 / bright_value_v2 packet with a fade time
+FADE_HOST = "host"  # frames interpolated by the integration (animation.py)
+
+
+@dataclass
+class _QueuedWrite:
+    """A packet waiting in the outbound queue, plus everyone awaiting it."""
+
+    packet: bytearray
+    with_response: bool
+    waiters: list[asyncio.Future] = field(default_factory=list)
+    on_seq: Callable[[int], None] | None = None
+    priority: int = PRIORITY_USER
+
+
+@dataclass(frozen=True)
+class TurnOnPlan:
+    """Packets needed to reach a requested on-state (see plan_turn_on)."""
+
+    # Send a separate power-on packet (after the first frame for host fades)
+    power: bool
+    # PLAN_* value command to send, or None for power only
+    action: str | None = None
+    # RGB tuple, Kelvin or effect name for the action
+    value: Any = None
+    brightness: int | None = None
+    speed: int | None = None
+    # The action packet also switches the light on (power packet dropped)
+    fused: bool = False
+    # FADE_* for a power/brightness transition, None for an instant change
+    fade: str | None = None
+    transition: float = 0.0
+
+    @property
+    def writes(self) -> int:
+        """Packets this plan sends (first frame only for host fades)."""
+        if self.fade == FADE_DEVICE:
+            return int(self.power) + (self.brightness is not None)
+        return int(self.power) + (self.action is not None)
+
+    @property
+    def writes_saved(self) -> int:
+        """Packets saved compared to sending power and value separately."""
+        return int(self.fused)
+
 
 class LEDNetWFDevice:
     """Represents a LEDnetWF BLE device."""
@@ -56,6 +147,9 @@ class LEDNetWFDevice:
         product_id: int | None = None,
         disconnect_delay: int = DEFAULT_DISCONNECT_DELAY,
         setup_mode: bool = False,
+        flush_window: float = DEFAULT_COMMAND_FLUSH_WINDOW,
+        disconnect_mode: str = DEFAULT_DISCONNECT_MODE,
+        segment_deltas: bool = False,
     ) -> None:
         """Initialize the device.
 
@@ -67,12 +161,18 @@ class LEDNetWFDevice:
             disconnect_delay: Seconds to wait before disconnecting
             setup_mode: If True, use single connection attempt (no retries)
                        for faster failure during device setup/testing
+            flush_window: Seconds to wait between queued writes so that
+                          superseded commands can be merged (0 = no wait)
+            disconnect_mode: How disconnect_delay bounds the adaptive idle
+                             delay (DISCONNECT_MODE_*)
+            segment_deltas: Send only the changed segments of segment color
+                            frames (see set_segment_colors)
         """
         self._hass = hass
         self._address = address
         self._name = name
         self._product_id = product_id
-        self._disconnect_delay = disconnect_delay
+        self._idle_policy = AdaptiveIdlePolicy(disconnect_delay, disconnect_mode)
         self._setup_mode = setup_mode
 
         # Connection state
@@ -81,6 +181,73 @@ class LEDNetWFDevice:
         self._disconnect_timer: asyncio.TimerHandle | None = None
         self._seq: int = 0
         self._connect_lock = asyncio.Lock()
+        self._scheduler = get_connection_scheduler(hass)
+
+        # Outbound write queue (latest-wins coalescing per command kind)
+        self._flush_window = flush_window
+        self._write_queue: dict[Any, _QueuedWrite] = {}
+        self._write_task: asyncio.Task | None = None
+        self._write_ids = itertools.count()
+        self._write_in_flight: bool = False
+        self._writes_sent: int = 0
+        self._writes_dropped: int = 0
+        self._gatt_writes: int = 0
+        self._turn_on_plans: int = 0
+        self._turn_on_writes_saved: int = 0
+
+        # Transitions: device-side fades sent and host-side animations started
+        self._animation = AnimationEngine(
+            self._send_animation_frame, HOST_TRANSITION_FPS, name
+        )
+        self._transition_stats: dict[str, int] = {"device_fades": 0, "host_fades": 0}
+        # Per-segment colors the device is known to show (forgotten on any
+        # other command), so segment frames are sent as deltas
+        self._framebuffer = SegmentFramebuffer()
+        self._segment_deltas = segment_deltas
+        # Brightness was stepped down before a host-faded power off, so the
+        # next turn on must resend the mode at the remembered brightness
+        self._faded_off: bool = False
+
+        # ATT MTU of the current connection (None = not connected/negotiated)
+        # and the planner sized to the last known MTU
+        self._mtu: int | None = None
+        self._mtu_source: str | None = None
+        self._planner = protocol.PacketPlanner(None)
+
+        # Readiness handshake after connecting (see _ready_handshake)
+        self._ready_pending: bool = False  # New link not confirmed yet
+        self._ready_misses: int = 0  # Consecutive handshakes without a reply
+        self._ready_skip: int = 0  # Connects left that use the settle delay
+        self._ready_time: float | None = None  # Smoothed seconds until ready
+
+        # Connection pre-warming (see async_prewarm) and connect timing
+        self._connect_time: float | None = None  # Smoothed seconds per connect
+        self._prewarmed: bool = False
+        self._prewarm_stats: dict[str, int] = {
+            "connections": 0, "used": 0, "unused": 0, "skipped_no_slot": 0,
+        }
+        self._prewarm_time_saved: float = 0.0
+
+        # Capabilities after runtimeScripts, rebuilt when the configuration
+        # key (capabilities, firmware version, LED type when known) changes
+        self._effective_caps: EffectiveCapabilities | None = None
+        self._effective_caps_key: tuple | None = None
+
+        # Raw bytes of the last advertisement parsed; an identical one is
+        # skipped until a command or notification may have changed state
+        self._adv_fingerprint: tuple | None = None
+        self._adv_stats: dict[str, int] = {"parsed": 0, "unchanged": 0}
+
+        # Rebuilds responses split across notifications
+        self._reassembler = protocol.NotificationReassembler()
+
+        # State frame decoder compiled from responseHexDescribes, resolved on
+        # the first state response (None = use protocol.parse_state_response)
+        self._state_decoder: ResponseDecoder | None = None
+        self._state_decoder_resolved = False
+        self._decoder_stats: dict[str, int] = {
+            "state_compiled": 0, "state_fallback": 0,
+        }
 
         # Device state
         self._is_on: bool | None = None
@@ -100,7 +267,6 @@ class LEDNetWFDevice:
         self._color_order: int | None = None
         self._segments: int | None = None
         self._direction: int | None = None  # 0 = forward, 1 = reverse
-        self._pending_led_settings_response: asyncio.Event | None = None
 
         # Firmware info (from manufacturer data or service data)
         self._fw_version: str | None = None
@@ -120,7 +286,8 @@ class LEDNetWFDevice:
         self._callbacks: list[Callable[[], None]] = []
 
         # Cache capabilities
-        self._capabilities = get_device_capabilities(product_id)
+        # Shared product record plus this device's probed overrides
+        self._capabilities = CapabilityOverlay(get_device_capabilities(product_id))
 
         # Log initial device setup
         _LOGGER.debug(
@@ -135,10 +302,16 @@ class LEDNetWFDevice:
             self._capabilities.get("needs_probing"),
         )
 
-        # Response waiting mechanism for probing
-        self._pending_state_response: asyncio.Event | None = None
+        # Outstanding requests keyed by (response type, transport sequence number)
+        self._pending_responses: dict[tuple[str, int], asyncio.Future] = {}
         self._last_state_response: dict | None = None
 
+        # Single-flight state query shared by concurrent callers, plus the
+        # time the last state response arrived (None = stale)
+        self._state_query: asyncio.Task | None = None
+        self._state_response_time: float | None = None
+        self._state_query_ttl = DEFAULT_STATE_QUERY_TTL
+
     @property
     def address(self) -> str:
         """Return the BLE address."""
@@ -155,7 +328,17 @@ class LEDNetWFDevice:
         return self._product_id
 
     @property
-    def capabilities(self) -> dict:
+    def is_idle(self) -> bool:
+        """Return True if no command or query is queued or in flight."""
+        return not (
+            self._write_queue
+            or self._write_in_flight
+            or self._pending_responses
+            or self._connect_lock.locked()
+        )
+
+    @property
+    def capabilities(self) -> CapabilityOverlay:
         """Return device capabilities."""
         return self._capabilities
 
@@ -179,11 +362,116 @@ class LEDNetWFDevice:
         Returns:
             True if function is supported for this device and firmware version
         """
-        if self._product_id is None:
+        effective = self.effective_capabilities
+        if effective is None:
             return False
-        return CAPABILITIES.supports_function(
-            self._product_id, function_code, self.device_version
-        )
+        return effective.supports_function(function_code)
+
+    def _runtime_config(self) -> dict[str, Any]:
+        """Device configuration that runtimeScripts conditions refer to.
+
+        Only variables whose meaning is known are set. "wiring" (the app's
+        channel wiring setting, tested for 6/7 on 0x06/0x07/0x48) and "warm"
+        (whether a Symphony strip has a warm white chip) are not reported by
+        the device, so they stay undefined and scripts testing them never
+        match, keeping the product's full function set.
+        """
+        config: dict[str, Any] = {}
+        if self._led_type is not None:
+            config["ledType"] = self._led_type
+        return config
+
+    @property
+    def effective_capabilities(self) -> EffectiveCapabilities | None:
+        """Return the JSON capabilities with runtimeScripts applied.
+
+        Scripts are evaluated once per firmware/configuration; repeated
+        lookups return the cached function set.
+        """
+        caps = self.json_capabilities
+        if caps is None:
+            return None
+        config = self._runtime_config()
+        key = (id(caps), self.device_version, *config.items())
+        if key != self._effective_caps_key:
+            self._effective_caps = caps.effective(self.device_version, config)
+            self._effective_caps_key = key
+        return self._effective_caps
+
+    @property
+    def command_stats(self) -> dict[str, int]:
+        """Return outbound write queue counters for diagnostics."""
+        return {
+            "writes_sent": self._writes_sent,
+            "writes_dropped": self._writes_dropped,
+            "gatt_writes": self._gatt_writes,
+            "queue_depth": len(self._write_queue),
+            "turn_on_plans": self._turn_on_plans,
+            "turn_on_writes_saved": self._turn_on_writes_saved,
+            **self._transition_stats,
+            **self._framebuffer.stats,
+        }
+
+    @property
+    def animation_stats(self) -> dict[str, Any]:
+        """Return host-side animation frame timing for diagnostics."""
+        return self._animation.stats()
+
+    @property
+    def planner(self) -> protocol.PacketPlanner:
+        """Return the packet planner for the current (or last) connection."""
+        return self._planner
+
+    @property
+    def connection_info(self) -> dict[str, Any]:
+        """Return MTU, write sizing and readiness timing for diagnostics."""
+        return {
+            "mtu": self._mtu,
+            "source": self._mtu_source,
+            "planner_mtu": self._planner.mtu,
+            "max_write": self._planner.max_write,
+            "segment_payload": self._planner.chunk_size,
+            "ready_handshake": self._ready_skip == 0,
+            "ready_misses": self._ready_misses,
+            "avg_ready_time": round(self._ready_time, 3) if self._ready_time else None,
+        }
+
+    @property
+    def prewarm_stats(self) -> dict[str, Any]:
+        """Return pre-warm counters and the connect time they saved."""
+        return {
+            **self._prewarm_stats,
+            "avg_connect_time": round(self._connect_time, 3) if self._connect_time else None,
+            "time_saved": round(self._prewarm_time_saved, 2),
+        }
+
+    @property
+    def notification_stats(self) -> dict[str, int]:
+        """Return notification reassembly and state decoder counters."""
+        return {**self._reassembler.stats, **self._decoder_stats}
+
+    @property
+    def advertisement_stats(self) -> dict[str, Any]:
+        """Return how many advertisements were parsed or skipped as unchanged."""
+        total = self._adv_stats["parsed"] + self._adv_stats["unchanged"]
+        return {
+            **self._adv_stats,
+            "hit_rate": round(self._adv_stats["unchanged"] / total, 3) if total else None,
+        }
+
+    def expects_command_within(self, seconds: float) -> bool:
+        """Return True if usage history predicts a command within seconds."""
+        return self._idle_policy.expects_command_within(seconds)
+
+    @property
+    def idle_stats(self) -> dict[str, Any]:
+        """Return the adaptive disconnect delay and reconnect statistics."""
+        return self._idle_policy.stats()
+
+    def set_disconnect_policy(self, delay: float, mode: str) -> None:
+        """Update the disconnect delay and how it bounds the learned delay."""
+        self._idle_policy.configured_delay = delay
+        self._idle_policy.mode = mode
 
     @property
     def is_on(self) -> bool | None:
@@ -232,12 +520,12 @@ class LEDNetWFDevice:
         if self._is_iotbt_segment:
             return EffectType.IOTBT_SEGMENT
 
-        val = self._capabilities.get("effect_type", EffectType.NONE)
+        val = self._capabilities.record.effect_type or EffectType.NONE
         return EffectType(val) if isinstance(val, int) else val
 
     @property
-    def effect_list(self) -> list[str]:
-        """Return list of available effects."""
+    def effect_list(self) -> tuple[str, ...]:
+        """Return list of available effects (shared, immutable)."""
         return get_effect_list(
             self.effect_type, self.has_bg_color, self.has_ic_config,
             self.has_builtin_mic, self.has_candle_mode
@@ -246,12 +534,13 @@ class LEDNetWFDevice:
     @property
     def has_rgb(self) -> bool:
         """Return True if device supports RGB."""
-        return bool(self._capabilities.get("has_rgb"))
+        return bool(self._capabilities.record.has_rgb)
 
     @property
     def has_color_temp(self) -> bool:
         """Return True if device supports color temperature."""
-        return bool(self._capabilities.get("has_ww") or self._capabilities.get("has_cw"))
+        record = self._capabilities.record
+        return bool(record.has_ww or record.has_cw)
 
     @property
     def has_effects(self) -> bool:
@@ -261,7 +550,7 @@ class LEDNetWFDevice:
     @property
     def needs_probing(self) -> bool:
         """Return True if device needs capability probing."""
-        return self._capabilities.get("needs_probing", False)
+        return bool(self._capabilities.record.needs_probing)
 
     @property
     def fw_version(self) -> str | None:
@@ -380,7 +669,7 @@ class LEDNetWFDevice:
         These devices use the 0x41 command format which includes both foreground
         and background RGB colors.
         """
-        return bool(self._capabilities.get("has_bg_color"))
+        return bool(self._capabilities.record.has_bg_color)
 
     @property
     def has_ic_config(self) -> bool:
@@ -390,7 +679,7 @@ class LEDNetWFDevice:
         This distinguishes them from 0x56/0x80 devices which also use Symphony
         effect type but have different effect sets.
         """
-        return bool(self._capabilities.get("has_ic_config"))
+        return bool(self._capabilities.record.has_ic_config)
 
     @property
     def has_color_order(self) -> bool:
@@ -399,7 +688,7 @@ class LEDNetWFDevice:
         SIMPLE devices like 0x33 (Ctrl_Mini_RGB) support color order via 0x62 command.
         Color order is stored in byte 4 upper nibble of state response.
         """
-        return bool(self._capabilities.get("has_color_order"))
+        return bool(self._capabilities.record.has_color_order)
 
     @property
     def has_builtin_mic(self) -> bool:
@@ -408,7 +697,7 @@ class LEDNetWFDevice:
         Devices with built-in mic (0x08, 0x48, 0xA2, 0xA3, etc.) support on-device audio processing.
         Sound reactive mode is enabled via 0x73 command.
         """
-        return bool(self._capabilities.get("has_builtin_mic"))
+        return bool(self._capabilities.record.has_builtin_mic)
 
     @property
     def has_candle_mode(self) -> bool:
@@ -416,7 +705,7 @@ class LEDNetWFDevice:
 
         Devices 0x54 and 0x5B support a special candle flicker effect.
         """
-        return bool(self._capabilities.get("has_candle_mode"))
+        return bool(self._capabilities.record.has_candle_mode)
 
     @property
     def uses_0x38_effects(self) -> bool:
@@ -425,7 +714,7 @@ class LEDNetWFDevice:
         Devices 0x54 and 0x5B use 0x38 command format which includes brightness,
         unlike standard SIMPLE devices that use 0x61 format without brightness.
         """
-        return bool(self._capabilities.get("uses_0x38_effects"))
+        return bool(self._capabilities.record.uses_0x38_effects)
 
     @property
     def mic_command_format(self) -> str:
@@ -436,7 +725,7 @@ class LEDNetWFDevice:
 
         Source: protocol_docs/18_sound_reactive_music_mode.md
         """
-        return self._capabilities.get("mic_cmd_format", "simple")
+        return self._capabilities.record.mic_cmd_format or "simple"
 
     @property
     def is_iotbt(self) -> bool:
@@ -452,7 +741,7 @@ class LEDNetWFDevice:
         """
         # Check capabilities for is_iotbt flag (product_id=0x00 has is_iotbt=True)
         # Also check product_id directly for backwards compatibility
-        return self._capabilities.get("is_iotbt", False) or self._product_id == 0x00
+        return bool(self._capabilities.record.is_iotbt) or self._product_id == 0x00
 
     @property
     def is_iotbt_segment(self) -> bool:
@@ -542,8 +831,8 @@ class LEDNetWFDevice:
         if self.effect_type != EffectType.SYMPHONY:
             return False
 
-        from .const import SYMPHONY_SETTLED_EFFECTS
-        return self._effect in SYMPHONY_SETTLED_EFFECTS.values()
+        from .const import SYMPHONY_SETTLED_EFFECT_IDS
+        return self._effect in SYMPHONY_SETTLED_EFFECT_IDS
 
     def register_callback(self, callback_fn: Callable[[], None]) -> None:
         """Register a callback for state updates."""
@@ -562,58 +851,39 @@ class LEDNetWFDevice:
             except Exception as ex:
                 _LOGGER.exception("Error in callback: %s", ex)
 
-    async def _ensure_connected(self) -> BleakClient:
-        """Ensure we have an active BLE connection."""
+    async def _ensure_connected(self, priority: int = PRIORITY_USER) -> BleakClient:
+        """Ensure we have an active BLE connection.
+
+        New connections wait for a slot from the integration-wide connection
+        scheduler; priority decides who goes first when slots are short.
+        """
         if self._disconnect_timer:
             self._disconnect_timer.cancel()
             self._disconnect_timer = None
 
         if self._client and self._client.is_connected:
+            self._scheduler.touch(self)
+            self._use_prewarmed_connection()
             self._schedule_disconnect()
             return self._client
 
         async with self._connect_lock:
             # Check again after acquiring lock
             if self._client and self._client.is_connected:
+                self._use_prewarmed_connection()
                 self._schedule_disconnect()
                 return self._client
 
             _LOGGER.debug("Connecting to %s (%s)", self._name, self._address)
 
             try:
-                # Get BLEDevice from address
-                ble_device: BLEDevice | None = bluetooth.async_ble_device_from_address(
-                    self._hass, self._address
-                )
-                if not ble_device:
-                    raise BleakError(f"Device {self._address} not found")
-
-                # Store for ble_device_callback
-                self._ble_device = ble_device
-
-                # In setup mode, use single attempt for fast failure
-                # In normal mode, use default retries (3) for reliability
-                max_attempts = 1 if self._setup_mode else 3
-
-                self._client = await establish_connection(
-                    BleakClientWithServiceCache,
-                    ble_device,
-                    self._name,
-                    disconnected_callback=self._on_disconnected,
-                    use_services_cache=True,
-                    ble_device_callback=lambda: self._ble_device,
-                    max_attempts=max_attempts,
-                )
+                ble_device = self._get_ble_device()
 
-                # Start notifications
-                await self._client.start_notify(
-                    NOTIFY_CHARACTERISTIC_UUID,
-                    self._on_notification,
+                # Wait for a free connection slot on this adapter
+                await self._scheduler.acquire(
+                    self, adapter_for_device(ble_device), priority
                 )
-
-                # Give BLE stack a moment to register the notification handler
-                await asyncio.sleep(0.1)
-                _LOGGER.debug("Connected and notifications started for %s", self._name)
+                await self._connect(ble_device)
 
             except BleakError as ex:
                 _LOGGER.error("Failed to connect to %s: %s", self._name, ex)
@@ -623,16 +893,233 @@ class LEDNetWFDevice:
         self._schedule_disconnect()
         return self._client
 
+    def _get_ble_device(self) -> BLEDevice:
+        """Look up the current BLEDevice for our address."""
+        ble_device: BLEDevice | None = bluetooth.async_ble_device_from_address(
+            self._hass, self._address
+        )
+        if not ble_device:
+            raise BleakError(f"Device {self._address} not found")
+
+        # Store for ble_device_callback
+        self._ble_device = ble_device
+        return ble_device
+
+    async def _connect(self, ble_device: BLEDevice) -> None:
+        """Open the connection (slot already held) and start notifications."""
+        # In setup mode, use single attempt for fast failure
+        # In normal mode, use default retries (3) for reliability
+        max_attempts = 1 if self._setup_mode else 3
+
+        start = time.monotonic()
+        try:
+            self._client = await establish_connection(
+                BleakClientWithServiceCache,
+                ble_device,
+                self._name,
+                disconnected_callback=self._on_disconnected,
+                use_services_cache=True,
+                ble_device_callback=lambda: self._ble_device,
+                max_attempts=max_attempts,
+            )
+
+            # Start notifications
+            self._reassembler.reset()
+            await self._client.start_notify(
+                NOTIFY_CHARACTERISTIC_UUID,
+                self._on_notification,
+            )
+
+            await self._record_mtu(self._client)
+            if self._ready_skip:
+                # Recent handshakes went unanswered; back off to a fixed delay
+                self._ready_skip -= 1
+                await asyncio.sleep(NOTIFY_SETTLE_DELAY)
+            else:
+                self._ready_pending = True
+        except BaseException:
+            self._scheduler.release(self)
+            raise
+
+        elapsed = time.monotonic() - start
+        self._connect_time = (
+            elapsed if self._connect_time is None
+            else 0.8 * self._connect_time + 0.2 * elapsed
+        )
+        self._idle_policy.record_connect()
+        _LOGGER.debug(
+            "Connected and notifications started for %s in %.2fs", self._name, elapsed
+        )
+
+    async def async_prewarm(self, reason: str) -> bool:
+        """Open the connection ahead of an expected command.
+
+        Only uses a connection slot that is free right now, so pre-warming
+        never delays or evicts another device. Returns True if a connection
+        was opened.
+        """
+        if self._connect_lock.locked() or (self._client and self._client.is_connected):
+            return False
+
+        async with self._connect_lock:
+            if self._client and self._client.is_connected:
+                return False
+            try:
+                ble_device = self._get_ble_device()
+            except BleakError:
+                return False
+            if not self._scheduler.try_acquire(self, adapter_for_device(ble_device)):
+                self._prewarm_stats["skipped_no_slot"] += 1
+                _LOGGER.debug("Not pre-warming %s (%s): no free slot", self._name, reason)
+                return False
+
+            _LOGGER.debug("Pre-warming connection to %s (%s)", self._name, reason)
+            try:
+                await self._connect(ble_device)
+            except BleakError as ex:
+                _LOGGER.debug("Pre-warm connection to %s failed: %s", self._name, ex)
+                self._client = None
+                return False
+
+        self._prewarmed = True
+        self._prewarm_stats["connections"] += 1
+        if self._ready_pending:
+            # Nothing is queued yet, so the handshake goes through the
+            # write queue like any other query
+            self._ready_pending = False
+            start = time.monotonic()
+            reply = await self._request(
+                self._ready_query(), RESPONSE_READY, READY_TIMEOUT
+            )
+            self._record_ready(None if reply is None else time.monotonic() - start)
+        self._schedule_disconnect()
+        return True
+
+    def _use_prewarmed_connection(self) -> None:
+        """Count the connect time saved when a command finds a pre-warmed link."""
+        if not self._prewarmed:
+            return
+        self._prewarmed = False
+        self._prewarm_stats["used"] += 1
+        self._prewarm_time_saved += self._connect_time or 0.0
+
+    def _ready_query(self) -> bytearray:
+        """Return the state query used as the readiness handshake."""
+        if self.is_iotbt:
+            return protocol.build_iotbt_state_query()
+        return protocol.build_state_query()
+
+    async def _ready_handshake(self, client: BleakClient) -> None:
+        """Confirm the notify path works before the first command goes out.
+
+        Runs from the write queue ahead of the first write on a new link
+        (the queue cannot wait on itself, so the query is written directly
+        but with the same sequence numbering and correlation as _request).
+        Only the 0xF0 ACK or the state reply to this query completes it, and
+        that reply is not applied to the device state. A missed handshake
+        falls back to a short fixed settle delay for a few connects and is
+        then tried again.
+        """
+        response = asyncio.get_running_loop().create_future()
+        keys: list[tuple[str, int]] = []
+
+        def _register(seq: int) -> None:
+            key = (RESPONSE_READY, seq)
+            self._pending_responses[key] = response
+            keys.append(key)
+
+        start = time.monotonic()
+        try:
+            await self._write_segments(client, self._ready_query(), False, _register)
+            await asyncio.wait_for(response, timeout=READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._record_ready(None)
+            return
+        finally:
+            for key in keys:
+                self._pending_responses.pop(key, None)
+
+        self._record_ready(time.monotonic() - start)
+
+    def _record_ready(self, elapsed: float | None) -> None:
+        """Record a handshake result; misses back off exponentially."""
+        if elapsed is None:
+            self._ready_misses += 1
+            self._ready_skip = min(2 ** self._ready_misses, READY_MAX_SKIP)
+            _LOGGER.debug(
+                "No reply from %s within %.1fs of connecting, "
+                "using fixed settle delay for the next %d connects",
+                self._name, READY_TIMEOUT, self._ready_skip,
+            )
+            return
+
+        self._ready_misses = 0
+        self._ready_time = (
+            elapsed if self._ready_time is None
+            else 0.8 * self._ready_time + 0.2 * elapsed
+        )
+        _LOGGER.debug("%s ready after %.3fs", self._name, elapsed)
+
+    async def _record_mtu(self, client: BleakClient) -> None:
+        """Record the connection's ATT MTU and size writes to it.
+
+        BlueZ reports the default 23 bytes until the MTU is acquired, so the
+        backend is asked first (ESPHome proxies report the negotiated MTU
+        directly). Only an MTU above the default is trusted for splitting
+        packets; otherwise every packet goes out as a single write, as
+        before MTU-aware writes existed.
+        """
+        backend = getattr(client, "_backend", None)
+        acquire = getattr(backend, "_acquire_mtu", None)
+        if acquire is not None:
+            try:
+                await acquire()
+            except Exception as ex:
+                _LOGGER.debug("Could not acquire MTU for %s: %s", self._name, ex)
+
+        mtu = getattr(client, "mtu_size", 0) or 0
+        if mtu > protocol.DEFAULT_ATT_MTU:
+            self._mtu = mtu
+            self._mtu_source = "negotiated"
+        else:
+            self._mtu = None
+            self._mtu_source = "unknown"
+        self._planner = protocol.PacketPlanner(self._mtu)
+        _LOGGER.debug(
+            "MTU for %s: %s (%s), %s",
+            self._name, self._mtu, self._mtu_source,
+            f"{self._planner.max_write} bytes per write" if self._mtu else "no splitting",
+        )
+
     def _schedule_disconnect(self) -> None:
         """Schedule a disconnection after the delay."""
         if self._disconnect_timer:
             self._disconnect_timer.cancel()
 
+        delay = self._idle_policy.next_delay(self._scheduler.under_pressure(self))
         self._disconnect_timer = self._hass.loop.call_later(
-            self._disconnect_delay,
-            lambda: asyncio.create_task(self._disconnect()),
+            delay, self._on_idle_timeout
         )
 
+    @callback
+    def _on_idle_timeout(self) -> None:
+        """Disconnect after the idle delay expired."""
+        self._disconnect_timer = None
+        asyncio.create_task(self._disconnect_if_idle())
+
+    async def _disconnect_if_idle(self) -> None:
+        """Disconnect unless a command arrived since the disconnect was scheduled.
+
+        Runs as a task after the idle timer or an eviction, so the idle check
+        is repeated here: a write queued in between keeps the connection.
+        """
+        if not self.is_idle:
+            self._scheduler.eviction_declined(self)
+            self._schedule_disconnect()
+            return
+        self._idle_policy.record_idle_disconnect()
+        await self._disconnect()
+
     async def _disconnect(self) -> None:
         """Disconnect from the device."""
         if self._client and self._client.is_connected:
@@ -646,12 +1133,39 @@ class LEDNetWFDevice:
             except BleakError:
                 pass
         self._client = None
+        self._mtu = None
+        self._mtu_source = None
+        self._ready_pending = False
+        # The strip may be changed or power cycled while we are away
+        self._framebuffer.invalidate()
+        if self._prewarmed:
+            self._prewarmed = False
+            self._prewarm_stats["unused"] += 1
+        self._scheduler.release(self)
+
+    @callback
+    def async_evict(self) -> None:
+        """Drop an idle connection so the scheduler can reuse its slot."""
+        if self._disconnect_timer:
+            self._disconnect_timer.cancel()
+        self._on_idle_timeout()
 
     @callback
     def _on_disconnected(self, client: BleakClient) -> None:
         """Handle disconnection."""
         _LOGGER.debug("Disconnected from %s", self._name)
+        if self._client is not None and client is not self._client:
+            return  # Stale callback from a previous connection
         self._client = None
+        self._mtu = None
+        self._mtu_source = None
+        self._ready_pending = False
+        # The strip may be changed or power cycled while we are away
+        self._framebuffer.invalidate()
+        if self._prewarmed:
+            self._prewarmed = False
+            self._prewarm_stats["unused"] += 1
+        self._scheduler.release(self)
 
     def _on_notification(self, sender: int, data: bytearray) -> None:
         """Handle incoming notifications."""
@@ -660,12 +1174,17 @@ class LEDNetWFDevice:
         _LOGGER.debug("Notification from %s (raw %d bytes): %s",
                       self._name, len(data), raw_hex)
 
-        # Unwrap transport layer
-        payload = protocol.unwrap_response(bytes(data))
-        if not payload:
-            _LOGGER.debug("Could not unwrap notification (data too short?)")
-            return
+        # Responses longer than the MTU arrive in several notifications;
+        # only complete transport payloads are handed to the parsers.
+        # Transport header byte 1 carries the sequence number of the request.
+        for seq, payload in self._reassembler.feed(bytes(data)):
+            if not payload:
+                _LOGGER.debug("Empty notification payload from %s", self._name)
+                continue
+            self._handle_payload(seq, payload)
 
+    def _handle_payload(self, seq: int, payload: bytes) -> None:
+        """Parse a complete notification payload and dispatch it."""
         # Check for JSON-wrapped response (starts with '{' = 0x7B)
         # Some devices wrap state responses in JSON: {"code":0,"payload":"hex_string"}
         if payload[0] == 0x7B:  # '{'
@@ -673,6 +1192,13 @@ class LEDNetWFDevice:
             if not payload:
                 return
 
+        # The readiness handshake only needs to know the device answered
+        if self._resolve_ready(seq, payload):
+            return
+
+        # State from the device supersedes the last parsed advertisement
+        self._adv_fingerprint = None
+
         # Format payload as 0xNN
         payload_hex = ' '.join(f'0x{b:02X}' for b in payload)
         _LOGGER.debug("Notification payload (%d bytes): %s", len(payload), payload_hex)
@@ -681,17 +1207,23 @@ class LEDNetWFDevice:
         if len(payload) >= 2 and payload[0] == 0xEA and payload[1] == 0x81:
             # DeviceState2 format (IOTBT devices with firmware >= 11)
             # Magic header 0xEA 0x81, different byte positions than standard 0x81
-            self._parse_device_state2_response(payload)
+            self._framebuffer.observe("state", payload)
+            result = self._parse_device_state2_response(payload)
+            self._resolve_response(RESPONSE_STATE, seq, result)
         elif payload[0] == 0x81:
-            self._parse_state_response(payload)
+            self._framebuffer.observe("state", payload)
+            result = self._parse_state_response(payload)
+            self._resolve_response(RESPONSE_STATE, seq, result)
         elif payload[0] == 0x63:
-            self._parse_led_settings_response(payload)
+            result = self._parse_led_settings_response(payload)
+            self._resolve_response(RESPONSE_LED_SETTINGS, seq, result)
         elif len(payload) >= 2 and payload[0] == 0x00 and payload[1] == 0x63:
             # LED settings response with leading status byte (0x00 = success)
             # Format: [0x00 status] [0x63 type] [data...]
             # Pass from byte 1 onwards so parser sees 0x63 as first byte
             _LOGGER.debug("LED settings response with status byte prefix")
-            self._parse_led_settings_response(payload[1:])
+            result = self._parse_led_settings_response(payload[1:])
+            self._resolve_response(RESPONSE_LED_SETTINGS, seq, result)
         elif len(payload) >= 3 and payload[0] == 0xF0:
             # Command ACK response format: [0xF0] [command_echo] [status] [checksum]
             # 0xF0 = ACK marker, command_echo = the command that was sent,
@@ -706,6 +1238,44 @@ class LEDNetWFDevice:
         else:
             _LOGGER.debug("Unknown notification type: 0x%02X", payload[0])
 
+    def _resolve_ready(self, seq: int, payload: bytes) -> bool:
+        """Complete a pending readiness handshake with its reply.
+
+        Accepts the state reply to the handshake query or a 0xF0 ACK.
+        Returns True if the payload was consumed by the handshake.
+        """
+        if not any(k[0] == RESPONSE_READY for k in self._pending_responses):
+            return False
+        if not (
+            payload[0] in (0x81, 0xF0)
+            or (len(payload) >= 2 and payload[0] == 0xEA and payload[1] == 0x81)
+        ):
+            return False
+        self._resolve_response(RESPONSE_READY, seq, True)
+        return True
+
+    def _resolve_response(self, response_type: str, seq: int, result: Any) -> None:
+        """Hand a parsed response to the request waiting for it.
+
+        Requests are matched by (response type, sequence number). Not every
+        firmware echoes the request's sequence number, so a response without
+        an exact match goes to the oldest outstanding request of that type.
+        """
+        if result is None:
+            return
+
+        future = self._pending_responses.pop((response_type, seq), None)
+        if future is None:
+            key = next(
+                (k for k in self._pending_responses if k[0] == response_type), None
+            )
+            if key is None:
+                return
+            future = self._pending_responses.pop(key)
+
+        if not future.done():
+            future.set_result(result)
+
     def _unwrap_json_payload(self, payload: bytes) -> bytes | None:
         """Extract hex payload from JSON-wrapped notification.
 
@@ -769,7 +1339,7 @@ class LEDNetWFDevice:
             _LOGGER.debug("Quoted hex extraction failed: %s", ex)
             return None
 
-    def _parse_device_state2_response(self, data: bytes) -> None:
+    def _parse_device_state2_response(self, data: bytes) -> dict | None:
         """Parse DeviceState2 format (0xEA 0x81 magic header).
 
         Used by IOTBT devices with firmware >= 11. Different byte positions
@@ -788,7 +1358,7 @@ class LEDNetWFDevice:
         """
         if len(data) < 7:
             _LOGGER.debug("DeviceState2 response too short: %d bytes", len(data))
-            return
+            return None
 
         # Parse DeviceState2 format
         address = ((data[3] << 8) | data[4]) & 0x7FFF
@@ -820,7 +1390,8 @@ class LEDNetWFDevice:
             )
 
         # Store result for probing - DeviceState2 format provides limited info
-        # but we need to populate _last_state_response for probe_capabilities() to work
+        # but we need a full state dict for probe_capabilities() to work
+        self._state_response_time = time.monotonic()
         self._last_state_response = {
             "is_on": is_on,
             "mode": mode,
@@ -840,13 +1411,45 @@ class LEDNetWFDevice:
             "sub_mode": 0,
         }
 
-        # Signal waiting coroutine if any
-        if self._pending_state_response:
-            self._pending_state_response.set()
-
         self._notify_callbacks()
+        return self._last_state_response
+
+    def _decode_state(self, data: bytes) -> dict | None:
+        """Decode a 0x81 frame, preferring the product's compiled decoder.
 
-    def _parse_state_response(self, data: bytes) -> None:
+        Frames with another length or flag bytes than the template (other
+        firmware) go to the hand-written parser; frames that fail the
+        checksum are dropped.
+        """
+        if not self._state_decoder_resolved:
+            caps = self.json_capabilities
+            if caps is not None:
+                self._state_decoder = caps.response_decoders.get(STATE_DP_CODE)
+            self._state_decoder_resolved = True
+
+        decoder = self._state_decoder
+        if decoder is None:
+            return protocol.parse_state_response(data)
+
+        result = decoder.decode_state(data)
+        if result is not None:
+            self._decoder_stats["state_compiled"] += 1
+            return result
+
+        reason = decoder.check(data)
+        key = f"state_rejected_{reason}"
+        self._decoder_stats[key] = self._decoder_stats.get(key, 0) + 1
+        if reason == REJECT_CHECKSUM:
+            _LOGGER.debug("Dropping state frame from %s with bad checksum", self._name)
+            return None
+        _LOGGER.debug(
+            "State frame from %s failed template %s check, using fallback parser",
+            self._name, reason,
+        )
+        self._decoder_stats["state_fallback"] += 1
+        return protocol.parse_state_response(data)
+
+    def _parse_state_response(self, data: bytes) -> dict | None:
         """Parse 0x81 state response.
 
         Brightness handling per mode (from model_0x53.py):
@@ -854,16 +1457,13 @@ class LEDNetWFDevice:
         - White mode: from value1 (byte 5), scaled 0-100 → 0-255
         - Effect mode: from byte 6 (R position), scaled 0-100 → 0-255
         """
-        result = protocol.parse_state_response(data)
+        result = self._decode_state(data)
         if not result:
-            return
+            return None
 
         # Store for probing
         self._last_state_response = result
-
-        # Signal waiting coroutine if any
-        if self._pending_state_response:
-            self._pending_state_response.set()
+        self._state_response_time = time.monotonic()
 
         self._is_on = result["is_on"]
 
@@ -1142,12 +1742,13 @@ class LEDNetWFDevice:
                       self._is_on, self._rgb, self._color_temp_kelvin, self._effect, self._brightness)
 
         self._notify_callbacks()
+        return result
 
-    def _parse_led_settings_response(self, data: bytes) -> None:
+    def _parse_led_settings_response(self, data: bytes) -> dict | None:
         """Parse 0x63 LED settings response."""
         result = protocol.parse_led_settings_response(data)
         if not result:
-            return
+            return None
 
         self._led_count = result["led_count"]
         self._led_type = result["ic_type"]
@@ -1160,9 +1761,13 @@ class LEDNetWFDevice:
             self._led_count, self._segments, self._led_type, self._color_order, self._direction
         )
 
-        # Signal waiting coroutine if any
-        if self._pending_led_settings_response:
-            self._pending_led_settings_response.set()
+        return {
+            "led_count": self._led_count,
+            "ic_type": self._led_type,
+            "color_order": self._color_order,
+            "segments": self._segments,
+            "direction": self._direction,
+        }
 
     def _effect_id_to_name(self, effect_id: int) -> str | None:
         """Convert effect ID to name.
@@ -1222,76 +1827,617 @@ class LEDNetWFDevice:
             return IOTBT_SEGMENT_EFFECTS.get(effect_id)
         return None
 
-    async def _send_command(self, packet: bytearray, with_response: bool = False) -> bool:
-        """Send a command packet to the device.
+    async def _send_command(
+        self,
+        packet: bytearray,
+        with_response: bool = False,
+        coalesce_key: str | None = None,
+        on_seq: Callable[[int], None] | None = None,
+        priority: int = PRIORITY_USER,
+        animation: bool = False,
+        segment_frame: bool = False,
+        query: bool = False,
+    ) -> bool:
+        """Queue a command packet for the device and wait until it is written.
+
+        Writes go out one at a time in submission order. While a write is in
+        flight, a newer command with the same coalesce_key replaces the queued
+        one (moving it to the back of the queue), so dragging a slider only
+        writes the most recent value. Callers whose command was superseded get
+        the result of the write that replaced it.
 
         Args:
             packet: Command packet to send
             with_response: If True, wait for BLE acknowledgement (slower).
                           Default False for faster writes like the old integration.
+            coalesce_key: Command kind (COALESCE_*) for latest-wins merging,
+                          or None to always send this packet.
+            on_seq: Called with the transport sequence number just before
+                    the packet is written (used to correlate responses).
+            priority: Connection scheduler priority (PRIORITY_*) used if
+                      the write has to open a new connection.
+            animation: Sent by the host-side animation itself; any other
+                       command cancels a running animation.
+            segment_frame: Part of a frame tracked by the segment framebuffer
+                           (set_segment_colors), which commits it itself.
+            query: Read-only query; it leaves transitions and the state
+                   caches alone.
         """
+        waiter = asyncio.get_running_loop().create_future()
+        key = coalesce_key if coalesce_key is not None else next(self._write_ids)
+
+        self._idle_policy.record_command()
+
+        # Anything other than a query changes device state
+        if not query:
+            if not animation:
+                self.cancel_transition()
+            self._state_response_time = None
+            self._adv_fingerprint = None
+            if not segment_frame:
+                self._framebuffer.invalidate()
+
+        waiters = [waiter]
+        superseded = self._write_queue.pop(key, None)
+        if superseded is not None:
+            self._writes_dropped += 1
+            waiters[:0] = superseded.waiters
+            _LOGGER.debug("Dropping superseded %s command for %s", key, self._name)
+        self._write_queue[key] = _QueuedWrite(
+            packet, with_response, waiters, on_seq, priority
+        )
+
+        if self._write_task is None or self._write_task.done():
+            self._write_task = asyncio.create_task(self._process_write_queue())
+
+        return await waiter
+
+    async def _process_write_queue(self) -> None:
+        """Write queued packets in order until the queue is empty."""
+        while self._write_queue:
+            key = next(iter(self._write_queue))
+            queued = self._write_queue.pop(key)
+
+            self._write_in_flight = True
+            try:
+                result = await self._write_packet(
+                    queued.packet, queued.with_response, queued.on_seq, queued.priority
+                )
+            except asyncio.CancelledError:
+                for waiter in queued.waiters:
+                    if not waiter.done():
+                        waiter.set_result(False)
+                raise
+            except Exception as ex:
+                for waiter in queued.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(ex)
+                continue
+            finally:
+                self._write_in_flight = False
+
+            # Resolve in submission order so the newest caller updates state last
+            for waiter in queued.waiters:
+                if not waiter.done():
+                    waiter.set_result(result)
+
+            # Give superseding commands a moment to collapse before the next write
+            if self._write_queue and self._flush_window > 0:
+                await asyncio.sleep(self._flush_window)
+
+        self._scheduler.device_idle(self)
+
+    async def _write_packet(
+        self,
+        packet: bytearray,
+        with_response: bool,
+        on_seq: Callable[[int], None] | None = None,
+        priority: int = PRIORITY_USER,
+    ) -> bool:
+        """Write a single packet to the device."""
         try:
-            client = await self._ensure_connected()
+            client = await self._ensure_connected(priority)
+            if self._ready_pending:
+                self._ready_pending = False
+                await self._ready_handshake(client)
 
-            # Update sequence number in packet
-            self._seq = (self._seq + 1) % 256
-            packet[1] = self._seq
+            await self._write_segments(client, packet, with_response, on_seq)
+            return True
 
-            # Format as 0xNN for debugging
-            pkt_hex = ' '.join(f'0x{b:02X}' for b in packet)
-            _LOGGER.debug("Sending to %s: %s", self._name, pkt_hex)
+        except BleakError as ex:
+            _LOGGER.error("Failed to send command to %s: %s", self._name, ex)
+            return False
 
+    async def _write_segments(
+        self,
+        client: BleakClient,
+        packet: bytearray,
+        with_response: bool,
+        on_seq: Callable[[int], None] | None,
+    ) -> None:
+        """Number a packet and write it to the connected client."""
+        # Update sequence number in packet
+        self._seq = (self._seq + 1) % 256
+        packet[1] = self._seq
+        if on_seq is not None:
+            on_seq(self._seq)
+
+        # Format as 0xNN for debugging
+        pkt_hex = ' '.join(f'0x{b:02X}' for b in packet)
+        _LOGGER.debug("Sending to %s: %s", self._name, pkt_hex)
+
+        # Split payloads larger than one ATT write into transport segments
+        segments = self._planner.split(packet)
+        if len(segments) > 1:
+            _LOGGER.debug(
+                "Splitting %d-byte packet for %s into %d segments (MTU %d)",
+                len(packet), self._name, len(segments), self._planner.mtu,
+            )
+        for segment in segments:
             await client.write_gatt_char(
                 WRITE_CHARACTERISTIC_UUID,
-                packet,
+                segment,
                 response=with_response,
             )
-            return True
+            self._gatt_writes += 1
+        self._writes_sent += 1
 
-        except BleakError as ex:
-            _LOGGER.error("Failed to send command to %s: %s", self._name, ex)
-            return False
+    async def _request(
+        self,
+        packet: bytearray,
+        response_type: str,
+        timeout: float,
+        priority: int = PRIORITY_BACKGROUND,
+    ) -> Any | None:
+        """Send a query and wait for its correlated response.
+
+        Each request gets its own future in the correlation table, so state,
+        LED settings and mic info queries can be in flight at the same time.
+
+        Args:
+            packet: Query packet to send
+            response_type: Expected response type (RESPONSE_*)
+            timeout: Maximum seconds to wait for the response
+            priority: Connection scheduler priority (queries are background
+                      work unless the caller says otherwise)
+
+        Returns:
+            Parsed response, or None if timeout/error
+        """
+        response = asyncio.get_running_loop().create_future()
+        keys: list[tuple[str, int]] = []
+
+        def _register(seq: int) -> None:
+            key = (response_type, seq)
+            self._pending_responses[key] = response
+            keys.append(key)
+
+        try:
+            if not await self._send_command(
+                packet, on_seq=_register, priority=priority, query=True
+            ):
+                return None
+            return await asyncio.wait_for(response, timeout=timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.debug("%s query timeout for %s", response_type, self._name)
+            return None
+        finally:
+            for key in keys:
+                if self._pending_responses.get(key) is response:
+                    del self._pending_responses[key]
+            if self.is_idle:
+                self._scheduler.device_idle(self)
 
     # ----- Public command methods -----
 
-    async def turn_on(self) -> bool:
-        """Turn on the device."""
+    async def _send_power(self, turn_on: bool, animation: bool = False) -> bool:
+        """Send a power packet and record the new state without notifying."""
         if self.is_iotbt_segment:
             # IOTBT segment-based variant uses standard 0x3B power command
-            packet = protocol.build_power_command_0x3B(turn_on=True)
+            packet = protocol.build_power_command_0x3B(turn_on=turn_on)
         elif self.is_iotbt:
             # Standard IOTBT devices use 0x71 power command format
-            packet = protocol.build_iotbt_power_command(turn_on=True)
+            packet = protocol.build_iotbt_power_command(turn_on=turn_on)
         else:
-            packet = protocol.build_power_command_0x3B(turn_on=True)
-        if await self._send_command(packet):
-            self._is_on = True
+            packet = protocol.build_power_command_0x3B(turn_on=turn_on)
+        if await self._send_command(packet, animation=animation):
+            self._is_on = turn_on
+            return True
+        return False
+
+    async def turn_on(self) -> bool:
+        """Turn on the device."""
+        if await self._send_power(True):
             self._notify_callbacks()
             return True
         return False
 
-    async def turn_off(self) -> bool:
-        """Turn off the device."""
-        if self.is_iotbt_segment:
-            # IOTBT segment-based variant uses standard 0x3B power command
-            packet = protocol.build_power_command_0x3B(turn_on=False)
-        elif self.is_iotbt:
-            # Standard IOTBT devices use 0x71 power command format
-            packet = protocol.build_iotbt_power_command(turn_on=False)
-        else:
-            packet = protocol.build_power_command_0x3B(turn_on=False)
-        if await self._send_command(packet):
-            self._is_on = False
+    async def turn_off(self, transition: float | None = None) -> bool:
+        """Turn off the device, fading out over transition seconds if given."""
+        self.cancel_transition()
+        if transition and self._is_on:
+            fade = self._fade_method(transition)
+            if fade == FADE_DEVICE:
+                return await self._send_device_fade(False, None, transition)
+            if fade == FADE_HOST:
+                self._start_host_fade(
+                    self._action_frame(*self._current_action(), 0), transition
+                )
+                return True
+        if await self._send_power(False):
             self._notify_callbacks()
             return True
         return False
 
-    async def set_rgb_color(self, rgb: tuple[int, int, int], brightness: int = 255) -> bool:
+    @property
+    def supports_transitions(self) -> bool:
+        """Return True if power and brightness changes can fade."""
+        return self._supports_device_fades or self.has_rgb or self.has_color_temp
+
+    @property
+    def _supports_device_fades(self) -> bool:
+        """Return True if the firmware fades power and brightness itself."""
+        return (
+            not self.is_iotbt
+            and self.supports_datadriven_function("switch_led_v2")
+            and self.supports_datadriven_function("bright_value_v2")
+        )
+
+    def _fade_method(self, transition: float) -> str | None:
+        """Pick FADE_DEVICE or FADE_HOST for a transition, or None if neither.
+
+        Host fades need the current mode to resend at each brightness step.
+        """
+        if transition * 1000 <= MAX_DEVICE_FADE_MS and self._supports_device_fades:
+            return FADE_DEVICE
+        if self._current_action() is not None:
+            return FADE_HOST
+        return None
+
+    def _current_action(self) -> tuple[str, Any, int | None] | None:
+        """Return the (PLAN_*, value, speed) that resends the current mode."""
+        if self._effect == "Sound Reactive":
+            # Sound reactive output follows the microphone, not a brightness
+            return None
+        if self._effect:
+            return PLAN_EFFECT, self._effect, self._effect_speed
+        if self._color_temp_kelvin and self.has_color_temp:
+            return PLAN_CCT, self._color_temp_kelvin, None
+        if self._rgb and self.has_rgb:
+            return PLAN_RGB, self._rgb, None
+        return None
+
+    @staticmethod
+    def _action_frame(
+        action: str, value: Any, speed: int | None, brightness: int
+    ) -> LightFrame:
+        """Return the animation frame that shows a PLAN_* value."""
+        if action == PLAN_EFFECT:
+            return LightFrame(brightness, effect=value, speed=speed)
+        if action == PLAN_CCT:
+            return LightFrame(brightness, kelvin=value)
+        return LightFrame(brightness, rgb=value)
+
+    def _host_fade_action(
+        self, rgb: tuple[int, int, int] | None, color_temp_kelvin: int | None
+    ) -> tuple[str, Any, int | None] | None:
+        """Return the action for a host-animated color or white change.
+
+        Only firmware without device-side fades is animated, and only from
+        a plain color or white state: effects are replaced at once.
+        """
+        if self._supports_device_fades or self._effect is not None:
+            return None
+        if color_temp_kelvin is not None:
+            return (PLAN_CCT, color_temp_kelvin, None) if self.has_color_temp else None
+        return (PLAN_RGB, rgb, None) if self.has_rgb else None
+
+    def cancel_transition(self) -> None:
+        """Stop a running host-side animation; a new command replaces it.
+
+        Called by _send_command for every command the animation did not
+        send itself.
+        """
+        self._animation.cancel()
+
+    def _action_powers_on(self, action: str, brightness: int) -> bool:
+        """Return True if the action's packet also switches the light on.
+
+        0x3B color (0xA1) and CCT (0xB1) frames carry the output mode in the
+        same byte as the power frames (0x23/0x24), so a non-zero color or
+        white frame leaves the light on. The 0x31, IOTBT and effect commands
+        do not, and neither does the 0x41 frame used in Settled effects.
+        """
+        if brightness <= 0 or self.is_iotbt or self.effect_type == EffectType.SIMPLE:
+            return False
+        if action == PLAN_RGB:
+            return self.has_rgb and not self.is_in_settled_effect()
+        if action == PLAN_CCT:
+            return self.has_color_temp
+        return False
+
+    def plan_turn_on(
+        self,
+        rgb: tuple[int, int, int] | None = None,
+        color_temp_kelvin: int | None = None,
+        effect: str | None = None,
+        brightness: int | None = None,
+        transition: float | None = None,
+    ) -> TurnOnPlan:
+        """Plan the fewest packets that reach the requested on-state.
+
+        An effect wins over color temperature, which wins over RGB. With
+        only a brightness the current effect, white or color is resent at
+        that brightness. A power packet is planned while the light is not
+        known to be on, unless the value packet switches it on by itself.
+
+        A transition fades power and brightness changes: in one packet each
+        on firmware with switch_led_v2/bright_value_v2, otherwise by
+        animating from the host. Without device-side fades, color and white
+        changes are animated too; effect changes are applied at once.
+        """
+        power = not self._is_on
+        if brightness is None and power and self._faded_off:
+            # Restore the brightness the host fade stepped down from
+            brightness = self._brightness
+        if transition and not effect:
+            fade = host_action = None
+            if rgb is None and color_temp_kelvin is None:
+                fade = self._fade_method(transition)
+                if fade == FADE_DEVICE:
+                    return TurnOnPlan(
+                        power, brightness=brightness, fade=fade, transition=transition
+                    )
+                if fade == FADE_HOST:
+                    host_action = self._current_action()
+            else:
+                host_action = self._host_fade_action(rgb, color_temp_kelvin)
+            if host_action is not None:
+                action, value, speed = host_action
+                fused = power and self._action_powers_on(action, 1)
+                return TurnOnPlan(
+                    power and not fused, action, value,
+                    brightness or self._brightness or 255, speed,
+                    fused=fused, fade=FADE_HOST, transition=transition,
+                )
+
+        level = brightness
+        if level is None:
+            level = self._brightness or 255
+
+        if effect:
+            plan = TurnOnPlan(power, PLAN_EFFECT, effect)
+        elif color_temp_kelvin is not None:
+            plan = TurnOnPlan(power, PLAN_CCT, color_temp_kelvin, level)
+        elif rgb is not None:
+            plan = TurnOnPlan(power, PLAN_RGB, rgb, level)
+        elif brightness is not None and self._effect:
+            plan = TurnOnPlan(
+                power, PLAN_EFFECT, self._effect, brightness, self._effect_speed
+            )
+        elif brightness is not None and self._color_temp_kelvin and self.has_color_temp:
+            plan = TurnOnPlan(power, PLAN_CCT, self._color_temp_kelvin, brightness)
+        elif brightness is not None and self._rgb and self.has_rgb:
+            plan = TurnOnPlan(power, PLAN_RGB, self._rgb, brightness)
+        else:
+            plan = TurnOnPlan(power)
+
+        if power and plan.action and self._action_powers_on(plan.action, plan.brightness or 0):
+            plan = TurnOnPlan(
+                False, plan.action, plan.value, plan.brightness, plan.speed, fused=True
+            )
+        return plan
+
+    async def apply_turn_on(self, plan: TurnOnPlan) -> bool:
+        """Send a turn-on plan; callbacks are notified once for the whole plan."""
+        self.cancel_transition()
+        self._faded_off = False
+        self._turn_on_plans += 1
+        self._turn_on_writes_saved += plan.writes_saved
+        _LOGGER.debug(
+            "Turn on %s: %s, %d write(s), %d saved, fade=%s",
+            self._name, plan.action or "power", plan.writes, plan.writes_saved,
+            plan.fade,
+        )
+
+        if plan.fade == FADE_DEVICE:
+            return await self._send_device_fade(
+                True if plan.power else None, plan.brightness, plan.transition
+            )
+
+        if plan.fade == FADE_HOST:
+            end = self._action_frame(plan.action, plan.value, plan.speed, plan.brightness)
+            if plan.power:
+                # Load the first frame while still off, so power on does not
+                # flash the old color before the fade starts
+                await self._send_animation_frame(replace(end, brightness=0))
+                if not await self._send_power(True):
+                    return False
+            elif plan.fused:
+                # The first frame switches the light on
+                self._is_on = True
+            self._start_host_fade(end, plan.transition, from_off=plan.power or plan.fused)
+            return True
+
+        powered = plan.power and await self._send_power(True)
+        if await self._send_action(
+            plan.action, plan.value, plan.brightness, plan.speed, plan.fused
+        ):
+            return True
+
+        # Power only, or the value command failed after powering on
+        if powered:
+            self._notify_callbacks()
+        return powered
+
+    async def _send_action(
+        self,
+        action: str | None,
+        value: Any,
+        brightness: int | None,
+        speed: int | None = None,
+        power_on: bool = False,
+    ) -> bool:
+        """Send a PLAN_* value command; False if there is none or it failed."""
+        if action == PLAN_EFFECT:
+            return await self.set_effect(value, speed=speed, brightness=brightness)
+        if action == PLAN_CCT:
+            return await self.set_color_temp(value, brightness, power_on=power_on)
+        if action == PLAN_RGB:
+            return await self.set_rgb_color(value, brightness, power_on=power_on)
+        return False
+
+    async def _send_device_fade(
+        self, power: bool | None, brightness: int | None, transition: float
+    ) -> bool:
+        """Fade power and/or brightness on the device with one packet each.
+
+        Args:
+            power: True/False to fade on/off with switch_led_v2, None to leave
+            brightness: Target brightness 0-255 for bright_value_v2, or None
+            transition: Fade time in seconds
+        """
+        fade_ms = min(MAX_DEVICE_FADE_MS, round(transition * 1000))
+        sent = False
+        if power is not None:
+            packet = self._build_fade_packet(
+                "switch_led_v2", {"open": 0x23 if power else 0x24}, fade_ms
+            )
+            if packet is not None and await self._send_command(packet):
+                self._is_on = power
+                sent = True
+        if brightness is not None:
+            brightness_pct = max(1, round(brightness * 100 / 255)) if brightness > 0 else 0
+            packet = self._build_fade_packet(
+                "bright_value_v2", {"value": brightness_pct}, fade_ms
+            )
+            if packet is not None and await self._send_command(packet):
+                self._brightness = brightness
+                sent = True
+        if sent:
+            self._transition_stats["device_fades"] += 1
+            self._notify_callbacks()
+        return sent
+
+    def _build_fade_packet(
+        self, function_code: str, params: dict[str, int], fade_ms: int
+    ) -> bytearray | None:
+        """Build a switch_led_v2 / bright_value_v2 packet with a fade time."""
+        try:
+            if function_code == "bright_value_v2":
+                raw_cmd = build_brightness_command(
+                    self._product_id, self.device_version, params["value"],
+                    fade_ms, effective=self.effective_capabilities,
+                )
+            else:
+                raw_cmd = build_command(
+                    self._product_id,
+                    function_code,
+                    {**params, **fade_params(self._product_id, function_code, fade_ms)},
+                    self.device_version,
+                )
+        except CommandBuildError as ex:
+            _LOGGER.debug("Cannot build %s fade for %s: %s", function_code, self._name, ex)
+            return None
+        if not raw_cmd:
+            return None
+        return protocol.wrap_command(raw_cmd, cmd_family=0x0b)
+
+    def _start_host_fade(
+        self, end: LightFrame, transition: float, from_off: bool = False
+    ) -> None:
+        """Animate from the current state to end in the background.
+
+        The device state is set to end (and callbacks notified) at once; the
+        frames in between are not reported. An end brightness of 0 finishes
+        with a power off. Cancelled by the next command.
+        """
+        current = self._current_action()
+        if from_off or current is None:
+            # Fade in from black in the target mode
+            start = replace(end, brightness=0)
+        else:
+            start = self._action_frame(*current, self._brightness)
+        self._transition_stats["host_fades"] += 1
+
+        on_finish = None
+        if end.brightness == 0:
+            level = self._brightness
+
+            async def on_finish() -> None:
+                if await self._send_power(False, animation=True):
+                    # Remember the level the fade started from for the next turn on
+                    self._brightness = level
+                    self._faded_off = True
+                    self._notify_callbacks()
+        else:
+            self._record_frame(end)
+            self._notify_callbacks()
+        self._animation.start(start, end, transition, on_finish)
+
+    def _record_frame(self, frame: LightFrame) -> None:
+        """Make frame the device's known mode and brightness."""
+        self._brightness = frame.brightness
+        if frame.effect is not None:
+            self._effect = frame.effect
+            if frame.speed is not None:
+                self._effect_speed = frame.speed
+        elif frame.kelvin is not None:
+            self._color_temp_kelvin = frame.kelvin
+            self._effect = None
+            self._rgb = None
+        elif frame.rgb is not None:
+            self._rgb = frame.rgb
+            self._effect = None
+            self._color_temp_kelvin = None
+
+    async def _send_animation_frame(self, frame: LightFrame) -> bool:
+        """Write one animation frame without touching state or callbacks."""
+        # Never send 0: that would switch 0x3B devices off mid-fade
+        brightness = max(1, frame.brightness)
+        if frame.effect is not None:
+            packet = self._build_effect_frame_packet(frame.effect, frame.speed, brightness)
+            coalesce_key = COALESCE_EFFECT
+        elif frame.kelvin is not None:
+            packet = self._build_cct_packet(frame.kelvin, brightness)
+            coalesce_key = COALESCE_CCT
+        elif frame.rgb is not None:
+            packet = self._build_color_packet(frame.rgb, brightness)
+            coalesce_key = COALESCE_COLOR
+        else:
+            return False
+        if packet is None:
+            return False
+        return await self._send_command(
+            packet, coalesce_key=coalesce_key, animation=True
+        )
+
+    def _build_effect_frame_packet(
+        self, effect_name: str, speed: int | None, brightness: int
+    ) -> bytearray | None:
+        """Build the packet that shows an effect at brightness (0-255)."""
+        effect_id = get_effect_id(
+            effect_name, self.effect_type, self.has_bg_color, self.has_ic_config,
+            self.has_builtin_mic, self.has_candle_mode
+        )
+        if speed is None:
+            speed = self._effect_speed if self._effect_speed > 0 else 50
+        if effect_id is None or effect_id == SOUND_REACTIVE_MARKER:
+            return None
+        if effect_id == CANDLE_MODE_MARKER:
+            return self._build_candle_packet(speed, brightness)
+        return self._build_effect_packet(effect_id, speed, brightness)
+
+    async def set_rgb_color(
+        self, rgb: tuple[int, int, int], brightness: int = 255, power_on: bool = False
+    ) -> bool:
         """Set RGB color.
 
         Args:
             rgb: Tuple of (R, G, B) values 0-255
             brightness: Brightness 0-255
+            power_on: The color packet also switches the light on (see
+                      plan_turn_on); record the light as on once it is sent
 
         For devices in Settled Mode effects (Symphony has_ic_config), changing color
         updates the foreground color via 0x41 command while staying in the effect.
@@ -1309,15 +2455,9 @@ class LEDNetWFDevice:
         # If so, update FG color via 0x41 command with the current effect_id
         if self.is_in_settled_effect():
             # Get the actual effect_id from the current effect name
-            from .const import SYMPHONY_SETTLED_EFFECTS
-            effect_id = None
-            for eid, name in SYMPHONY_SETTLED_EFFECTS.items():
-                if name == self._effect:
-                    effect_id = eid
-                    break
-
-            if effect_id is None:
-                effect_id = 1  # Fallback to Solid Color
+            from .const import SYMPHONY_SETTLED_EFFECT_IDS
+            # Fallback to Solid Color
+            effect_id = SYMPHONY_SETTLED_EFFECT_IDS.get(self._effect, 1)
 
             # Scale FG color by brightness
             scale = brightness / 255.0
@@ -1347,7 +2487,7 @@ class LEDNetWFDevice:
                 self._effect, effect_id, fg_rgb, bg_rgb, self._effect_speed
             )
 
-            if await self._send_command(packet):
+            if await self._send_command(packet, coalesce_key=COALESCE_COLOR):
                 self._rgb = rgb
                 self._brightness = brightness
                 # Keep self._effect - stay in current effect mode
@@ -1357,6 +2497,22 @@ class LEDNetWFDevice:
             return False
 
         # Standard color command (exits effect mode)
+        packet = self._build_color_packet(rgb, brightness)
+        if await self._send_command(packet, coalesce_key=COALESCE_COLOR):
+            if power_on:
+                self._is_on = True
+            self._rgb = rgb
+            self._brightness = brightness
+            self._effect = None  # Clear effect when setting color
+            self._color_temp_kelvin = None
+            self._notify_callbacks()
+            return True
+        return False
+
+    def _build_color_packet(
+        self, rgb: tuple[int, int, int], brightness: int
+    ) -> bytearray:
+        """Build the color packet that leaves any effect, for set_rgb_color."""
         eff_type = self.effect_type
         if self.is_iotbt_segment:
             # IOTBT segment-based variant uses 0xE1 0x03 command with segment HSB data
@@ -1405,22 +2561,18 @@ class LEDNetWFDevice:
             packet = protocol.build_color_command_0x3B(
                 rgb[0], rgb[1], rgb[2], brightness_pct
             )
+        return packet
 
-        if await self._send_command(packet):
-            self._rgb = rgb
-            self._brightness = brightness
-            self._effect = None  # Clear effect when setting color
-            self._color_temp_kelvin = None
-            self._notify_callbacks()
-            return True
-        return False
-
-    async def set_color_temp(self, kelvin: int, brightness: int = 255) -> bool:
+    async def set_color_temp(
+        self, kelvin: int, brightness: int = 255, power_on: bool = False
+    ) -> bool:
         """Set color temperature.
 
         Args:
             kelvin: Color temperature in Kelvin (2700-6500)
             brightness: Brightness 0-255
+            power_on: The CCT packet also switches the light on (see
+                      plan_turn_on); record the light as on once it is sent
         """
         if not self.has_color_temp:
             _LOGGER.warning("Device %s does not support color temperature", self._name)
@@ -1430,8 +2582,23 @@ class LEDNetWFDevice:
         if self._effect == "Sound Reactive" and self.has_builtin_mic:
             await self.set_sound_reactive(enable=False)
 
-        eff_type = self.effect_type
         kelvin = max(MIN_KELVIN, min(MAX_KELVIN, kelvin))
+        packet = self._build_cct_packet(kelvin, brightness)
+
+        if await self._send_command(packet, coalesce_key=COALESCE_CCT):
+            if power_on:
+                self._is_on = True
+            self._color_temp_kelvin = kelvin
+            self._brightness = brightness
+            self._effect = None
+            self._rgb = None
+            self._notify_callbacks()
+            return True
+        return False
+
+    def _build_cct_packet(self, kelvin: int, brightness: int) -> bytearray:
+        """Build the white packet for a clamped Kelvin value, for set_color_temp."""
+        eff_type = self.effect_type
 
         if eff_type == EffectType.SIMPLE:
             # SIMPLE devices use 0x31 command format with WW/CW channels
@@ -1453,15 +2620,7 @@ class LEDNetWFDevice:
             packet = protocol.build_cct_command_0x3B(temp_pct, brightness_pct)
             _LOGGER.debug("Setting CCT: kelvin=%d, temp_pct=%d%% (0=warm, 100=cool), brightness_pct=%d%%",
                           kelvin, temp_pct, brightness_pct)
-
-        if await self._send_command(packet):
-            self._color_temp_kelvin = kelvin
-            self._brightness = brightness
-            self._effect = None
-            self._rgb = None
-            self._notify_callbacks()
-            return True
-        return False
+        return packet
 
     async def set_effect(
         self, effect_name: str, speed: int | None = None, brightness: int | None = None
@@ -1511,6 +2670,34 @@ class LEDNetWFDevice:
         if brightness <= 0:
             brightness = 255  # Default to full brightness
 
+        packet = self._build_effect_packet(effect_id, speed, brightness)
+        if packet is None:
+            return False
+
+        _LOGGER.debug(
+            "Setting effect: %s (id=%d), speed=%d, brightness=%d (effect_type=%s)",
+            effect_name, effect_id, speed, brightness, eff_type.name
+        )
+
+        if await self._send_command(packet, coalesce_key=COALESCE_EFFECT):
+            self._effect = effect_name
+            self._effect_speed = speed
+            self._brightness = brightness
+            self._notify_callbacks()
+            return True
+        return False
+
+    def _build_effect_packet(
+        self, effect_id: int, speed: int, brightness: int
+    ) -> bytearray | None:
+        """Build an effect packet, for set_effect.
+
+        Args:
+            effect_id: Effect ID from get_effect_id (not a *_MARKER)
+            speed: Effect speed 0-100
+            brightness: Brightness 1-255
+        """
+        eff_type = self.effect_type
         # Convert brightness from 0-255 to 0-100 for protocol
         brightness_pct = max(1, round(brightness * 100 / 255))
 
@@ -1566,21 +2753,7 @@ class LEDNetWFDevice:
                 bg_rgb=bg_rgb,
                 uses_0x38_effects=self.uses_0x38_effects,
             )
-        if packet is None:
-            return False
-
-        _LOGGER.debug(
-            "Setting effect: %s (id=%d), speed=%d, brightness=%d%% (effect_type=%s)",
-            effect_name, effect_id, speed, brightness_pct, eff_type.name
-        )
-
-        if await self._send_command(packet):
-            self._effect = effect_name
-            self._effect_speed = speed
-            self._brightness = brightness
-            self._notify_callbacks()
-            return True
-        return False
+        return packet
 
     async def set_effect_speed(self, speed: int) -> bool:
         """Set effect speed (0-100).
@@ -1621,11 +2794,8 @@ class LEDNetWFDevice:
         # Get the actual effect_id from the current effect name
         effect_id = None
         if self.is_in_settled_effect():
-            from .const import SYMPHONY_SETTLED_EFFECTS
-            for eid, name in SYMPHONY_SETTLED_EFFECTS.items():
-                if name == self._effect:
-                    effect_id = eid
-                    break
+            from .const import SYMPHONY_SETTLED_EFFECT_IDS
+            effect_id = SYMPHONY_SETTLED_EFFECT_IDS.get(self._effect)
         if effect_id is None:
             # Fallback: try to extract from effect name like "Static Effect 3"
             if self._effect and self._effect.startswith("Static Effect "):
@@ -1667,13 +2837,112 @@ class LEDNetWFDevice:
             fg_rgb[0], fg_rgb[1], fg_rgb[2],
         )
 
-        if await self._send_command(packet):
+        if await self._send_command(packet, coalesce_key=COALESCE_BG_COLOR):
             self._bg_rgb = rgb
             self._bg_brightness = brightness
             self._notify_callbacks()
             return True
         return False
 
+    @property
+    def supports_segment_colors(self) -> bool:
+        """Return True if each segment's color can be set (IOTBT segment variant)."""
+        return self.is_iotbt_segment
+
+    @property
+    def supports_segment_deltas(self) -> bool:
+        """Return True if partial 0xE1 0x03 updates are enabled.
+
+        Either the product is confirmed to honour the start index, or the
+        user opted in with the segment_deltas option.
+        """
+        return self._segment_deltas or self._product_id in SEGMENT_DELTA_PRODUCTS
+
+    def set_segment_deltas(self, enabled: bool) -> None:
+        """Enable or disable partial segment updates (segment_deltas option)."""
+        self._segment_deltas = enabled
+
+    async def set_segment_colors(
+        self, colors: list[tuple[int, int, int]], brightness: int | None = None
+    ) -> bool:
+        """Set one RGB color per segment, starting at the first segment.
+
+        Changed frames go out as one full 0xE1 0x03 frame; a frame equal to
+        the last one is not sent at all. With the segment_deltas option (or
+        for products in SEGMENT_DELTA_PRODUCTS) only the changed runs of
+        segments are sent instead (see framebuffer.py). Long packets are
+        split by the transport.
+
+        Args:
+            colors: (R, G, B) 0-255 for each segment
+            brightness: Brightness 0-255 (or None to use current)
+        """
+        if not self.supports_segment_colors:
+            _LOGGER.warning("Device %s does not support segment colors", self._name)
+            return False
+        if not colors:
+            return False
+
+        self.cancel_transition()
+        if brightness is None:
+            brightness = self._brightness or 255
+        brightness_pct = max(1, round(brightness * 100 / 255)) if brightness > 0 else 0
+        count = min(len(colors), 255)
+        records = b"".join(
+            protocol.encode_iotbt_segment(r, g, b, brightness_pct)
+            for r, g, b in colors[:count]
+        )
+
+        updates = self._framebuffer.encode(
+            records, self._planner, self.supports_segment_deltas
+        )
+        generation = self._framebuffer.generation
+        if not updates:
+            return True
+        _LOGGER.debug(
+            "Setting %d segments for %s in %d packet(s), brightness=%d%%",
+            count, self._name, len(updates), brightness_pct
+        )
+
+        # Queue every packet before the first write so they go out back to back
+        results = await asyncio.gather(*(
+            self._send_command(
+                protocol.build_iotbt_segment_records_command(chunk, count, start),
+                segment_frame=True,
+            )
+            for start, chunk in updates
+        ))
+        if all(results):
+            self._framebuffer.sent(records, updates, self._planner)
+            # Another command may have changed the strip while these were queued
+            self._framebuffer.commit(records, generation)
+            # No single color describes the strip any more
+            self._rgb = None
+            self._brightness = brightness
+            self._effect = None
+            self._color_temp_kelvin = None
+            self._notify_callbacks()
+            return True
+        return False
+
+    async def set_segment_gradient(
+        self,
+        stops: list[tuple[int, int, int]],
+        segments: int | None = None,
+        brightness: int | None = None,
+    ) -> bool:
+        """Spread color stops evenly over the segments (see set_segment_colors).
+
+        Args:
+            stops: Two or more (R, G, B) colors, first to last segment
+            segments: Number of segments (or None for the strip's count)
+            brightness: Brightness 0-255 (or None to use current)
+        """
+        count = segments or self._segments or IOTBT_SEGMENT_COUNT
+        return await self.set_segment_colors(
+            protocol.segment_gradient(stops, count), brightness
+        )
+
     async def query_state(self) -> bool:
         """Query current device state."""
         if self.is_iotbt:
@@ -1681,7 +2950,7 @@ class LEDNetWFDevice:
             packet = protocol.build_iotbt_state_query()
         else:
             packet = protocol.build_state_query()
-        return await self._send_command(packet)
+        return await self._send_command(packet, query=True)
 
     async def query_state_and_wait(self, timeout: float = 3.0) -> dict | None:
         """Query device state and wait for response.
@@ -1690,18 +2959,42 @@ class LEDNetWFDevice:
         handler will update all internal state (is_on, brightness, rgb, effect,
         color_order, etc.) when the response is received.
 
+        Concurrent callers share one in-flight query, which waits up to
+        STATE_QUERY_TIMEOUT for the reply; each caller stops waiting after
+        its own timeout. A response received within the freshness TTL (and
+        not followed by a command) is returned from memory without touching
+        the radio. Every caller gets its own copy of the result.
+
         Args:
             timeout: Maximum seconds to wait for response
 
         Returns:
             Parsed state response dict, or None if timeout/error
         """
-        return await self._query_state_and_wait(timeout)
+        if (
+            self._state_response_time is not None
+            and time.monotonic() - self._state_response_time < self._state_query_ttl
+        ):
+            _LOGGER.debug("Using fresh cached state for %s", self._name)
+            state = self._last_state_response
+            return dict(state) if state is not None else None
+
+        if self._state_query is None or self._state_query.done():
+            self._state_query = asyncio.create_task(
+                self._query_state_and_wait(STATE_QUERY_TIMEOUT)
+            )
+
+        # Shield so one caller giving up does not cancel the query for the others
+        try:
+            state = await asyncio.wait_for(asyncio.shield(self._state_query), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return dict(state) if state is not None else None
 
     async def query_led_settings(self) -> bool:
         """Query LED settings (for addressable strips)."""
         packet = protocol.build_led_settings_query()
-        return await self._send_command(packet)
+        return await self._send_command(packet, query=True)
 
     async def query_led_settings_and_wait(self, timeout: float = 3.0) -> dict | None:
         """Query LED settings and wait for response.
@@ -1713,33 +3006,11 @@ class LEDNetWFDevice:
             Dict with led_count, ic_type, color_order, segments, direction
             or None if timeout/error
         """
-        self._pending_led_settings_response = asyncio.Event()
-
-        try:
-            if not await self.query_led_settings():
-                return None
-
-            try:
-                await asyncio.wait_for(
-                    self._pending_led_settings_response.wait(),
-                    timeout=timeout
-                )
-            except asyncio.TimeoutError:
-                _LOGGER.warning("Timeout waiting for LED settings response")
-                return None
-
-            # Return the captured settings
-            if self._led_count is not None:
-                return {
-                    "led_count": self._led_count,
-                    "ic_type": self._led_type,
-                    "color_order": self._color_order,
-                    "segments": self._segments,
-                    "direction": self._direction,
-                }
-            return None
-        finally:
-            self._pending_led_settings_response = None
+        packet = protocol.build_led_settings_query()
+        result = await self._request(packet, RESPONSE_LED_SETTINGS, timeout)
+        if result is None:
+            _LOGGER.warning("Timeout waiting for LED settings response")
+        return result
 
     async def set_led_settings(
         self,
@@ -1828,6 +3099,7 @@ class LEDNetWFDevice:
                 effect_id,
                 speed,
                 brightness_pct,
+                effective=self.effective_capabilities,
             )
         except Exception as ex:
             # Legacy scene_data has no template - fall back to protocol approach
@@ -1867,6 +3139,7 @@ class LEDNetWFDevice:
             self._product_id,
             self.device_version,
             r, g, b,
+            effective=self.effective_capabilities,
         )
 
         if raw_cmd:
@@ -1906,6 +3179,18 @@ class LEDNetWFDevice:
         if brightness is None:
             brightness = self._brightness if self._brightness > 0 else 255
 
+        packet = self._build_candle_packet(speed, brightness)
+
+        if await self._send_command(packet, coalesce_key=COALESCE_EFFECT):
+            self._effect = "Candle Mode"
+            self._effect_speed = speed
+            self._brightness = brightness
+            self._notify_callbacks()
+            return True
+        return False
+
+    def _build_candle_packet(self, speed: int, brightness: int) -> bytearray:
+        """Build the 0x39 candle packet in the current color, for _set_candle_mode."""
         # Get current RGB color or use warm candle color
         if self._rgb:
             r, g, b = self._rgb
@@ -1922,14 +3207,7 @@ class LEDNetWFDevice:
             "Setting candle mode for %s: rgb=(%d,%d,%d), speed=%d, brightness=%d%%",
             self._name, r, g, b, speed, brightness_pct
         )
-
-        if await self._send_command(packet):
-            self._effect = "Candle Mode"
-            self._effect_speed = speed
-            self._brightness = brightness
-            self._notify_callbacks()
-            return True
-        return False
+        return packet
 
     async def set_sound_reactive(self, enable: bool, sensitivity: int = None) -> bool:
         """Enable or disable sound reactive mode for devices with built-in microphone.
@@ -2016,8 +3294,27 @@ class LEDNetWFDevice:
 
         Source: protocol_docs/17_device_configuration.md - Service Data Format
 
+        Advertisements whose raw bytes match the last one parsed are skipped,
+        unless a command or notification has changed state since.
+
         Returns True if state was updated.
         """
+        fingerprint = protocol.advertisement_fingerprint(manu_data, service_data)
+        if fingerprint == self._adv_fingerprint:
+            self._adv_stats["unchanged"] += 1
+            return False
+        self._adv_stats["parsed"] += 1
+        self._framebuffer.observe("advertisement", fingerprint)
+        changed = self._apply_advertisement(manu_data, service_data)
+        self._adv_fingerprint = fingerprint
+        return changed
+
+    def _apply_advertisement(
+        self,
+        manu_data: dict[int, bytes],
+        service_data: dict[str, bytes] | None,
+    ) -> bool:
+        """Parse an advertisement and apply it to the device state."""
         # Parse service data first if available (provides device info)
         if service_data:
             _LOGGER.debug(
@@ -2270,30 +3567,12 @@ class LEDNetWFDevice:
         Returns:
             Parsed state response dict, or None if timeout/error
         """
-        self._pending_state_response = asyncio.Event()
-        self._last_state_response = None
-
-        try:
-            if self.is_iotbt:
-                # IOTBT devices use 0xEA 0x81 query format (firmware >= 11)
-                packet = protocol.build_iotbt_state_query()
-            else:
-                packet = protocol.build_state_query()
-            if not await self._send_command(packet):
-                return None
-
-            # Wait for response
-            try:
-                await asyncio.wait_for(
-                    self._pending_state_response.wait(),
-                    timeout=timeout
-                )
-                return self._last_state_response
-            except asyncio.TimeoutError:
-                _LOGGER.debug("State query timeout for %s", self._name)
-                return None
-        finally:
-            self._pending_state_response = None
+        if self.is_iotbt:
+            # IOTBT devices use 0xEA 0x81 query format (firmware >= 11)
+            packet = protocol.build_iotbt_state_query()
+        else:
+            packet = protocol.build_state_query()
+        return await self._request(packet, RESPONSE_STATE, timeout)
 
     async def probe_capabilities(self) -> dict:
         """Probe device capabilities by testing each channel.
@@ -2320,8 +3599,8 @@ class LEDNetWFDevice:
         }
 
         try:
-            # Step 1: Query initial state to get baseline
-            initial_state = await self._query_state_and_wait()
+            # Step 1: Query initial state to get baseline (may share an in-flight query)
+            initial_state = await self.query_state_and_wait()
             if not initial_state:
                 _LOGGER.warning("No state response during probe - device may not support state queries")
                 # Fall back to defaults for unknown device
@@ -2410,9 +3689,23 @@ class LEDNetWFDevice:
 
     async def stop(self) -> None:
         """Stop the device and clean up."""
+        self.cancel_transition()
         if self._disconnect_timer:
             self._disconnect_timer.cancel()
             self._disconnect_timer = None
 
+        if self._write_task and not self._write_task.done():
+            self._write_task.cancel()
+        for queued in self._write_queue.values():
+            for waiter in queued.waiters:
+                if not waiter.done():
+                    waiter.set_result(False)
+        self._write_queue.clear()
+        for future in self._pending_responses.values():
+            future.cancel()
+        self._pending_responses.clear()
+        if self._state_query and not self._state_query.done():
+            self._state_query.cancel()
+
         await self._disconnect()
         self._callbacks.clear()
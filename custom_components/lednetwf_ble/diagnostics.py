@@ -0,0 +1,57 @@
+"""Diagnostics support for LEDnetWF BLE v2 integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_MAC
+from homeassistant.core import HomeAssistant
+
+from .advertisements import get_advertisement_dispatcher
+from .capabilities import CAPABILITIES
+from .connection import get_connection_scheduler
+from .const import CONF_PREWARM, DEFAULT_PREWARM, DOMAIN
+from .device import LEDNetWFDevice
+
+TO_REDACT = {CONF_MAC}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    device: LEDNetWFDevice = hass.data[DOMAIN][entry.entry_id]
+    effective = device.effective_capabilities
+    dispatcher = get_advertisement_dispatcher(hass)
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "device": {
+            "name": device.name,
+            "product_id": device.product_id,
+            "firmware": device.app_firmware_version,
+            "effect_type": device.effect_type.name,
+            "removed_functions": sorted(effective.removed) if effective else [],
+        },
+        "command_queue": device.command_stats,
+        "animation": device.animation_stats,
+        "idle_policy": device.idle_stats,
+        "connection": device.connection_info,
+        "prewarm": {
+            "enabled": entry.options.get(CONF_PREWARM, DEFAULT_PREWARM),
+            **device.prewarm_stats,
+        },
+        "notifications": device.notification_stats,
+        "advertisements": {
+            **device.advertisement_stats,
+            **(dispatcher.stats(entry.data[CONF_MAC]) or {}),
+        },
+        "advertisement_dispatcher": dispatcher.metrics(),
+        "connection_slots": get_connection_scheduler(hass).metrics(),
+        "capability_index": CAPABILITIES.index_stats(),
+        "capability_memory": CAPABILITIES.memory_stats(),
+    }
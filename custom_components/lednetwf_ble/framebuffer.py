@@ -0,0 +1,207 @@
+"""Per-device framebuffer for IOTBT segment colors (0xE1 0x03).
+
+A full segment frame costs 7 + 4 x N payload bytes, but an animation
+usually changes only a few segments per frame. The framebuffer keeps the
+records the device last showed and encodes each new frame as the cheapest
+set of updates: one packet per run of changed segments, runs merged when
+resending the unchanged gap between them is cheaper than another packet,
+or the full frame when that is no more expensive. Cost is the number of
+GATT writes at the connection's MTU first, then the bytes on air (see
+PacketPlanner.air_bytes): each write costs a connection event, so small
+runs are merged as long as they still fit the same writes.
+
+Partial updates rely on the firmware honouring the start index of 0xE1
+0x03 frames, which is not confirmed for every product; with deltas=False
+(the default) changed frames always go out in full and only unchanged
+frames are skipped.
+
+The device can also be changed behind our back (the phone app, a remote,
+a power cycle). After a commit the first state notification and the first
+advertisement are remembered; if a later one differs, observe() drops the
+frame so the next one goes out in full.
+
+Each change to the strip bumps a generation counter: encoding a frame (its
+updates are in flight from then on) and invalidate() both do. A frame is
+only committed if nothing else changed the strip while it was being sent.
+
+Usage:
+    framebuffer = SegmentFramebuffer()
+    updates = framebuffer.encode(frame, planner, deltas=True)
+    generation = framebuffer.generation
+    for start, records in updates:
+        send(build_iotbt_segment_records_command(records, count, start))
+    framebuffer.sent(frame, updates, planner)   # once every update was written
+    framebuffer.commit(frame, generation)
+    framebuffer.invalidate()      # after anything else changed the strip
+"""
+from __future__ import annotations
+
+from collections.abc import Hashable
+
+from .protocol import PacketPlanner
+
+SEGMENT_HEADER_LEN = 7  # E1 03, segment count, start index, record count
+SEGMENT_RECORD_LEN = 4  # A1, hue, saturation, brightness
+
+
+def update_cost(segments: int, planner: PacketPlanner) -> tuple[int, int]:
+    """Return (GATT writes, bytes on air) for one packet of segments records."""
+    payload_len = SEGMENT_HEADER_LEN + segments * SEGMENT_RECORD_LEN
+    return planner.writes_for(payload_len), planner.air_bytes(payload_len)
+
+
+def _total_cost(
+    updates: list[tuple[int, int]], planner: PacketPlanner
+) -> tuple[int, int]:
+    """Return the summed (writes, bytes) of [start, end) segment updates."""
+    writes = air = 0
+    for start, end in updates:
+        update_writes, update_air = update_cost(end - start, planner)
+        writes += update_writes
+        air += update_air
+    return writes, air
+
+
+class SegmentFramebuffer:
+    """The segment records a device last showed, and delta encoding against them."""
+
+    __slots__ = ("_frame", "_observed", "generation", "stats")
+
+    def __init__(self) -> None:
+        """Initialize an empty framebuffer; the first frame is sent in full."""
+        self._frame: bytearray | None = None
+        # First state reported per source since the frame was committed
+        self._observed: dict[str, Hashable] = {}
+        self.generation = 0
+        self.stats: dict[str, int] = {
+            "segment_frames": 0,
+            "segment_full": 0,
+            "segment_delta": 0,
+            "segment_unchanged": 0,
+            "segment_bytes_sent": 0,
+            "segment_bytes_saved": 0,
+        }
+
+    @property
+    def known(self) -> bool:
+        """Return True if the device's current frame is known."""
+        return self._frame is not None
+
+    def invalidate(self) -> None:
+        """Forget the frame; the device was changed by another command."""
+        self._frame = None
+        self._observed.clear()
+        self.generation += 1
+
+    def observe(self, source: str, state: Hashable) -> None:
+        """Forget the frame if the device reports a changed state.
+
+        Args:
+            source: Where the state came from ("state", "advertisement");
+                    each source is only compared with itself
+            state: The raw reported state (payload or fingerprint)
+        """
+        if self._frame is None:
+            return
+        seen = self._observed.setdefault(source, state)
+        if seen != state:
+            self.invalidate()
+
+    def commit(self, records: bytes, generation: int) -> bool:
+        """Record the frame the device now shows.
+
+        Only if the strip is still at the generation read right after
+        encoding the frame; returns False if something changed it since.
+        """
+        if generation != self.generation:
+            return False
+        self._frame = bytearray(records)
+        self._observed.clear()
+        return True
+
+    def sent(
+        self,
+        records: bytes,
+        updates: list[tuple[int, bytes]],
+        planner: PacketPlanner,
+    ) -> None:
+        """Count the bytes of a frame's updates once they were all written."""
+        full_cost = update_cost(len(records) // SEGMENT_RECORD_LEN, planner)[1]
+        air = sum(
+            update_cost(len(chunk) // SEGMENT_RECORD_LEN, planner)[1]
+            for _, chunk in updates
+        )
+        if len(updates) == 1 and len(updates[0][1]) == len(records):
+            self.stats["segment_full"] += 1
+        else:
+            self.stats["segment_delta"] += 1
+        self.stats["segment_bytes_sent"] += air
+        self.stats["segment_bytes_saved"] += full_cost - air
+
+    def changed_runs(self, records: bytes) -> list[tuple[int, int]]:
+        """Return the [start, end) segment ranges that differ from the frame."""
+        frame = self._frame
+        runs: list[tuple[int, int]] = []
+        start = None
+        count = len(records) // SEGMENT_RECORD_LEN
+        for index in range(count):
+            pos = index * SEGMENT_RECORD_LEN
+            if records[pos:pos + SEGMENT_RECORD_LEN] != frame[pos:pos + SEGMENT_RECORD_LEN]:
+                if start is None:
+                    start = index
+            elif start is not None:
+                runs.append((start, index))
+                start = None
+        if start is not None:
+            runs.append((start, count))
+        return runs
+
+    @staticmethod
+    def _merge_runs(
+        runs: list[tuple[int, int]], planner: PacketPlanner
+    ) -> list[tuple[int, int]]:
+        """Merge neighbouring runs while resending the gap is cheaper than
+        the extra packet."""
+        updates = [runs[0]]
+        for start, end in runs[1:]:
+            prev_start, prev_end = updates[-1]
+            merged = update_cost(end - prev_start, planner)
+            split = _total_cost([(prev_start, prev_end), (start, end)], planner)
+            if merged <= split:
+                updates[-1] = (prev_start, end)
+            else:
+                updates.append((start, end))
+        return updates
+
+    def encode(
+        self, records: bytes, planner: PacketPlanner, deltas: bool = False
+    ) -> list[tuple[int, bytes]]:
+        """Return the cheapest (start segment, records) updates for a frame.
+
+        An empty list means the device already shows the frame. Without
+        deltas a changed frame is always a single full update. Otherwise the
+        frame is forgotten until commit(), since the device is between
+        frames while the updates are written.
+        """
+        count = len(records) // SEGMENT_RECORD_LEN
+        full_cost = update_cost(count, planner)
+        self.stats["segment_frames"] += 1
+        full = [(0, count)]
+
+        if self._frame is None or len(self._frame) != len(records):
+            updates = full
+        else:
+            runs = self.changed_runs(records)
+            if not runs:
+                self.stats["segment_unchanged"] += 1
+                self.stats["segment_bytes_saved"] += full_cost[1]
+                return []
+            updates = self._merge_runs(runs, planner) if deltas else full
+            if _total_cost(updates, planner) >= full_cost:
+                updates = full
+
+        self.invalidate()
+        return [
+            (start, bytes(records[start * SEGMENT_RECORD_LEN:end * SEGMENT_RECORD_LEN]))
+            for start, end in updates
+        ]
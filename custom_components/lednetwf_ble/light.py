@@ -4,25 +4,48 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+import voluptuous as vol
+
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
     ATTR_COLOR_TEMP_KELVIN,
     ATTR_EFFECT,
     ATTR_RGB_COLOR,
+    ATTR_TRANSITION,
     ColorMode,
     LightEntity,
     LightEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
+from .const import (
+    ATTR_COLORS,
+    ATTR_GRADIENT,
+    ATTR_SEGMENTS,
+    DOMAIN,
+    SERVICE_SET_SEGMENT_COLORS,
+)
 from .device import LEDNetWFDevice
 
 _LOGGER = logging.getLogger(__name__)
 
+_RGB_LIST = vol.All(
+    cv.ensure_list,
+    [vol.All(vol.ExactSequence((cv.byte, cv.byte, cv.byte)), vol.Coerce(tuple))],
+)
+
+SET_SEGMENT_COLORS_SCHEMA = {
+    vol.Exclusive(ATTR_COLORS, "segment_colors"): vol.All(_RGB_LIST, vol.Length(min=1)),
+    vol.Exclusive(ATTR_GRADIENT, "segment_colors"): vol.All(_RGB_LIST, vol.Length(min=2)),
+    vol.Optional(ATTR_SEGMENTS): vol.All(vol.Coerce(int), vol.Range(min=1, max=255)),
+    vol.Optional(ATTR_BRIGHTNESS): cv.byte,
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -45,6 +68,13 @@ async def async_setup_entry(
 
     async_add_entities(entities)
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SET_SEGMENT_COLORS,
+        SET_SEGMENT_COLORS_SCHEMA,
+        "async_set_segment_colors",
+    )
+
 
 class LEDNetWFLight(LightEntity):
     """Representation of a LEDnetWF light."""
@@ -78,6 +108,8 @@ class LEDNetWFLight(LightEntity):
         features = LightEntityFeature(0)
         if device.has_effects:
             features |= LightEntityFeature.EFFECT
+        if device.supports_transitions:
+            features |= LightEntityFeature.TRANSITION
         self._attr_supported_features = features
 
         # Color temp range
@@ -146,7 +178,7 @@ class LEDNetWFLight(LightEntity):
     def effect_list(self) -> list[str] | None:
         """Return list of effects."""
         effects = self._device.effect_list
-        return effects if effects else None
+        return list(effects) if effects else None
 
     @property
     def effect(self) -> str | None:
@@ -230,52 +262,40 @@ class LEDNetWFLight(LightEntity):
         """Turn the light on."""
         _LOGGER.debug("turn_on called with kwargs: %s", kwargs)
 
-        # Ensure light is on
-        if not self._device.is_on:
-            await self._device.turn_on()
-
-        # Determine brightness
-        brightness = kwargs.get(ATTR_BRIGHTNESS)
-        if brightness is None:
-            brightness = self._device.brightness or 255
-
-        # Handle effect
-        if ATTR_EFFECT in kwargs:
-            effect = kwargs[ATTR_EFFECT]
-            if effect:
-                await self._device.set_effect(effect)
-                return
-
-        # Handle color temperature
-        if ATTR_COLOR_TEMP_KELVIN in kwargs:
-            await self._device.set_color_temp(kwargs[ATTR_COLOR_TEMP_KELVIN], brightness)
-            return
-
-        # Handle RGB color
-        if ATTR_RGB_COLOR in kwargs:
-            await self._device.set_rgb_color(kwargs[ATTR_RGB_COLOR], brightness)
-            return
-
-        # Just brightness change - resend current color/mode
-        # IMPORTANT: Check effect FIRST since it takes priority over stored color values
-        if ATTR_BRIGHTNESS in kwargs:
-            if self._device.effect:
-                # Re-send effect with new brightness
-                await self._device.set_effect(
-                    self._device.effect,
-                    speed=self._device.effect_speed,
-                    brightness=brightness
-                )
-            elif self._device.color_temp_kelvin and self._device.has_color_temp:
-                await self._device.set_color_temp(
-                    self._device.color_temp_kelvin, brightness
-                )
-            elif self._device.rgb_color and self._device.has_rgb:
-                await self._device.set_rgb_color(self._device.rgb_color, brightness)
+        # Power, color/white/effect and brightness in as few writes as the
+        # device allows (0x3B color and CCT packets also switch it on);
+        # power and brightness changes fade on the device where supported
+        plan = self._device.plan_turn_on(
+            rgb=kwargs.get(ATTR_RGB_COLOR),
+            color_temp_kelvin=kwargs.get(ATTR_COLOR_TEMP_KELVIN),
+            effect=kwargs.get(ATTR_EFFECT),
+            brightness=kwargs.get(ATTR_BRIGHTNESS),
+            transition=kwargs.get(ATTR_TRANSITION),
+        )
+        await self._device.apply_turn_on(plan)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn the light off."""
-        await self._device.turn_off()
+        await self._device.turn_off(transition=kwargs.get(ATTR_TRANSITION))
+
+    async def async_set_segment_colors(
+        self,
+        colors: list[tuple[int, int, int]] | None = None,
+        gradient: list[tuple[int, int, int]] | None = None,
+        segments: int | None = None,
+        brightness: int | None = None,
+    ) -> None:
+        """Handle the set_segment_colors service: a color list or a gradient."""
+        if not self._device.supports_segment_colors:
+            raise ServiceValidationError(
+                f"{self._device.name} does not support segment colors"
+            )
+        if colors:
+            await self._device.set_segment_colors(colors, brightness)
+        elif gradient:
+            await self._device.set_segment_gradient(gradient, segments, brightness)
+        else:
+            raise ServiceValidationError("Either colors or gradient is required")
 
 
 class LEDNetWFBackgroundLight(LightEntity):
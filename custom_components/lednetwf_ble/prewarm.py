@@ -0,0 +1,196 @@
+"""Connection pre-warming for LEDnetWF devices.
+
+The first command after an idle disconnect has to wait for a new connection
+(often 1-3 s). When pre-warming is enabled for a device, its connection is
+opened ahead of time when a command is likely:
+
+- An advertisement shows the device is reachable and its usage pattern
+  predicts a command soon (see AdaptiveIdlePolicy.expects_command_within)
+- An automation or script that references the light is triggered
+- A scene that includes the light is activated
+- One of the user's trigger entities (e.g. a motion sensor) turns on
+
+Pre-warming only takes connection slots that are free, so it never delays
+or evicts another device. The automations, scripts and scenes that
+reference the light are looked up once and cached until automations,
+scripts or scenes are reloaded or the entity registry changes.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from homeassistant.components.automation import (
+    EVENT_AUTOMATION_TRIGGERED,
+    automations_with_entity,
+)
+from homeassistant.components.homeassistant.scene import scenes_with_entity
+from homeassistant.components.script import EVENT_SCRIPT_STARTED, scripts_with_entity
+from homeassistant.const import (
+    ATTR_DOMAIN,
+    ATTR_ENTITY_ID,
+    ATTR_SERVICE,
+    ATTR_SERVICE_DATA,
+    EVENT_CALL_SERVICE,
+    STATE_ON,
+    Platform,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity_registry import EVENT_ENTITY_REGISTRY_UPDATED
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .const import DOMAIN, PREWARM_COOLDOWN, PREWARM_WINDOW
+from .device import LEDNetWFDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+# Domains whose reload changes which automations, scripts and scenes exist
+_RELOAD_DOMAINS = ("automation", "script", "scene", "homeassistant")
+
+
+class PrewarmController:
+    """Opens a device's connection when Home Assistant is about to use it."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        device: LEDNetWFDevice,
+        trigger_entities: list[str],
+    ) -> None:
+        """Initialize the controller.
+
+        Args:
+            hass: Home Assistant instance
+            device: Device to pre-warm
+            trigger_entities: Entities whose "on" state pre-warms the device
+        """
+        self._hass = hass
+        self._device = device
+        self._trigger_entities = trigger_entities
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self._last_advertisement_prewarm: float | None = None
+        # automation / script / scene entity IDs that reference the light
+        self._references: dict[str, set[str]] | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Start listening for pre-warm signals."""
+        self._unsubs.append(
+            self._hass.bus.async_listen(EVENT_AUTOMATION_TRIGGERED, self._on_automation)
+        )
+        self._unsubs.append(
+            self._hass.bus.async_listen(EVENT_SCRIPT_STARTED, self._on_script)
+        )
+        self._unsubs.append(
+            self._hass.bus.async_listen(EVENT_CALL_SERVICE, self._on_call_service)
+        )
+        self._unsubs.append(
+            self._hass.bus.async_listen(
+                EVENT_ENTITY_REGISTRY_UPDATED, self._on_registry_updated
+            )
+        )
+        if self._trigger_entities:
+            self._unsubs.append(
+                async_track_state_change_event(
+                    self._hass, self._trigger_entities, self._on_trigger_entity
+                )
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop listening for pre-warm signals."""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs.clear()
+
+    @callback
+    def on_advertisement(self) -> None:
+        """Pre-warm if the device is reachable and a command is expected soon."""
+        now = time.monotonic()
+        if (
+            self._last_advertisement_prewarm is not None
+            and now - self._last_advertisement_prewarm < PREWARM_COOLDOWN
+        ):
+            return
+        if not self._device.expects_command_within(PREWARM_WINDOW):
+            return
+        self._last_advertisement_prewarm = now
+        self._prewarm("advertisement")
+
+    def _light_entity_ids(self) -> list[str]:
+        """Return the light entities of this device."""
+        registry = er.async_get(self._hass)
+        return [
+            entity_id
+            for unique_id in (self._device.address, f"{self._device.address}_background")
+            if (entity_id := registry.async_get_entity_id(Platform.LIGHT, DOMAIN, unique_id))
+        ]
+
+    def _referencing(self, kind: str) -> set[str]:
+        """Return the automations, scripts or scenes that reference the light."""
+        if self._references is None:
+            entity_ids = self._light_entity_ids()
+            self._references = {
+                kind: {
+                    ref
+                    for entity_id in entity_ids
+                    for ref in lookup(self._hass, entity_id)
+                }
+                for kind, lookup in (
+                    ("automation", automations_with_entity),
+                    ("script", scripts_with_entity),
+                    ("scene", scenes_with_entity),
+                )
+            }
+        return self._references[kind]
+
+    @callback
+    def _on_automation(self, event: Event) -> None:
+        """Pre-warm when an automation that controls the light triggers."""
+        automation = event.data.get(ATTR_ENTITY_ID)
+        if automation in self._referencing("automation"):
+            self._prewarm(f"automation {automation}")
+
+    @callback
+    def _on_script(self, event: Event) -> None:
+        """Pre-warm when a script that controls the light starts."""
+        script = event.data.get(ATTR_ENTITY_ID)
+        if script in self._referencing("script"):
+            self._prewarm(f"script {script}")
+
+    @callback
+    def _on_call_service(self, event: Event) -> None:
+        """Pre-warm when a scene that includes the light is activated.
+
+        Reload services drop the cached references instead.
+        """
+        domain = event.data.get(ATTR_DOMAIN)
+        service = event.data.get(ATTR_SERVICE)
+        if domain in _RELOAD_DOMAINS and service in ("reload", "reload_all"):
+            self._references = None
+            return
+        if domain != "scene" or service != "turn_on":
+            return
+        targets: Any = (event.data.get(ATTR_SERVICE_DATA) or {}).get(ATTR_ENTITY_ID, [])
+        if isinstance(targets, str):
+            targets = [targets]
+        if not self._referencing("scene").isdisjoint(targets):
+            self._prewarm("scene")
+
+    @callback
+    def _on_registry_updated(self, event: Event) -> None:
+        """Drop the cached references when entities are added, renamed or removed."""
+        self._references = None
+
+    @callback
+    def _on_trigger_entity(self, event: Event) -> None:
+        """Pre-warm when a trigger entity (e.g. motion sensor) turns on."""
+        new_state = event.data.get("new_state")
+        if new_state is not None and new_state.state == STATE_ON:
+            self._prewarm(f"trigger {new_state.entity_id}")
+
+    def _prewarm(self, reason: str) -> None:
+        """Open the connection in the background."""
+        self._hass.async_create_task(self._device.async_prewarm(reason))
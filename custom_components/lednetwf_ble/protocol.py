@@ -11,6 +11,7 @@ from __future__ import annotations
 
 import colorsys
 import logging
+import time
 from typing import Tuple
 
 from .const import EffectType, MIN_KELVIN, MAX_KELVIN, SYMPHONY_BG_COLOR_EFFECTS
@@ -31,6 +32,17 @@ def calculate_checksum(data: bytes) -> int:
 # TRANSPORT LAYER
 # =============================================================================
 
+# Source: protocol_docs/04_connection_transport.md
+TRANSPORT_HEADER_LEN = 8
+HEADER_FLAG_SEGMENTED = 0x40  # Header bit 6: payload split across segments
+FRAG_LAST_SEGMENT = 0x8000    # Frag control bit 15: final segment
+FRAG_INDEX_MASK = 0x7FFF      # Frag control bits 0-14: segment index
+MAX_SEGMENT_PAYLOAD = 254     # Byte 6 (payload length + 1) is a single byte
+ATT_WRITE_OVERHEAD = 3        # ATT opcode + attribute handle
+DEFAULT_ATT_MTU = 23          # BLE minimum, before any MTU exchange
+REASSEMBLY_MAX_BYTES = 4096   # Buffered fragment bytes before the oldest is dropped
+REASSEMBLY_TIMEOUT = 2.0      # Seconds before an incomplete message is abandoned
+
 def wrap_command(raw_payload: bytes, cmd_family: int = 0x0b, seq: int = 0) -> bytearray:
     """
     Wrap a raw command payload in the transport layer format.
@@ -67,6 +79,114 @@ def wrap_command(raw_payload: bytes, cmd_family: int = 0x0b, seq: int = 0) -> by
     return packet
 
 
+def max_write_size(mtu: int) -> int:
+    """Return the largest value that fits in one ATT write at the given MTU."""
+    return max(mtu, DEFAULT_ATT_MTU) - ATT_WRITE_OVERHEAD
+
+
+def segment_packet(packet: bytes, max_write: int) -> list[bytearray]:
+    """
+    Split a wrapped packet into transport segments that each fit one ATT write.
+
+    Packets that already fit are returned unchanged (single segment, frag
+    control 0x8000). Larger packets are re-framed as numbered segments, each
+    with its own 8-byte header:
+      - Byte 0: Original header flags | 0x40 (segmented)
+      - Byte 1: Same sequence number for every segment
+      - Bytes 2-3: Frag control = segment index, bit 15 set on the last one
+      - Bytes 4-5: Total payload length of the whole message
+      - Byte 6: This segment's payload length + 1
+      - Byte 7: cmdId
+
+    The frag control numbering extends the documented single-segment value
+    (0x8000 = index 0, last segment) to multiple segments.
+
+    Args:
+        packet: Packet built by wrap_command (sequence number already set)
+        max_write: Maximum bytes per ATT write (see max_write_size)
+
+    Returns:
+        List of packets to write in order
+    """
+    payload = memoryview(packet)[TRANSPORT_HEADER_LEN:]
+    chunk_size = min(max_write - TRANSPORT_HEADER_LEN, MAX_SEGMENT_PAYLOAD)
+    if len(payload) <= chunk_size:
+        return [bytearray(packet)]
+    if chunk_size <= 0:
+        raise ValueError(f"Write size {max_write} too small for transport header")
+
+    header = packet[0] | HEADER_FLAG_SEGMENTED
+    chunk_count = -(-len(payload) // chunk_size)
+    segments = []
+    for index in range(chunk_count):
+        chunk = payload[index * chunk_size:(index + 1) * chunk_size]
+        frag = (index & FRAG_INDEX_MASK) | (FRAG_LAST_SEGMENT if index == chunk_count - 1 else 0)
+        segment = bytearray(TRANSPORT_HEADER_LEN + len(chunk))
+        segment[0] = header
+        segment[1] = packet[1]
+        segment[2] = (frag >> 8) & 0xFF
+        segment[3] = frag & 0xFF
+        segment[4] = packet[4]
+        segment[5] = packet[5]
+        segment[6] = (len(chunk) + 1) & 0xFF
+        segment[7] = packet[7]
+        segment[TRANSPORT_HEADER_LEN:] = chunk
+        segments.append(segment)
+    return segments
+
+
+class PacketPlanner:
+    """
+    Plan the GATT writes for outgoing packets at a connection's MTU.
+
+    A message goes out as a single write when its payload fits in one ATT
+    write (and in the one-byte segment length field), otherwise as the
+    fewest transport segments that hold it.
+
+    With mtu None (nothing larger than the default was negotiated or
+    acquired) packets are never split: every packet is one write, as the
+    app sends it, and the Bluetooth stack deals with its length.
+    """
+
+    __slots__ = ("mtu", "max_write", "chunk_size")
+
+    def __init__(self, mtu: int | None) -> None:
+        self.mtu = mtu
+        if mtu is None:
+            self.chunk_size = MAX_SEGMENT_PAYLOAD
+            self.max_write = TRANSPORT_HEADER_LEN + MAX_SEGMENT_PAYLOAD
+        else:
+            self.max_write = max_write_size(mtu)
+            self.chunk_size = min(
+                self.max_write - TRANSPORT_HEADER_LEN, MAX_SEGMENT_PAYLOAD
+            )
+
+    def split(self, packet: bytes) -> list[bytearray]:
+        """Return the writes needed to send a wrapped packet."""
+        if self.mtu is None:
+            return [bytearray(packet)]
+        return segment_packet(packet, self.max_write)
+
+    def writes_for(self, payload_len: int) -> int:
+        """Return how many writes a raw payload of this length needs."""
+        return max(1, -(-payload_len // self.chunk_size))
+
+    def air_bytes(self, payload_len: int) -> int:
+        """Return the bytes on air for a raw payload, with every write's
+        transport header and ATT opcode/handle."""
+        writes = self.writes_for(payload_len)
+        return payload_len + writes * (TRANSPORT_HEADER_LEN + ATT_WRITE_OVERHEAD)
+
+    def records_per_write(self, header_len: int, record_len: int) -> int:
+        """Return how many fixed-size records fit in a single-write command.
+
+        Args:
+            header_len: Command bytes before the first record
+            record_len: Bytes per record (e.g. 4 per segment colour)
+        """
+        return max(0, (self.chunk_size - header_len) // record_len)
+
+
 def unwrap_response(data: bytes) -> bytes | None:
     """
     Extract payload from transport layer response.
@@ -79,6 +199,133 @@ def unwrap_response(data: bytes) -> bytes | None:
     return data[8:]
 
 
+class _PartialMessage:
+    """Fragments received so far for one transport message."""
+
+    __slots__ = ("total", "chunks", "last_index", "size", "started")
+
+    def __init__(self, total: int, started: float) -> None:
+        self.total = total
+        self.chunks: dict[int, bytes] = {}
+        self.last_index: int | None = None
+        self.size = 0
+        self.started = started
+
+    def add(self, index: int, chunk: bytes) -> None:
+        self.size += len(chunk) - len(self.chunks.get(index, b""))
+        self.chunks[index] = chunk
+
+
+class NotificationReassembler:
+    """
+    Rebuild complete transport payloads from a stream of notifications.
+
+    Notifications are limited to the connection MTU, so a response can arrive
+    as a segmented message (header bit 6): every piece has its own header,
+    frag control gives the segment index and marks the last segment.
+    Notifications without the segmented bit are complete messages and are
+    returned as data[8:] straight away, whatever their length fields say.
+
+    Segmented messages are buffered per sequence number. Buffered bytes are
+    capped (oldest message dropped first) and messages that do not complete
+    within the timeout are discarded.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = REASSEMBLY_MAX_BYTES,
+        timeout: float = REASSEMBLY_TIMEOUT,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._timeout = timeout
+        self._partials: dict[int, _PartialMessage] = {}
+        self.completed = 0
+        self.reassembled = 0
+        self.dropped_timeout = 0
+        self.dropped_overflow = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return reassembly counters."""
+        return {
+            "completed": self.completed,
+            "reassembled": self.reassembled,
+            "dropped_timeout": self.dropped_timeout,
+            "dropped_overflow": self.dropped_overflow,
+            "pending": len(self._partials),
+            "buffered_bytes": sum(p.size for p in self._partials.values()),
+        }
+
+    def reset(self) -> None:
+        """Discard all partial messages (e.g. after reconnecting)."""
+        self._partials.clear()
+
+    def feed(self, data: bytes, now: float | None = None) -> list[tuple[int, bytes]]:
+        """
+        Add one notification and return any messages it completed.
+
+        Returns:
+            List of (sequence number, payload) for each complete message
+        """
+        if now is None:
+            now = time.monotonic()
+        self._expire(now)
+
+        if len(data) <= TRANSPORT_HEADER_LEN:
+            return []
+
+        seq = data[1]
+        chunk = bytes(data[TRANSPORT_HEADER_LEN:])
+
+        if data[0] & HEADER_FLAG_SEGMENTED:
+            total = (data[4] << 8) | data[5]
+            frag = (data[2] << 8) | data[3]
+            partial = self._partials.get(seq)
+            if partial is None or partial.total != total:
+                partial = self._partials[seq] = _PartialMessage(total, now)
+            partial.add(frag & FRAG_INDEX_MASK, chunk)
+            if frag & FRAG_LAST_SEGMENT:
+                partial.last_index = frag & FRAG_INDEX_MASK
+            self._enforce_cap()
+            if partial.last_index is not None and len(partial.chunks) > partial.last_index:
+                return self._complete(seq)
+            return []
+
+        self.completed += 1
+        return [(seq, chunk)]
+
+    def _complete(self, seq: int) -> list[tuple[int, bytes]]:
+        """Join a finished message's chunks and hand it out."""
+        partial = self._partials.pop(seq)
+        payload = b"".join(partial.chunks[i] for i in range(partial.last_index + 1))
+        if len(payload) != partial.total:
+            _LOGGER.debug(
+                "Reassembled message seq=%d is %d bytes, header said %d",
+                seq, len(payload), partial.total,
+            )
+        self.completed += 1
+        self.reassembled += 1
+        return [(seq, payload)]
+
+    def _expire(self, now: float) -> None:
+        """Drop messages whose fragments stopped arriving."""
+        for seq in [s for s, p in self._partials.items() if now - p.started > self._timeout]:
+            _LOGGER.debug("Dropping incomplete message seq=%d (timeout)", seq)
+            self._drop(seq)
+            self.dropped_timeout += 1
+
+    def _enforce_cap(self) -> None:
+        """Drop the oldest messages until buffered bytes fit the cap."""
+        while self._partials and sum(p.size for p in self._partials.values()) > self._max_bytes:
+            seq = min(self._partials, key=lambda s: self._partials[s].started)
+            _LOGGER.debug("Dropping incomplete message seq=%d (buffer full)", seq)
+            self._drop(seq)
+            self.dropped_overflow += 1
+
+    def _drop(self, seq: int) -> None:
+        del self._partials[seq]
+
+
 # =============================================================================
 # COLOR CONVERSION
 # =============================================================================
@@ -390,6 +637,61 @@ def build_iotbt_state_query() -> bytearray:
 # These devices use 0xE1 0x03 for color (not 0xE2) and 0x3B for power (not 0x71)
 # =============================================================================
 
+def encode_iotbt_segment(r: int, g: int, b: int, brightness: int = 100) -> bytes:
+    """
+    Encode one 4-byte segment record of the 0xE1 0x03 command.
+
+    Record: [0xA1, hue, saturation, brightness]
+    - 0xA1: Segment marker
+    - hue: 0-180 (hue angle / 2; 0=red, ~60=green, ~120=blue)
+    - saturation: 0-100 (0=white, 100=full color)
+    - brightness: 1-100, the RGB value scaled by brightness (0-100)
+    """
+    h, s, v = rgb_to_hsv(r, g, b)
+    # Combine brightness from both sources
+    # RGB value gives us "color intensity", brightness param is overall
+    combined_bright = max(1, min(100, int(brightness * v / 100)))
+    return bytes([
+        0xA1,                       # Segment marker
+        int(h / 2) & 0xFF,          # Hue (0-180 deg)
+        max(0, min(100, s)),        # Saturation (0-100)
+        combined_bright & 0xFF,     # Brightness (0-100)
+    ])
+
+
+def build_iotbt_segment_records_command(
+    records: bytes, segment_count: int, start: int = 0
+) -> bytearray:
+    """
+    Build an IOTBT segment color command (0xE1 0x03) from encoded records.
+
+    Format: [0xE1, 0x03, total_hi, total_lo, start_hi, start_lo, n, ...records...]
+
+    The captured full-strip frames read 00 {count} 00 00 {count}: the strip's
+    segment count, a zero start index and the number of records that follow.
+    A partial update (start > 0 or fewer records) assumes the firmware reads
+    bytes 4-5 as the start index; no capture confirms that yet, so it is only
+    used for SEGMENT_DELTA_PRODUCTS.
+
+    Args:
+        records: Concatenated 4-byte records (see encode_iotbt_segment)
+        segment_count: Number of segments on the strip
+        start: Index of the first segment in records
+
+    Returns:
+        Wrapped command packet
+    """
+    raw_cmd = bytearray([
+        0xE1, 0x03,
+        (segment_count >> 8) & 0xFF, segment_count & 0xFF,
+        (start >> 8) & 0xFF, start & 0xFF,
+        (len(records) // 4) & 0xFF,
+    ])
+    raw_cmd.extend(records)
+    # No checksum for this command format
+    return wrap_command(raw_cmd, cmd_family=0x0a)
+
+
 def build_iotbt_segment_color_command(
     r: int, g: int, b: int, brightness: int = 100, segment_count: int = 20
 ) -> bytearray:
@@ -400,14 +702,9 @@ def build_iotbt_segment_color_command(
 
     Format: [0xE1, 0x03, 0x00, segment_count, 0x00, 0x00, segment_count, ...segment_data...]
 
-    Each segment (4 bytes): [0xA1, hue, saturation, brightness]
-    - 0xA1: Segment marker
-    - hue: 0-255 (0=red, 85=green, 170=blue, wrapping)
-    - saturation: 0-100 (0=white, 100=full color)
-    - brightness: 0-100 (0=off, 100=full)
-
-    This sets all segments to the same color. For individual segment control,
-    the segment_data would contain different values per segment.
+    Each segment is a 4-byte record (see encode_iotbt_segment). This sets all
+    segments to the same color; build_iotbt_segment_records_command sends
+    individual segment colors.
 
     Args:
         r, g, b: RGB color values (0-255)
@@ -417,43 +714,36 @@ def build_iotbt_segment_color_command(
     Returns:
         Wrapped command packet
     """
-    # Convert RGB to HSV
-    h, s, v = rgb_to_hsv(r, g, b)
+    record = encode_iotbt_segment(r, g, b, brightness)
+    return build_iotbt_segment_records_command(record * segment_count, segment_count)
 
-    # This device accepts angles 0-180 for hue
-    # 0=red, ~60=green, ~120=blue
-    # CHANGE THIS TO THE FOLLOWING
-    hue_180 = int(h / 2) & 0xFF
 
-    # Saturation stays 0-100
-    sat = max(0, min(100, s))
-
-    # Combine brightness from both sources
-    # RGB value gives us "color intensity", brightness param is overall
-    combined_bright = max(1, min(100, int(brightness * v / 100)))
-
-    # Build header: E1 03 00 {segment_count} 00 00 {segment_count}
-    raw_cmd = bytearray([
-        0xE1, 0x03,
-        0x00,                       # Unknown/reserved
-        segment_count & 0xFF,       # Segment count (first occurrence)
-        0x00, 0x00,                 # Reserved
-        segment_count & 0xFF,       # Segment count (repeated)
-    ])
+def segment_gradient(
+    stops: list[tuple[int, int, int]], count: int
+) -> list[tuple[int, int, int]]:
+    """
+    Spread RGB color stops evenly over count segments.
 
-    # Add segment data - all segments get same color
-    for _ in range(segment_count):
-        raw_cmd.extend([
-            0xA1,                    # Segment marker
-            hue_180 & 0xFF,          # Hue (0-180 deg)
-            sat & 0xFF,              # Saturation (0-100)
-            combined_bright & 0xFF   # Brightness (0-100)
-        ])
+    The first and last segments get the first and last stop; segments in
+    between are linearly interpolated between their two nearest stops.
+    """
+    if count <= 0 or not stops:
+        return []
+    if len(stops) == 1 or count == 1:
+        return [tuple(stops[0])] * count
+    spans = len(stops) - 1
+    colors = []
+    for i in range(count):
+        pos = i * spans / (count - 1)
+        index = min(int(pos), spans - 1)
+        frac = pos - index
+        start, end = stops[index], stops[index + 1]
+        colors.append(tuple(
+            round(a + (b - a) * frac) for a, b in zip(start, end)
+        ))
+    return colors
 
-    # No checksum for this command format
-    return wrap_command(raw_cmd, cmd_family=0x0a)
 
-    
 def build_iotbt_segment_effect_command(effect_id: int, speed: int = 50, brightness: int = 100, segment_count: int = 100) -> bytearray:
     """
     Build IOTBT segment effect command (0xE1 0x01 format), based on sniffed BLE data.
@@ -2245,6 +2535,30 @@ def get_service_data_from_advertisement(
     return None
 
 
+def advertisement_fingerprint(
+    manu_data: dict[int, bytes],
+    service_data: dict[str, bytes] | None = None,
+) -> tuple:
+    """
+    Snapshot of the raw advertisement bytes for change detection.
+
+    Devices re-advertise the same manufacturer and service data several
+    times per second. Two advertisements with equal fingerprints parse to
+    the same result, so the parse can be skipped for the second one.
+
+    Args:
+        manu_data: Manufacturer data dict from BLE advertisement
+        service_data: Service data dict from BLE advertisement, if any
+
+    Returns:
+        Tuple of the (key, bytes) pairs of both dicts, compared with ==
+    """
+    return (
+        tuple(manu_data.items()) if manu_data else (),
+        tuple(service_data.items()) if service_data else (),
+    )
+
+
 def is_iotbt_segment_variant(service_data_dict: dict[str, bytes]) -> bool:
     """
     Check if device is an IOTBT segment-based variant.
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+LEDnetWF BLE Benchmarks
+
+Offline micro-benchmarks for the pure-Python parts of the integration
+(protocol encoding, command building, capability data). No Bluetooth
+adapter or Home Assistant install is needed: the integration's modules are
+loaded directly from custom_components/lednetwf_ble without running its
+__init__.py.
+
+Benchmarks:
+- transport: Per-LED payload cost of segment colour commands at different
+  MTUs (ATT writes, bytes on air, framing efficiency, encode time)
+- templates: Commands/sec for every template in wifi_dp_cmd.json and
+  ble_dp_cmd.json, compiled byte plans vs. string substitution
+- responses: 0x81 state frames/sec, decoders compiled from
+  responseHexDescribes vs. the hand-written parse_state_response
+- advertisements: Parse cost of a crowd of advertising devices, with and
+  without skipping advertisements whose raw bytes did not change
+- segments: Bytes/sec of animated segment colour frames, full frames vs.
+  delta updates from the per-device framebuffer
+
+Usage:
+    python benchmark.py transport
+    python benchmark.py transport --mtu 23 255 512 --leds 10 60 150 255
+    python benchmark.py templates
+    python benchmark.py responses --frames 256
+    python benchmark.py advertisements --devices 50 --rate 5 --change 0.02
+    python benchmark.py segments --segments 20 100 255 --mtu 23 255 --fps 10
+"""
+
+import argparse
+import importlib
+import importlib.util
+import json
+import logging
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+PACKAGE_NAME = "lednetwf_ble"
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "custom_components" / PACKAGE_NAME
+
+
+def load_module(name: str):
+    """Import a submodule of the integration without running its __init__."""
+    if PACKAGE_NAME not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE_NAME,
+            PACKAGE_DIR / "__init__.py",
+            submodule_search_locations=[str(PACKAGE_DIR)],
+        )
+        # The package __init__ needs Home Assistant; register the bare package
+        # so relative imports between the pure modules resolve.
+        sys.modules[PACKAGE_NAME] = importlib.util.module_from_spec(spec)
+    return importlib.import_module(f"{PACKAGE_NAME}.{name}")
+
+
+def time_call(func, repeat: int) -> float:
+    """Return the best per-call time of func in microseconds."""
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=loops))
+    return best / loops * 1e6
+
+
+# =============================================================================
+# TRANSPORT
+# =============================================================================
+
+def bench_transport(args: argparse.Namespace) -> None:
+    """Segment colour command cost per LED at each MTU."""
+    protocol = load_module("protocol")
+
+    print(f"{'MTU':>5} {'LEDs':>5} {'payload':>8} {'writes':>7} {'on air':>7} "
+          f"{'B/LED':>6} {'LED/write':>9} {'efficiency':>10} {'encode us':>10}")
+    for mtu in args.mtu:
+        max_write = protocol.max_write_size(mtu)
+        for leds in args.leds:
+            packet = protocol.build_iotbt_segment_color_command(
+                255, 0, 0, 100, segment_count=leds
+            )
+            segments = protocol.segment_packet(packet, max_write)
+            payload = len(packet) - protocol.TRANSPORT_HEADER_LEN
+            # Each ATT write also carries the 3-byte ATT opcode + handle
+            on_air = sum(len(s) + protocol.ATT_WRITE_OVERHEAD for s in segments)
+            encode_us = time_call(
+                lambda: protocol.segment_packet(packet, max_write), args.repeat
+            )
+            print(f"{mtu:>5} {leds:>5} {payload:>8} {len(segments):>7} {on_air:>7} "
+                  f"{on_air / leds:>6.2f} {leds / len(segments):>9.1f} "
+                  f"{payload / on_air:>9.1%} {encode_us:>10.2f}")
+        print()
+
+
+# =============================================================================
+# TEMPLATES
+# =============================================================================
+
+def bench_templates(args: argparse.Namespace) -> None:
+    """Compiled command plans vs. string substitution for every template."""
+    capabilities = load_module("capabilities")
+    commands = load_module("commands")
+    # Templates without parameter values would log a warning per build
+    logging.getLogger(commands.__name__).setLevel(logging.ERROR)
+
+    print(f"{'file':<18} {'template':<28} {'plan':>5} {'string cmd/s':>13} "
+          f"{'plan cmd/s':>11} {'speedup':>8}")
+    total_string = total_plan = 0.0
+    for filename in ("wifi_dp_cmd.json", "ble_dp_cmd.json"):
+        with open(PACKAGE_DIR / "data" / filename, encoding="utf-8") as f:
+            templates = json.load(f)
+        for code, data in templates.items():
+            template = capabilities.CommandTemplate.from_dict(data)
+            # Distinct non-zero values so byte placement is checked
+            params = {
+                name: 0x1234 + i
+                for i, name in enumerate(dict.fromkeys(re.findall(r"\{(\w+)\}", template.cmd_form)))
+            }
+            expected = commands._build_from_string(template, params)
+            built = commands.build_from_template(template, params)
+            if built != expected:
+                raise SystemExit(f"{code}: {built.hex()} != {expected.hex()}")
+
+            string_us = time_call(lambda: commands._build_from_string(template, params), args.repeat)
+            plan_us = time_call(lambda: commands.build_from_template(template, params), args.repeat)
+            total_string += string_us
+            total_plan += plan_us
+            compiled = commands.compile_template(template.cmd_form) is not None
+            print(f"{filename:<18} {code:<28} {'yes' if compiled else 'no':>5} "
+                  f"{1e6 / string_us:>13,.0f} {1e6 / plan_us:>11,.0f} "
+                  f"{string_us / plan_us:>7.1f}x")
+
+    print(f"\nAll templates: string {total_string:.1f} us, plan {total_plan:.1f} us "
+          f"({total_string / total_plan:.1f}x)")
+
+
+# =============================================================================
+# RESPONSES
+# =============================================================================
+
+def bench_responses(args: argparse.Namespace) -> None:
+    """Compiled state decoders vs. the hand-written state parser."""
+    capabilities = load_module("capabilities")
+    decoders = load_module("decoders")
+    protocol = load_module("protocol")
+    rng = random.Random(0)
+
+    print(f"{'product':>7} {'template':<66} {'used':>4} {'hand fr/s':>10} "
+          f"{'compiled fr/s':>13} {'speedup':>8}")
+    for product_id in capabilities.CAPABILITIES.get_all_product_ids():
+        raw = capabilities.CAPABILITIES.get_device_raw(product_id)
+        describe = next(
+            (d for d in raw.get("responseHexDescribes", [])
+             if d.get("dpCode") == decoders.STATE_DP_CODE),
+            None,
+        )
+        if describe is None:
+            continue
+        hex_form = describe["hexForm"]
+        decoder = decoders.ResponseDecoder.compile(describe)
+        # Products only use the compiled decoder if it passes the parity check
+        used = decoder is not None and decoder.state_parity()
+        device = capabilities.CAPABILITIES.get_device(product_id)
+        if used != (decoders.STATE_DP_CODE in device.response_decoders):
+            raise SystemExit(f"0x{product_id:02X}: parity check and capabilities disagree")
+        if not used:
+            print(f"0x{product_id:02X}{'':>3} {hex_form:<66} {'no':>4}")
+            continue
+
+        # Valid frames with random contents: flags set, checksum last
+        frames = []
+        for _ in range(args.frames):
+            frame = bytearray(rng.randrange(256) for _ in range(decoder.length))
+            for index, flag in decoder.flags:
+                frame[index] = flag
+            frame[-1] = sum(frame[:-1]) & 0xFF
+            frames.append(bytes(frame))
+        for frame in frames:
+            if decoder.decode_state(frame) != protocol.parse_state_response(frame):
+                raise SystemExit(f"0x{product_id:02X}: decoders disagree on {frame.hex()}")
+
+        def run_hand():
+            for frame in frames:
+                protocol.parse_state_response(frame)
+
+        def run_compiled():
+            for frame in frames:
+                decoder.decode_state(frame)
+
+        hand_us = time_call(run_hand, args.repeat) / len(frames)
+        compiled_us = time_call(run_compiled, args.repeat) / len(frames)
+        print(f"0x{product_id:02X}{'':>3} {hex_form:<66} {'yes':>4} {1e6 / hand_us:>10,.0f} "
+              f"{1e6 / compiled_us:>13,.0f} {hand_us / compiled_us:>7.2f}x")
+
+
+# =============================================================================
+# ADVERTISEMENTS
+# =============================================================================
+
+def bench_advertisements(args: argparse.Namespace) -> None:
+    """Advertisement parsing with and without the unchanged-bytes fingerprint."""
+    protocol = load_module("protocol")
+    rng = random.Random(0)
+    product_ids = (0x08, 0x33, 0x53, 0x54, 0x56, 0x62)
+
+    def state_bytes():
+        # power, static RGB mode, brightness, r, g, b, cct
+        return bytes([0x23, 0x61, 0xF0, 100, *(rng.randrange(256) for _ in range(3)),
+                      0, 0, 0, 0])
+
+    # One (address, manufacturer data, service data) triple per device
+    devices = []
+    for i in range(args.devices):
+        mac = bytes(rng.randrange(256) for _ in range(6))
+        product_id = product_ids[i % len(product_ids)]
+        header = bytes([0x01, 0x05, *mac, 0x00, product_id, 0x11, 0x02, 0x00, 0x1F])
+        service = bytes([0x01, 0x5A, 0x00, 0x05, *mac, 0x00, product_id,
+                         0x11, 0x02, 0x00, 0x1F])
+        devices.append([0x5A00 + i % 256, header, state_bytes(), service])
+
+    # Interleaved advertisements for `seconds` of air time; each one changes
+    # the device's state with probability --change
+    stream = []
+    for _ in range(args.rate * args.seconds):
+        for device in devices:
+            if rng.random() < args.change:
+                device[2] = state_bytes()
+            manu_id, header, state, service = device
+            stream.append((
+                device,
+                {manu_id: header + state + b"\x00\x00"},
+                {protocol.SERVICE_UUID_FFFF: service},
+            ))
+
+    def parse(manu_data, service_data):
+        sd_bytes = protocol.get_service_data_from_advertisement(service_data)
+        if sd_bytes:
+            protocol.parse_service_data(sd_bytes)
+        return protocol.parse_manufacturer_data(manu_data)
+
+    def run_always():
+        for _, manu_data, service_data in stream:
+            parse(manu_data, service_data)
+
+    counts = {"parsed": 0, "unchanged": 0}
+
+    def run_fingerprint():
+        fingerprints = {}
+        parsed = unchanged = 0
+        for device, manu_data, service_data in stream:
+            fingerprint = protocol.advertisement_fingerprint(manu_data, service_data)
+            if fingerprints.get(id(device)) == fingerprint:
+                unchanged += 1
+                continue
+            parsed += 1
+            parse(manu_data, service_data)
+            fingerprints[id(device)] = fingerprint
+        counts.update(parsed=parsed, unchanged=unchanged)
+
+    always_us = time_call(run_always, args.repeat) / len(stream)
+    fingerprint_us = time_call(run_fingerprint, args.repeat) / len(stream)
+    per_second = args.devices * args.rate
+
+    print(f"{args.devices} devices x {args.rate} adv/s for {args.seconds} s, "
+          f"state change probability {args.change:.1%}")
+    print(f"  advertisements  {len(stream):>10,}")
+    print(f"  parsed          {counts['parsed']:>10,}")
+    print(f"  unchanged       {counts['unchanged']:>10,} "
+          f"({counts['unchanged'] / len(stream):.1%} hit rate)")
+    print(f"  always parse    {always_us:>10.2f} us/adv "
+          f"{always_us * per_second / 1e3:>8.2f} ms CPU/s")
+    print(f"  fingerprint     {fingerprint_us:>10.2f} us/adv "
+          f"{fingerprint_us * per_second / 1e3:>8.2f} ms CPU/s "
+          f"({always_us / fingerprint_us:.1f}x)")
+
+
+# =============================================================================
+# SEGMENTS
+# =============================================================================
+
+def segment_animations(count: int, frames: int, rng: random.Random):
+    """Yield (name, frames) colour animations over count segments."""
+    def chase():
+        # One lit segment moving along a dark strip
+        for i in range(frames):
+            colors = [(0, 0, 0)] * count
+            colors[i % count] = (255, 255, 255)
+            yield colors
+
+    def twinkle():
+        # A steady colour with a few segments flashing each frame
+        colors = [(0, 0, 255)] * count
+        for _ in range(frames):
+            colors = [(0, 0, 255)] * count
+            for i in rng.sample(range(count), max(1, count // 20)):
+                colors[i] = (255, 255, 255)
+            yield colors
+
+    def fill():
+        # Segments switched from one colour to another one at a time
+        for i in range(frames):
+            lit = i % (count + 1)
+            yield [(255, 0, 0)] * lit + [(0, 255, 0)] * (count - lit)
+
+    def rainbow():
+        # Every segment changes every frame
+        for i in range(frames):
+            yield [((i * 8 + s * 16) % 256, 255 - (s * 4) % 256, 128) for s in range(count)]
+
+    return [("chase", chase()), ("twinkle", twinkle()), ("fill", fill()), ("rainbow", rainbow())]
+
+
+def bench_segments(args: argparse.Namespace) -> None:
+    """Animated segment frames: full frames vs. framebuffer delta updates."""
+    protocol = load_module("protocol")
+    framebuffer = load_module("framebuffer")
+    rng = random.Random(1)
+
+    print(f"{'MTU':>5} {'segs':>5} {'animation':<9} {'full B/s':>9} {'delta B/s':>10} "
+          f"{'saved B/s':>10} {'saved':>6} {'pkt/frame':>9} {'encode us':>10}")
+    for mtu in args.mtu:
+        planner = protocol.PacketPlanner(mtu)
+        for count in args.segments:
+            full_cost = framebuffer.update_cost(count, planner)[1]
+            for name, animation in segment_animations(count, args.frames, rng):
+                frames = [
+                    b"".join(protocol.encode_iotbt_segment(r, g, b) for r, g, b in colors)
+                    for colors in animation
+                ]
+                buffer = framebuffer.SegmentFramebuffer()
+                packets = 0
+                for records in frames:
+                    updates = buffer.encode(records, planner, deltas=True)
+                    packets += len(updates)
+                    buffer.sent(records, updates, planner)
+                    buffer.commit(records, buffer.generation)
+                sent = buffer.stats["segment_bytes_sent"]
+                seconds = len(frames) / args.fps
+                full_rate = full_cost * len(frames) / seconds
+                delta_rate = sent / seconds
+
+                def run_encode():
+                    encoder = framebuffer.SegmentFramebuffer()
+                    for records in frames:
+                        encoder.encode(records, planner, deltas=True)
+                        encoder.commit(records, encoder.generation)
+
+                encode_us = time_call(run_encode, args.repeat) / len(frames)
+                print(f"{mtu:>5} {count:>5} {name:<9} {full_rate:>9,.0f} {delta_rate:>10,.0f} "
+                      f"{full_rate - delta_rate:>10,.0f} {1 - delta_rate / full_rate:>6.1%} "
+                      f"{packets / len(frames):>9.2f} {encode_us:>10.1f}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks for the LEDnetWF BLE integration"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Timing repeats per measurement, best is reported (default: 5)",
+    )
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    transport = subparsers.add_parser(
+        "transport", help="Per-LED payload throughput at different MTUs"
+    )
+    transport.add_argument(
+        "--mtu", type=int, nargs="+", default=[23, 185, 255, 512],
+        help="ATT MTUs to compare (default: 23 185 255 512)",
+    )
+    transport.add_argument(
+        "--leds", type=int, nargs="+", default=[10, 30, 60, 100, 150, 255],
+        help="Segment/LED counts to encode (default: 10 30 60 100 150 255)",
+    )
+    transport.set_defaults(func=bench_transport)
+
+    templates = subparsers.add_parser(
+        "templates", help="Command template build speed, compiled vs. string"
+    )
+    templates.set_defaults(func=bench_templates)
+
+    responses = subparsers.add_parser(
+        "responses", help="State frame decode speed, compiled vs. hand-written"
+    )
+    responses.add_argument(
+        "--frames", type=int, default=256,
+        help="Distinct random frames per product (default: 256)",
+    )
+    responses.set_defaults(func=bench_responses)
+
+    advertisements = subparsers.add_parser(
+        "advertisements", help="Advertisement parse cost, fingerprinted vs. always"
+    )
+    advertisements.add_argument(
+        "--devices", type=int, default=50,
+        help="Devices in range (default: 50)",
+    )
+    advertisements.add_argument(
+        "--rate", type=int, default=5,
+        help="Advertisements per device per second (default: 5)",
+    )
+    advertisements.add_argument(
+        "--seconds", type=int, default=10,
+        help="Seconds of advertisements to simulate (default: 10)",
+    )
+    advertisements.add_argument(
+        "--change", type=float, default=0.02,
+        help="Probability an advertisement carries new state (default: 0.02)",
+    )
+    advertisements.set_defaults(func=bench_advertisements)
+
+    segments = subparsers.add_parser(
+        "segments", help="Segment frame bytes/sec, full frames vs. delta updates"
+    )
+    segments.add_argument(
+        "--mtu", type=int, nargs="+", default=[23, 255],
+        help="ATT MTUs to compare (default: 23 255)",
+    )
+    segments.add_argument(
+        "--segments", type=int, nargs="+", default=[20, 100, 255],
+        help="Segment counts to animate (default: 20 100 255)",
+    )
+    segments.add_argument(
+        "--frames", type=int, default=200,
+        help="Frames per animation (default: 200)",
+    )
+    segments.add_argument(
+        "--fps", type=int, default=10,
+        help="Frames per second the animation is played at (default: 10)",
+    )
+    segments.set_defaults(func=bench_segments)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()